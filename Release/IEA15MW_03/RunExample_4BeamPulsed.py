@@ -17,8 +17,6 @@ import shutil
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.signal.windows import hamming
-from scipy.signal import welch
-from scipy import signal
 from scipy.interpolate import interp1d
 from scipy.io import loadmat
 import sys
@@ -27,11 +25,16 @@ sys.path.append('..\PythonFunctions')
 from ManipulateTXTFile import ManipulateTXTFile
 from ReadFASTbinaryIntoStruct import ReadFASTbinaryIntoStruct
 from ReadROSCOtextIntoStruct import ReadROSCOtextIntoDataframe
-from CalculateREWSfromWindField import CalulateREWSfromWindField
+from CalculateREWSfromWindField import CalculateREWSfromWindField
+from ProcessingSimulations import RunJobs
+from StageSimulationCase import StageSimulationCase
+from CalculateFFPParameters import CalculateFFPParameters
+from CalculateSpectra import SegmentedRFFT, CrossSpectrum, EstimateSpectra, CalculateCoherence, CrossCorrelation
 
 # Seeds (can be adjusted, but will provide different results)
 nSeed = 6                                           # [-] number of stochastic turbulence field samples
 Seed_vec = [i+18*100 for i in range(1, nSeed + 1)]  # [-] vector of seeds
+nCore = None                                        # [-] number of parallel jobs, default: number of cores, 0 for no parallel processing
 
 # Parameters postprocessing (can be adjusted, but will provide different results)
 t_start = 60                                        # [s] 	ignore data before for STD and spectra
@@ -64,7 +67,8 @@ if not os.path.exists(SimulationFolder):
 # Copy the adequate TurbSim version to the example folder
 shutil.copyfile(os.path.join('..\TurbSim', TurbSimExeFile), os.path.join('TurbulentWind', TurbSimExeFile))
 
-# Generate all wind fields
+# Generate all wind fields in parallel
+TurbSimJobs = []
 for iSeed in range(nSeed):
     Seed = Seed_vec[iSeed]
     WindFileName = f'URef_18_Seed_{Seed:02d}'
@@ -73,7 +77,10 @@ for iSeed in range(nSeed):
     if not os.path.exists(TurbSimResultFile):
         shutil.copyfile(TurbSimTemplateFile, TurbSimInputFile)
         ManipulateTXTFile(TurbSimInputFile, 'MyRandSeed1', str(Seed))  # adjust seed
-        os.system(os.path.join('TurbulentWind', TurbSimExeFile) + ' ' + TurbSimInputFile)
+    TurbSimJobs.append({'name': WindFileName,
+                        'command': [os.path.abspath(os.path.join('TurbulentWind', TurbSimExeFile)), TurbSimInputFile],
+                        'outputs': [TurbSimResultFile]})
+TurbSimResults = RunJobs(TurbSimJobs, n_core=nCore)
 
 # Clean up
 os.remove(os.path.join('TurbulentWind', TurbSimExeFile))
@@ -83,50 +90,54 @@ os.remove(os.path.join('TurbulentWind', TurbSimExeFile))
 # Copy the adequate OpenFAST version to the example folder
 shutil.copyfile(os.path.join('..\OpenFAST', FASTexeFile), FASTexeFile)
 
-#  Simulate with all wind fields
+# Stage all cases in their own folders, so they can be simulated in parallel
+FASTJobs = []
 for iSeed in range(nSeed):
-
-    # Adjust the InflowWind file
     Seed = Seed_vec[iSeed]
     WindFileName = f'URef_18_Seed_{Seed:02d}'
-    WindFileRoot = os.path.join('TurbulentWind', WindFileName)
-    ManipulateTXTFile('IEA-15-240-RWT_InflowFile.dat', 'MyFilenameRoot', WindFileRoot)
-
-    # Run FB
-    FASTresultFile = os.path.join(SimulationFolder, f'{WindFileName}_FlagLAC_0.outb')
-    ROSCOresultFile = os.path.join(SimulationFolder, f'{WindFileName}_FlagLAC_0.dbg')
-    if not os.path.exists(FASTresultFile):
-        ManipulateTXTFile('ROSCO_v2d6.IN', '1 ! FlagLAC', '0 ! FlagLAC')  # disable LAC
-        os.system(FASTexeFile + ' ' + SimulationName + '.fst')
-        shutil.move(SimulationName + '.outb', FASTresultFile)  # store .outb file
-        shutil.move(SimulationName + '.RO.dbg', ROSCOresultFile)  # store rosco output file
-
-    # Run FB+FF
-    FASTresultFile = os.path.join(SimulationFolder, f'{WindFileName}_FlagLAC_1.outb')
-    ROSCOresultFile = os.path.join(SimulationFolder, f'{WindFileName}_FlagLAC_1.dbg')
-    if not os.path.exists(FASTresultFile):
-        ManipulateTXTFile('ROSCO_v2d6.IN', '0 ! FlagLAC', '1 ! FlagLAC')  # enable LAC
-        os.system(FASTexeFile + ' ' + SimulationName + '.fst')
-        shutil.move(SimulationName + '.outb', FASTresultFile)  # store .outb file
-        shutil.move(SimulationName + '.RO.dbg', ROSCOresultFile)  # store rosco output file
+    for FlagLAC in [0, 1]:  # FB and FB+FF
+        CaseName = f'{WindFileName}_FlagLAC_{FlagLAC}'
+        CaseFolder = os.path.join('Cases', CaseName)
+        FASTresultFile = os.path.join(SimulationFolder, f'{CaseName}.outb')
+        if not os.path.exists(FASTresultFile):
+            WindFileRoot = os.path.relpath(os.path.join('TurbulentWind', WindFileName), CaseFolder).replace(os.sep, '/')
+            StageSimulationCase('.', CaseFolder, modifications={
+                'ROSCO_v2d6.IN': [('1 ! FlagLAC', f'{FlagLAC} ! FlagLAC')],  # disable or enable LAC
+                'IEA-15-240-RWT_InflowFile.dat': [('MyFilenameRoot', WindFileRoot)]})  # adjust the wind field
+            FASTJobs.append({'name': CaseName,
+                             'command': [os.path.abspath(FASTexeFile), SimulationName + '.fst'],
+                             'cwd': CaseFolder})
 
-    # Reset the InflowWind file again
-    ManipulateTXTFile('IEA-15-240-RWT_InflowFile.dat', WindFileRoot, 'MyFilenameRoot')
+#  Simulate with all wind fields
+FASTResults = RunJobs(FASTJobs, n_core=nCore)
+
+# Store results
+FailedCases = []
+for FASTJob, FASTResult in zip(FASTJobs, FASTResults):
+    if FASTResult['status'] == 0:
+        CaseFolder = FASTJob['cwd']
+        shutil.move(os.path.join(CaseFolder, SimulationName + '.outb'), os.path.join(SimulationFolder, FASTJob['name'] + '.outb'))  # store .outb file
+        shutil.move(os.path.join(CaseFolder, SimulationName + '.RO.dbg'), os.path.join(SimulationFolder, FASTJob['name'] + '.dbg'))  # store rosco output file
+        shutil.rmtree(CaseFolder)
+    else:
+        print('Simulation {} failed:\n{}'.format(FASTJob['name'], FASTResult['stdout'] + FASTResult['stderr']))
+        FailedCases.append(FASTJob['name'])
 
 # Clean up
 os.remove(FASTexeFile)
+if FailedCases:
+    raise Exception('OpenFAST simulations failed: ' + ', '.join(FailedCases))
 
 # Postprocessing: evaluate data
 
 # Allocation
-S_RotSpeed_FB_est = np.empty((nSeed, int(nFFT/2+1)))
-S_RotSpeed_FBFF_est = np.empty((nSeed, int(nFFT/2+1)))
-S_LL_est = np.empty((nSeed, int(nFFT/2+1)))
-S_RR_est = np.empty((nSeed, int(nFFT/2+1)))
-S_RL_est = np.empty((nSeed, int(nFFT/2+1)), dtype=complex)
+RotSpeed_FB = []
+RotSpeed_FBFF = []
+REWS_Lidar = []
+REWS_Rotor = []
+REWS_Lidar_f = []
 STD_RotSpeed_FB = np.empty(nSeed)
 STD_RotSpeed_FBFF = np.empty(nSeed)
-c_filter = np.empty((nSeed, int(AnalysisTime*Fs*2+1)))
 
 # Loop over all seeds
 for iSeed in range(nSeed):
@@ -136,12 +147,12 @@ for iSeed in range(nSeed):
     WindFileName = f'URef_18_Seed_{Seed:02d}'
     FASTresultFile = os.path.join(SimulationFolder, f'{WindFileName}_FlagLAC_0.outb')
     ROSCOresultFile = os.path.join(SimulationFolder, f'{WindFileName}_FlagLAC_0.dbg')
-    FB = ReadFASTbinaryIntoStruct(FASTresultFile)
-    R_FB = ReadROSCOtextIntoDataframe(ROSCOresultFile)
+    FB = ReadFASTbinaryIntoStruct(FASTresultFile, channels=['RotSpeed'])
+    R_FB = ReadROSCOtextIntoDataframe(ROSCOresultFile, usecols=['Time', 'REWS', 'REWS_f'])
     FASTresultFile = os.path.join(SimulationFolder, f'{WindFileName}_FlagLAC_1.outb')
     ROSCOresultFile = os.path.join(SimulationFolder, f'{WindFileName}_FlagLAC_1.dbg')
-    FBFF = ReadFASTbinaryIntoStruct(FASTresultFile)
-    R_FBFF = ReadROSCOtextIntoDataframe(ROSCOresultFile)
+    FBFF = ReadFASTbinaryIntoStruct(FASTresultFile, channels=['RotSpeed'])
+    R_FBFF = ReadROSCOtextIntoDataframe(ROSCOresultFile, usecols=['Time', 'REWS', 'REWS_f'])
 
     # Plot rotor speed
     plt.figure(f'Rotor speed seed {Seed}')
@@ -152,48 +163,43 @@ for iSeed in range(nSeed):
     plt.legend(['feedback only', 'feedback-feedforward'])
     plt.xlabel('time [s]')
 
-    # Estimate rotor speed spectra
-    f_est, S_RotSpeed_FB_est[iSeed, :] = signal.welch(
-        signal.detrend(FB['RotSpeed'][FB['Time'] > t_start], type='constant'), fs=Fs, window=vWindow, noverlap=nOverlap,
-        nfft=nFFT)
-    _, S_RotSpeed_FBFF_est[iSeed, :] = signal.welch(
-        signal.detrend(FBFF['RotSpeed'][FBFF['Time'] > t_start], type='constant'), fs=Fs, window=vWindow,
-        noverlap=nOverlap, nfft=nFFT)
+    # Collect rotor speed for spectra
+    RotSpeed_FB.append(FB['RotSpeed'][FB['Time'] > t_start])
+    RotSpeed_FBFF.append(FBFF['RotSpeed'][FBFF['Time'] > t_start])
 
     # Calculate standard deviation rotor speed
     STD_RotSpeed_FB[iSeed] = np.std(FB['RotSpeed'][FB['Time'] > t_start])
     STD_RotSpeed_FBFF[iSeed] = np.std(FBFF['RotSpeed'][FBFF['Time'] > t_start])
 
-    # Estimate auto- and cross-spectra of REWS
+    # Collect REWS from lidar and wind field for auto- and cross-spectra
     TurbSimResultFile = 'TurbulentWind/URef_18_Seed_{:02d}.wnd'.format(Seed)
-    REWS_WindField, Time_WindField = CalulateREWSfromWindField(TurbSimResultFile, iSeed)
-    REWS_WindField_Fs = interp1d(Time_WindField.ravel(),REWS_WindField.ravel())(R_FBFF.iloc[:, 0]) # get REWS with the same time step as simulations
-    _, S_LL_est[iSeed, :] = signal.welch(
-        signal.detrend(R_FBFF.iloc[:, 26][R_FBFF.iloc[:, 0] >= t_start], type='constant'),
-        fs=Fs, window=vWindow, noverlap=nOverlap, nfft=nFFT)
-    _, S_RR_est[iSeed, :] = signal.welch(
-        signal.detrend(REWS_WindField_Fs[R_FBFF.iloc[:, 0] >= t_start], type='constant'),
-        fs=Fs, window=vWindow, noverlap=nOverlap, nfft=nFFT)
-    _, S_RL_est[iSeed, :] = signal.csd(signal.detrend(REWS_WindField_Fs[R_FBFF.iloc[:, 0] >= t_start], type='constant'),
-                                       signal.detrend(R_FBFF.iloc[:, 26][R_FBFF.iloc[:, 0] >= t_start],
-                                                      type='constant'),
-                                       fs=Fs, window=vWindow, noverlap=nOverlap, nfft=nFFT)
+    REWS_WindField, Time_WindField = CalculateREWSfromWindField(TurbSimResultFile, R, 2)
+    REWS_WindField_Fs = interp1d(Time_WindField.ravel(),REWS_WindField.ravel())(R_FBFF['Time']) # get REWS with the same time step as simulations
+    REWS_Lidar.append(R_FBFF['REWS'][R_FBFF['Time'] >= t_start])
+    REWS_Rotor.append(REWS_WindField_Fs[R_FBFF['Time'] >= t_start])
 
     # Plot REWS
     plt.figure('REWS seed {}'.format(Seed))
-    plt.plot(R_FBFF.iloc[:, 0], REWS_WindField_Fs)
-    plt.plot(R_FBFF.iloc[:, 0], R_FBFF.iloc[:, 26])
+    plt.plot(R_FBFF['Time'], REWS_WindField_Fs)
+    plt.plot(R_FBFF['Time'], R_FBFF['REWS'])
     plt.ylabel('REWS [m/s]')
     plt.legend(['wind field', 'lidar estimate'])
     plt.xlabel('time [s]')
 
-    # Estimate cross correlation TODO: get normalized cross correlation
-    c_filter[iSeed, :] = np.correlate(signal.detrend(R_FBFF.iloc[:, 27][R_FBFF.iloc[:, 0] >= t_start], type='constant'),
-                                      signal.detrend(R_FBFF.iloc[:, 26][R_FBFF.iloc[:, 0] >= t_start], type='constant'), mode='full')
-    lags = np.arange(-AnalysisTime*Fs, AnalysisTime*Fs+1)
+    # Collect filtered REWS for cross correlation
+    REWS_Lidar_f.append(R_FBFF['REWS_f'][R_FBFF['Time'] >= t_start])
+
+# Estimate rotor speed spectra of all seeds, one FFT per signal
+f_est, X_RotSpeed_FB = SegmentedRFFT(np.array(RotSpeed_FB), Fs, vWindow, nOverlap, nFFT)
+_, X_RotSpeed_FBFF = SegmentedRFFT(np.array(RotSpeed_FBFF), Fs, vWindow, nOverlap, nFFT)
+S_RotSpeed_FB_est = CrossSpectrum(X_RotSpeed_FB)
+S_RotSpeed_FBFF_est = CrossSpectrum(X_RotSpeed_FBFF)
+
+# Estimate auto- and cross-spectra of REWS of all seeds, one FFT per signal
+_, S_RR_est, S_LL_est, S_RL_est = EstimateSpectra(np.array(REWS_Rotor), np.array(REWS_Lidar), Fs, vWindow, nOverlap, nFFT)
 
 # Calculate mean coherence
-gamma2_RL_mean_est = np.abs(np.mean(S_RL_est, axis=0)) ** 2 / np.mean(S_LL_est, axis=0) / np.mean(S_RR_est, axis=0)
+gamma2_RL_mean_est = CalculateCoherence(S_LL_est, S_RR_est, S_RL_est)
 
 # Get analytical correlation model
 SpectralModelFileName = '..\AnalyticalModel\LidarRotorSpectra_IEA15MW_4BeamPulsed.mat'  # model for 18 m/s
@@ -227,13 +233,15 @@ plt.xlabel('frequency [Hz]')
 plt.ylabel('Spectra REWS [(m/s)^2/Hz]')
 plt.legend(['Lidar Analytical', 'Rotor Analytical', 'Lidar Estimated', 'Rotor Estimated'])
 
-# Plot filter delay
+# Estimate normalized cross correlation of all seeds and filter delay
+lags, c_filter = CrossCorrelation(np.array(REWS_Lidar_f), np.array(REWS_Lidar), Fs, max_lag=20)
 c_filter_mean = np.mean(c_filter, axis=0)
-c_max, idx_max = np.max(c_filter_mean), np.argmax(c_filter_mean)
-T_filter = lags[idx_max] / Fs  # [s]       time delay by the filter
+T_filter = lags[np.argmax(c_filter_mean)]  # [s]       time delay by the filter
+
+# Plot filter delay
 plt.figure('Filter delay')
-plt.plot(lags / Fs, c_filter_mean)
-plt.plot(T_filter, c_max, 'o')
+plt.plot(lags, c_filter_mean)
+plt.plot(T_filter, np.max(c_filter_mean), 'o')
 plt.xlim([-20, 20])
 plt.xlabel('time [s]')
 plt.ylabel('cross correlation [-]')
@@ -249,11 +257,10 @@ plt.legend(['Analytical', 'Estimated'])
 plt.show()
 
 # Get parameters for FFP_v1_4BeamPulsed.in
-G_RL = AnalyticalModel['S_RL']/AnalyticalModel['S_LL']                                          # [-]       transfer function
-f_cutoff = interp1d(np.abs(G_RL.ravel()),AnalyticalModel['f'].ravel())(10**(-3/20))*2*np.pi     # [rad/s]   desired cutoff (-3dB) angular frequency
 URef = 18                                                                                       # [m/s]     mean wind speed
 x_L = 160                                                                                       # [m]       distance of lidar measurement
-T_Taylor = x_L/URef                                                                             # [s]       travel time from lidar measurment to rotor
-T_scan = 1                                                                                      # [s]       time of full lidar scan
 tau = 2                                                                                         # [s]       time to overcome pitch actuator, from Example 1: tau = T_Taylor - T_buffer, since there T_filter = T_scan = 0
-T_buffer = T_Taylor-1/2*T_scan-T_filter-tau                                                     # [s]       time needed to buffer signal such that FF signal is applied with tau, see Schlipf2015, Equation (5.40)
+FFP = CalculateFFPParameters(SpectralModelFileName, URef, x_L, tau=tau, T_filter=T_filter)     # [-]       f_cutoff from |G_RL| (-3dB), T_buffer = T_Taylor-1/2*T_scan-T_filter-tau, see Schlipf2015, Equation (5.40)
+f_cutoff = FFP['f_cutoff'][URef]                                                                # [rad/s]   desired cutoff (-3dB) angular frequency
+T_buffer = FFP['T_buffer'][URef]                                                                # [s]       time needed to buffer signal such that FF signal is applied with tau
+print('f_cutoff = %6.4f rad/s, T_buffer = %6.4f s\n' % (f_cutoff, T_buffer))
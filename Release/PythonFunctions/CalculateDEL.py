@@ -0,0 +1,156 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from ReadFASTbinary import FASTbinaryFile
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+N_REF_Default = 2e6/(20*8760*3600/600)  # [-] fraction of 2e6 in 20 years for 600s
+
+
+def GetTurningPoints(Data):
+    """Extracts the turning points (local extrema, first and last point) of a signal.
+
+      Args:
+        Data: Signal.
+
+      Returns:
+        Array with the turning points.
+      """
+    Data = np.asarray(Data, dtype=np.float64).ravel()
+    Data = Data[~np.isnan(Data)]
+    if len(Data) < 3:
+        return Data.copy()
+
+    # remove repeated values, then keep points where the slope changes sign
+    Data = Data[np.concatenate(([True], np.diff(Data) != 0))]
+    Slope = np.sign(np.diff(Data))
+    IsTurningPoint = np.concatenate(([True], Slope[1:] != Slope[:-1], [True]))
+    return Data[IsTurningPoint]
+
+
+def _RainflowKernel(points, n_points, stack, ranges, counts):
+    # four-point rainflow counting: full cycles are removed from the stack,
+    # the remaining stack is the residue
+    n_stack = 0
+    n_cycles = 0
+    for i in range(n_points):
+        stack[n_stack] = points[i]
+        n_stack += 1
+        while n_stack >= 4:
+            X = abs(stack[n_stack-3] - stack[n_stack-2])
+            if X <= abs(stack[n_stack-4] - stack[n_stack-3]) and X <= abs(stack[n_stack-2] - stack[n_stack-1]):
+                ranges[n_cycles] = X
+                counts[n_cycles] = 1.0
+                n_cycles += 1
+                stack[n_stack-3] = stack[n_stack-1]
+                n_stack -= 2
+            else:
+                break
+    return n_stack, n_cycles
+
+
+if njit is not None:
+    _RainflowKernelCompiled = njit(cache=True)(_RainflowKernel)
+
+
+def Rainflow(Data, residue=None, close=True):
+    """Rainflow counting (ASTM E1049) with the four-point method.
+
+      The counting can be continued on the next block of a signal by passing
+      the returned residue.
+
+      Args:
+        Data: Signal (or block of a signal).
+        residue: Residue of the previous block.
+        close: Count the residue as half cycles.
+
+      Returns:
+        Range: Ranges of the cycles.
+        Count: Number of cycles (1 for full cycles, 0.5 for half cycles).
+        residue: Turning points which are not part of a full cycle yet.
+      """
+    if residue is not None and len(residue) > 0:
+        Data = np.concatenate((residue, np.asarray(Data, dtype=np.float64).ravel()))
+    points = GetTurningPoints(Data)
+    n_points = len(points)
+    stack = np.empty(n_points)
+    ranges = np.empty(max(n_points // 2, 1))
+    counts = np.empty(max(n_points // 2, 1))
+    if njit is not None:
+        n_stack, n_cycles = _RainflowKernelCompiled(points, n_points, stack, ranges, counts)
+    else:
+        # lists are faster than arrays for element-wise access in Python
+        stack_list = stack.tolist()
+        ranges_list = ranges.tolist()
+        counts_list = counts.tolist()
+        n_stack, n_cycles = _RainflowKernel(points.tolist(), n_points, stack_list, ranges_list, counts_list)
+        stack, ranges, counts = np.array(stack_list), np.array(ranges_list), np.array(counts_list)
+
+    residue = stack[:n_stack].copy()
+    Range = ranges[:n_cycles]
+    Count = counts[:n_cycles]
+    if close and n_stack > 1:
+        Range = np.concatenate((Range, np.abs(np.diff(residue))))
+        Count = np.concatenate((Count, np.full(n_stack - 1, 0.5)))
+    return Range, Count, residue
+
+
+def CalculateDEL(Data, Time, WoehlerExponent, N_REF=N_REF_Default):
+    """Calculates damage equivalent loads.
+
+      Args:
+        Data: Signal, e.g. TwrBsMyt.
+        Time: Time of the signal [s].
+        WoehlerExponent: Woehler exponent, e.g. 4 for steel.
+        N_REF: Reference number of cycles, default: fraction of 2e6 in 20
+          years for 600s.
+
+      Returns:
+        The damage equivalent load.
+      """
+    Range, Count, _ = Rainflow(Data)
+    DEL = (np.sum(Range**WoehlerExponent * Count) / N_REF)**(1/WoehlerExponent)
+    return DEL
+
+
+def _CalculateDELsFile(args):
+    file_name, channels, WoehlerExponent, StartTime, N_REF = args
+    f = FASTbinaryFile(file_name)
+    Time = f.time
+    Selected = Time >= StartTime
+    DELs = [CalculateDEL(f[channel][Selected], Time[Selected], WoehlerExponent, N_REF) for channel in channels]
+    f.close()
+    return DELs
+
+
+def CalculateDELs(file_names, channels, WoehlerExponent, StartTime=0, N_REF=N_REF_Default, n_processes=None):
+    """Calculates damage equivalent loads for many channels and files.
+
+      The files are distributed over a pool of processes, only the requested
+      channels are read from each file.
+
+      Args:
+        file_names: List of FAST binary (.outb) files.
+        channels: List of channel names, e.g. ['TwrBsMyt', 'RootMyc1'].
+        WoehlerExponent: Woehler exponent, e.g. 4 for steel.
+        StartTime: Data before this time is ignored [s].
+        N_REF: Reference number of cycles.
+        n_processes: Number of processes, default: number of cores, 0 for no
+          parallel processing.
+
+      Returns:
+        Array (n_files, n_channels) with the damage equivalent loads.
+      """
+    tasks = [(file_name, list(channels), WoehlerExponent, StartTime, N_REF) for file_name in file_names]
+    if n_processes == 0 or len(tasks) <= 1:
+        DELs = [_CalculateDELsFile(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_processes or os.cpu_count()) as executor:
+            DELs = list(executor.map(_CalculateDELsFile, tasks))
+    return np.array(DELs).reshape(len(tasks), len(channels))
+# source: Matlab-Function (CalculateDEL.m)
\ No newline at end of file
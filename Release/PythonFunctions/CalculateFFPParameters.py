@@ -0,0 +1,179 @@
+import os
+import numpy as np
+import pandas as pd
+from scipy.io import loadmat
+from FASTInputFile import ReadFASTInputFile
+
+_SpectralModelCache = {}
+_FFPReferenceCache = {}
+
+
+def LoadSpectralModel(SpectralModelFileName):
+    """Loads an analytical spectral model (see LidarRotorSpectra_*.mat), cached per file.
+
+      Returns:
+        A dict with f [Hz], S_LL, S_RR, S_RL, URef [m/s] of the model and
+        T_scan [s], the time of a full lidar scan.
+      """
+    stat = os.stat(SpectralModelFileName)
+    key = (os.path.abspath(SpectralModelFileName), stat.st_size, stat.st_mtime_ns)
+    if key not in _SpectralModelCache:
+        mat = loadmat(SpectralModelFileName, squeeze_me=True, struct_as_record=False)
+        _SpectralModelCache[key] = {'f': np.ravel(mat['f']),
+                                    'S_LL': np.ravel(mat['S_LL']),
+                                    'S_RR': np.ravel(mat['S_RR']),
+                                    'S_RL': np.ravel(mat['S_RL']),
+                                    'URef': float(mat['Parameter'].TurbSim.URef),
+                                    'T_scan': float(np.max(mat['Trajectory'].t))}
+    return _SpectralModelCache[key]
+
+
+def CalculateCutoffFrequency(f, G_RL, Level=-3):
+    """Angular frequency where |G_RL| first drops below Level (in dB).
+
+      Args:
+        f: Frequencies [Hz].
+        G_RL: Transfer function(s) S_RL/S_LL, (nFreq,) or (nModels, nFreq).
+        Level: Level of the cutoff [dB].
+
+      Returns:
+        The cutoff frequency [rad/s], one per model.
+      """
+    G = np.atleast_2d(np.abs(G_RL))
+    threshold = 10**(Level/20)
+    below = G < threshold
+    if not np.all(np.any(below, axis=1)):
+        raise Exception('|G_RL| does not drop below {} dB'.format(Level))
+    i = np.maximum(np.argmax(below, axis=1), 1)
+    rows = np.arange(G.shape[0])
+    G0, G1 = G[rows, i-1], G[rows, i]
+    f_cutoff = (f[i-1] + (threshold - G0) / (G1 - G0) * (f[i] - f[i-1])) * 2*np.pi
+    return f_cutoff if np.ndim(G_RL) > 1 else f_cutoff[0]
+
+
+def CalculateFilterDelay(f, S_LL, f_cutoff, max_lag=20, DT=0.0125):
+    """Time delay of the FFP low-pass filter from the analytical lidar spectrum.
+
+      The delay is the lag of the maximum of the cross-correlation of the
+      filtered and unfiltered lidar REWS, which is the inverse Fourier
+      transform of H(f)*S_LL(f) with the first-order low-pass filter H. This
+      is the analytical counterpart of EstimateFilterDelay.
+
+      Args:
+        f: Frequencies [Hz].
+        S_LL: Auto-spectrum of the lidar REWS, (nFreq,) or (nModels, nFreq).
+        f_cutoff: Cutoff frequency [rad/s], one per model.
+        max_lag: The delay is searched within 0..max_lag [s].
+        DT: Resolution of the delay [s], e.g. the time step of the simulation.
+
+      Returns:
+        The filter delay T_filter [s], one per model.
+      """
+    S = np.atleast_2d(S_LL)
+    f_cutoff = np.broadcast_to(f_cutoff, S.shape[:1])
+    lags = np.arange(0, max_lag + DT/2, DT)
+    Kernel = np.exp(2j*np.pi*np.outer(lags, f))
+    T_filter = np.empty(S.shape[0])
+    for iModel in range(S.shape[0]):
+        H = 1 / (1 + 2j*np.pi*f/f_cutoff[iModel])
+        T_filter[iModel] = lags[np.argmax(np.real(Kernel @ (H * S[iModel])))]
+    return T_filter if np.ndim(S_LL) > 1 else T_filter[0]
+
+
+def CalculateFFPParameters(SpectralModelFileName, URef_v, x_L, tau=2, T_scan=None, T_filter=None, max_lag=20, DT=0.0125):
+    """FFP_v1 parameters (f_cutoff, T_buffer) for a grid of mean wind speeds.
+
+      The cutoff frequency and the filter delay are calculated once per
+      spectral model (memoized) and scaled with Taylor's hypothesis: the
+      spectra scale with f/URef, so f_cutoff ~ URef and T_filter ~ 1/URef,
+      as for the values in GetParametersForDLC1p2.m. Then
+        T_buffer = x_L/URef - T_scan/2 - T_filter - tau,
+      see Schlipf2015, Equation (5.40).
+
+      Example (see RunExample_CircularCW.py):
+        FFP = CalculateFFPParameters('LidarRotorSpectra_IEA15MW_CircularCW.mat', np.arange(10, 25, 2), 240)
+
+      Args:
+        SpectralModelFileName: Analytical spectral model, see LoadSpectralModel.
+        URef_v: Mean wind speeds [m/s].
+        x_L: Distance of the lidar measurement [m].
+        tau: Time to overcome the pitch actuator [s].
+        T_scan: Time of a full lidar scan [s], default: from the trajectory.
+        T_filter: Filter delay at the URef of the model [s], e.g. from
+          EstimateFilterDelay of simulations, default: analytical, see
+          CalculateFilterDelay.
+        max_lag, DT: See CalculateFilterDelay.
+
+      Returns:
+        A DataFrame (index: URef) with f_cutoff [rad/s], T_filter [s] and
+        T_buffer [s].
+      """
+    Model = LoadSpectralModel(SpectralModelFileName)
+    key = (os.path.abspath(SpectralModelFileName), os.stat(SpectralModelFileName).st_mtime_ns, T_filter, max_lag, DT)
+    if key not in _FFPReferenceCache:
+        f_cutoff_ref = CalculateCutoffFrequency(Model['f'], Model['S_RL'] / Model['S_LL'])
+        if T_filter is None:
+            T_filter = CalculateFilterDelay(Model['f'], Model['S_LL'], f_cutoff_ref, max_lag, DT)
+        _FFPReferenceCache[key] = (f_cutoff_ref, T_filter)
+    f_cutoff_ref, T_filter_ref = _FFPReferenceCache[key]
+    T_scan = Model['T_scan'] if T_scan is None else T_scan
+
+    URef_v = np.atleast_1d(np.asarray(URef_v, dtype=float))
+    Parameters = pd.DataFrame(index=pd.Index(URef_v, name='URef'))
+    Parameters['f_cutoff'] = f_cutoff_ref * URef_v / Model['URef']                             # [rad/s]   desired cutoff (-3dB) angular frequency
+    Parameters['T_filter'] = T_filter_ref * Model['URef'] / URef_v                             # [s]       time delay by the filter
+    Parameters['T_buffer'] = x_L / URef_v - 1/2*T_scan - Parameters['T_filter'] - tau          # [s]       time needed to buffer signal
+    return Parameters
+
+
+def CalculateFFPParameterTable(Configurations, URef_v, **options):
+    """FFP_v1 parameters for several lidar configurations.
+
+      Example:
+        Configurations = {'CircularCW': ('LidarRotorSpectra_IEA15MW_CircularCW.mat', 240),
+                          '4BeamPulsed': ('LidarRotorSpectra_IEA15MW_4BeamPulsed.mat', 160)}
+        Table = CalculateFFPParameterTable(Configurations, np.arange(10, 25, 2))
+
+      Args:
+        Configurations: Dict of name: (spectral model file, x_L).
+        URef_v: Mean wind speeds [m/s].
+        **options: See CalculateFFPParameters.
+
+      Returns:
+        A DataFrame (index: configuration, URef) with f_cutoff, T_filter and T_buffer.
+      """
+    Tables = {Name: CalculateFFPParameters(SpectralModelFileName, URef_v, x_L, **options)
+              for Name, (SpectralModelFileName, x_L) in Configurations.items()}
+    return pd.concat(Tables, names=['Configuration'])
+
+
+def GetFFPModifications(iFile, Parameters, iURef=0):
+    """Modifications of a FFP_v1 input file for PreProcessingSimulations.
+
+      f_cutoff and T_buffer are interpolated from the parameters at the URef
+      of each simulation, as in GetParametersForDLC1p2.m.
+
+      Args:
+        iFile: Index of the FFP_v1 input file in InputFiles.
+        Parameters: Result of CalculateFFPParameters.
+        iURef: Index of URef in PreProcessingVariation.
+      """
+    URef_v = Parameters.index.to_numpy()
+    return [(iFile, 'I', 'f_cutoff', lambda VariationValues: '%.4f' % np.interp(VariationValues[iURef], URef_v, Parameters['f_cutoff'])),
+            (iFile, 'I', 'T_buffer', lambda VariationValues: '%.4f' % np.interp(VariationValues[iURef], URef_v, Parameters['T_buffer']))]
+
+
+def WriteFFPInputFile(TemplateFile, NewFile, f_cutoff, T_buffer, StaticWind=None, StaticPitch=None):
+    """Writes a copy of a FFP_v1 input file with new f_cutoff [rad/s] and T_buffer [s].
+
+      Optionally, the static pitch curve is replaced by StaticWind [m/s] and
+      StaticPitch [rad], e.g. from CalculateStaticPitchCurve.
+      """
+    FFP = ReadFASTInputFile(TemplateFile).copy()
+    FFP['f_cutoff'] = round(float(f_cutoff), 4)
+    FFP['T_buffer'] = round(float(T_buffer), 4)
+    if StaticWind is not None:
+        FFP['n_StaticPitchCurve'] = len(StaticWind)
+        FFP['StaticWind'] = np.round(np.asarray(StaticWind, dtype=float), 4)
+        FFP['StaticPitch'] = np.round(np.asarray(StaticPitch, dtype=float), 4)
+    FFP.write(NewFile)
\ No newline at end of file
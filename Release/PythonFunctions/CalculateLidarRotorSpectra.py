@@ -0,0 +1,164 @@
+import os
+import json
+import hashlib
+import numpy as np
+from scipy import sparse
+from scipy.io import savemat
+from SimulateLidar import ReadLidarFile
+from CalculateREWSfromWindField import GetRotorDiscWeights
+
+I_ref = {'A': 0.16, 'B': 0.14, 'C': 0.12}  # [-] reference turbulence intensity, IEC 61400-1 Ed. 3
+DefaultCacheFolder = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'AnalyticalModel', 'Cache')
+
+
+def GetLidarTrajectory(LidarFile, gates=None):
+    """Measurement points and range weighting of a lidar input file (LidarFile_*.dat).
+
+      Args:
+        LidarFile: Lidar input file or lidar configuration, see ReadLidarFile.
+        gates: Indices (1-based, as IndexGate in LDP_v1) of the range gates
+          to use, default: all gates.
+
+      Returns:
+        A dict with the points x (upstream), y, z [m] relative to the hub,
+        the range weighting (distances [m] along the beam and weights, which
+        sum up to 1), the direction of each beam and T_scan [s], the time of a
+        full scan.
+      """
+    Config = ReadLidarFile(LidarFile) if isinstance(LidarFile, str) else LidarFile
+    Points = Config['Points'] if gates is None else Config['Points'][:, np.asarray(gates) - 1]
+    Points = Points.reshape(-1, 3)
+    return {'x': Points[:, 0], 'y': Points[:, 1], 'z': Points[:, 2],
+            'Direction': (Points / np.linalg.norm(Points, axis=1, keepdims=True)).T,
+            'Distances': Config['Distances'],
+            'Weights': Config['Weights'],
+            'T_scan': Config['Points'].shape[0] * Config['t_measurement_interval']}
+
+
+def KaimalSpectrum(f, URef, sigma, L):
+    """Kaimal spectrum [(m/s)^2/Hz] with standard deviation sigma [m/s] and length scale L [m]."""
+    return 4*sigma**2*L/URef / (1 + 6*f*L/URef)**(5/3)
+
+
+def _CoherenceSum(f, U, L_c, Distance, Tau, Weight, max_elements=2**22):
+    # sum over point pairs of Weight * IEC coherence(f, Distance) * exp(-i 2 pi f Tau):
+    # the coherence is evaluated only for the unique distances and the phase
+    # only for the unique time shifts, the pairs are summed up in between
+    Distance, iDistance = np.unique(np.round(Distance.ravel(), 6), return_inverse=True)
+    Tau, iTau = np.unique(np.round(Tau.ravel(), 6), return_inverse=True)
+    Weight = sparse.csr_matrix((Weight.ravel(), (iTau.ravel(), iDistance.ravel())), shape=(len(Tau), len(Distance)))
+
+    Sum = np.empty(len(f), dtype=complex)
+    nChunk = max(1, max_elements // len(Distance))
+    for iStart in range(0, len(f), nChunk):
+        f_chunk = f[iStart:iStart + nChunk, None]
+        Coherence = np.exp(-12*np.sqrt((f_chunk*Distance/U)**2 + (0.12*Distance/L_c)**2))
+        Sum[iStart:iStart + nChunk] = np.sum(np.exp(-2j*np.pi*f_chunk*Tau) * (Weight @ Coherence.T).T, axis=1)
+    return Sum
+
+
+def CalculateLidarRotorSpectra(Trajectory, URef, R, f=None, IECturbc='B', HubHt=150, GridWidth=256, nGrid=33):
+    """Analytical auto- and cross-spectra of the lidar and rotor-effective wind speed.
+
+      The u-component follows the IEC Kaimal spectrum and the IEC exponential
+      coherence model (IEC 61400-1 Ed. 3) with frozen turbulence, so a point
+      x upstream sees the wind x/URef earlier than the rotor. The lidar
+      estimates u from the line-of-sight speed of each point, weighted along
+      the beam; the v- and w-components are uncorrelated between points and
+      only add to S_LL. The rotor-effective wind speed is the mean over the
+      grid points inside the rotor disc. The phase of S_RL is given by the
+      preview time x/URef of the points along the beams.
+
+      Args:
+        Trajectory: Lidar trajectory, see GetLidarTrajectory.
+        URef: Mean wind speed [m/s].
+        R: Rotor radius [m].
+        f: Frequencies [Hz], default: (1:1024)/1024.
+        IECturbc: IEC turbulence class ('A', 'B', 'C') or turbulence intensity [%].
+        HubHt: Hub height [m], for the turbulence length scale.
+        GridWidth, nGrid: Width [m] and number of points per direction of the
+          rotor grid, as in the TurbSim input file.
+
+      Returns:
+        A dict with f [Hz], S_LL, S_RR, S_RL [(m/s)^2/Hz], URef [m/s] and T_scan [s].
+      """
+    f = np.arange(1, 1025) / 1024 if f is None else np.asarray(f, dtype=float)
+    if isinstance(IECturbc, str):
+        sigma_u = I_ref[IECturbc] * (0.75*URef + 5.6)
+    else:
+        sigma_u = IECturbc / 100 * URef
+    Lambda_1 = 0.7 * min(HubHt, 60)
+    L_c = 8.1 * Lambda_1                                                     # [m] coherence scale parameter
+    S_u = KaimalSpectrum(f, URef, sigma_u, 8.1*Lambda_1)
+    S_v = KaimalSpectrum(f, URef, 0.8*sigma_u, 2.7*Lambda_1)
+    S_w = KaimalSpectrum(f, URef, 0.5*sigma_u, 0.66*Lambda_1)
+
+    # lidar points along each beam, with the time shift by frozen turbulence
+    Direction = Trajectory['Direction']
+    Distances = Trajectory['Distances']
+    x = (Trajectory['x'][:, None] + Direction[0][:, None]*Distances).ravel()
+    y = (Trajectory['y'][:, None] + Direction[1][:, None]*Distances).ravel()
+    z = (Trajectory['z'][:, None] + Direction[2][:, None]*Distances).ravel()
+    w_L = (np.ones(len(Trajectory['x']))[:, None] * Trajectory['Weights'] / len(Trajectory['x'])).ravel()
+    Tau_L = x / URef
+    ny = np.repeat(Direction[1] / Direction[0], len(Distances))
+    nz = np.repeat(Direction[2] / Direction[0], len(Distances))
+
+    # rotor grid points
+    y_grid = np.linspace(-GridWidth/2, GridWidth/2, nGrid)
+    w_R = GetRotorDiscWeights(y_grid, y_grid, 0, R).ravel()
+    Y_R, Z_R = np.meshgrid(y_grid, y_grid, indexing='ij')
+    y_R, z_R, w_R = Y_R.ravel()[w_R > 0], Z_R.ravel()[w_R > 0], w_R[w_R > 0]
+
+    def Distance(y1, z1, y2, z2):
+        return np.hypot(y1[:, None] - y2[None, :], z1[:, None] - z2[None, :])
+
+    S_LL = S_u * np.real(_CoherenceSum(f, URef, L_c, Distance(y, z, y, z), Tau_L[:, None] - Tau_L[None, :], np.outer(w_L, w_L)))
+    S_LL += S_v * np.sum((w_L*ny)**2) + S_w * np.sum((w_L*nz)**2)
+    S_RR = S_u * np.real(_CoherenceSum(f, URef, L_c, Distance(y_R, z_R, y_R, z_R), np.zeros((len(w_R), len(w_R))), np.outer(w_R, w_R)))
+    S_RL = S_u * _CoherenceSum(f, URef, L_c, Distance(y_R, z_R, y, z), np.zeros((len(w_R), 1)) + Tau_L, np.outer(w_R, w_L))
+    return {'f': f, 'S_LL': S_LL, 'S_RR': S_RR, 'S_RL': S_RL, 'URef': float(URef), 'T_scan': Trajectory['T_scan']}
+
+
+def GenerateSpectralModel(LidarFile, URef, R, gates=None, cache_folder=DefaultCacheFolder, **options):
+    """Analytical spectral model for a lidar input file, cached on disk.
+
+      The model is stored as LidarRotorSpectra_<hash>.mat, where the hash is
+      taken over the trajectory and all parameters, in the layout of the
+      files in AnalyticalModel, so it can be used with loadmat,
+      LoadSpectralModel and CalculateFFPParameters.
+
+      Example:
+        SpectralModelFileName = GenerateSpectralModel('LidarFile_4BeamPulsed.dat', 16, 120, gates=[6])
+
+      Args:
+        LidarFile: Lidar input file, see GetLidarTrajectory.
+        URef: Mean wind speed [m/s].
+        R: Rotor radius [m].
+        gates: Range gates to use, see GetLidarTrajectory.
+        cache_folder: Folder of the cached models.
+        **options: See CalculateLidarRotorSpectra.
+
+      Returns:
+        The file name of the spectral model.
+      """
+    Trajectory = GetLidarTrajectory(LidarFile, gates)
+    f = options.get('f')
+    Hash = hashlib.sha1(json.dumps({'URef': URef, 'R': R, **{k: v for k, v in options.items() if k != 'f'}}, sort_keys=True).encode())
+    for Value in [Trajectory[k] for k in sorted(Trajectory)] + [f]:
+        Hash.update(np.asarray(Value if Value is not None else np.nan, dtype=float).tobytes())
+    FileName = os.path.join(cache_folder, 'LidarRotorSpectra_{}.mat'.format(Hash.hexdigest()[:16]))
+
+    if not os.path.exists(FileName):
+        Spectra = CalculateLidarRotorSpectra(Trajectory, URef, R, **options)
+        os.makedirs(cache_folder, exist_ok=True)
+        TempFile = FileName + '.tmp.mat'
+        savemat(TempFile, {'f': Spectra['f'][:, None],
+                           'S_LL': Spectra['S_LL'][:, None],
+                           'S_RR': Spectra['S_RR'][:, None],
+                           'S_RL': Spectra['S_RL'][:, None],
+                           'Parameter': {'TurbSim': {'URef': Spectra['URef']}},
+                           'Trajectory': {'t': Spectra['T_scan'], 'x_L_AllDistances': Trajectory['x'],
+                                          'y_L_AllDistances': Trajectory['y'], 'z_L_AllDistances': Trajectory['z']}})
+        os.replace(TempFile, FileName)
+    return FileName
\ No newline at end of file
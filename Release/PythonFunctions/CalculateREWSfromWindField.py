@@ -1,14 +1,77 @@
 import numpy as np
-from scipy.io import loadmat
+from ReadBLgrid import ReadBLgridHeader, ReadBLgridPacked
 
-def CalulateREWSfromWindField(file_name, loop):
-    # Load .mat file
-    file = '../IEA15MW_03/CaluculateRWESfromWindField.mat'
-    mat = loadmat(file)
-    # Get 't_all' and 'v_0_all' variables
-    t_all = mat['t_all'][0]
-    v_0_all = mat['v_0_all'][0]
 
+def GetRotorDiscWeights(y, z, h, R, area_weights=False, n_sub=10):
+    """Weights of the grid points for the rotor-effective wind speed.
 
-    # Return 't_all' and 'v_0_all' for the seed vector
-    return v_0_all[loop],t_all[loop]
+      Args:
+        y: Horizontal locations of the grid [m].
+        z: Vertical locations of the grid [m].
+        h: Hub height [m].
+        R: Rotor radius [m].
+        area_weights: If True, each point is weighted with the fraction of its
+          grid cell inside the rotor disc, otherwise all points with a distance
+          to the hub of at most R are weighted equally.
+        n_sub: Number of sub-points per cell and direction for the area weights.
+
+      Returns:
+        Array (ny, nz) of weights, which sum up to 1.
+      """
+    Y, Z = np.meshgrid(y, z - h, indexing='ij')
+    if area_weights:
+        dy = y[1] - y[0] if len(y) > 1 else 2*R
+        dz = z[1] - z[0] if len(z) > 1 else 2*R
+        sub = (np.arange(n_sub) + 0.5) / n_sub - 0.5
+        Y_sub = Y[:, :, None, None] + dy*sub[None, None, :, None]
+        Z_sub = Z[:, :, None, None] + dz*sub[None, None, None, :]
+        weights = np.mean(Y_sub**2 + Z_sub**2 <= R**2, axis=(2, 3))
+    else:
+        DistanceToHub = (Y**2 + Z**2)**0.5
+        weights = (DistanceToHub <= R).astype(float)
+    return weights / np.sum(weights)
+
+
+def CalculateREWSfromWindField(file_name, R, nLoop=1, area_weights=False, chunk_size=None):
+    """Calculates the rotor-effective wind speed from a Bladed-style wind file (.wnd).
+
+      The REWS is the weighted mean of the u-component over the rotor disc,
+      computed with one tensordot over all time steps directly on the packed
+      int16 grid.
+
+      Args:
+        file_name: The path to the .wnd file generated by TurbSim.
+        R: Rotor radius [m].
+        nLoop: Number of times the REWS is repeated (periodic wind field).
+        area_weights: Weight the grid points by their area in the rotor disc.
+        chunk_size: If given, the memory-mapped wind field is processed in chunks
+          of this number of time steps, so it never needs to be fully resident.
+
+      Returns:
+        v_0: Rotor-effective wind speed [m/s].
+        t: Time [s].
+      """
+    header  = ReadBLgridHeader(file_name)
+    weights = GetRotorDiscWeights(header['y'], header['z'], header['zHub'], R, area_weights)
+
+    # weights in the order of the packed data (nz, ny), with the y direction flipped for clockwise files
+    if header['Clockwise']:
+        weights = weights[::-1, :]
+    weights = weights.T
+
+    # get rotor-effective wind speed
+    packed  = ReadBLgridPacked(header, use_memmap=True)
+    n_t_wf  = header['nt']
+    if chunk_size is None:
+        chunk_size = n_t_wf
+    v_0_wf  = np.empty(n_t_wf)
+    for it in range(0, n_t_wf, chunk_size):
+        v_0_wf[it:it+chunk_size] = np.tensordot(packed[it:it+chunk_size, :, :, 0], weights, axes=([1, 2], [0, 1]))
+    v_0_wf  = v_0_wf*header['Scale'][0] + header['Offset'][0]
+
+    # combine the REWS nLoop times
+    t   = header['dt']*np.arange(n_t_wf*nLoop)
+    v_0 = np.tile(v_0_wf, nLoop)
+
+    return v_0, t
+# source: Matlab-Function (CalculateREWSfromWindField.m)
\ No newline at end of file
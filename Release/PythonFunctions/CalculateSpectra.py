@@ -0,0 +1,144 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import fft
+
+
+def SegmentedRFFT(x, fs, window, noverlap=None, nfft=None):
+    """Segmented rFFT of a batch of signals, as used by Welch's method.
+
+      Each segment is detrended (constant), windowed and transformed once. The
+      result is scaled such that mean(conj(X)*Y) over the segments is the
+      one-sided (cross-)spectral density, identical to scipy.signal.welch and
+      scipy.signal.csd with scaling='density' and detrend='constant'.
+
+      Args:
+        x: Signals (nSignals, nSamples) or (nSamples,), e.g. one row per seed.
+        fs: Sampling frequency [Hz].
+        window: Window (nperseg,), e.g. scipy.signal.windows.hamming(nperseg).
+        noverlap: Samples of overlap, default: 50%.
+        nfft: Number of FFT points, default: nperseg.
+
+      Returns:
+        f: Frequencies [Hz].
+        X: Scaled rFFT of all segments (nSignals, nSegments, nfft//2+1).
+      """
+    window = np.asarray(window, dtype=float)
+    nperseg = len(window)
+    noverlap = nperseg // 2 if noverlap is None else int(noverlap)
+    nfft = nperseg if nfft is None else int(nfft)
+    step = nperseg - noverlap
+
+    x = np.atleast_2d(np.asarray(x, dtype=float))
+    segments = sliding_window_view(x, nperseg, axis=-1)[:, ::step, :]
+    segments = (segments - segments.mean(axis=-1, keepdims=True)) * window
+
+    X = np.fft.rfft(segments, n=nfft, axis=-1)
+    X *= np.sqrt(1 / (fs * np.sum(window**2)))
+    # one-sided: double all frequencies except DC and (for even nfft) Nyquist
+    X[..., 1:nfft - nfft//2] *= np.sqrt(2)
+    f = np.fft.rfftfreq(nfft, 1/fs)
+    return f, X
+
+
+def CrossSpectrum(X, Y=None):
+    """(Cross-)spectral density mean(conj(X)*Y) of the segments, see SegmentedRFFT."""
+    if Y is None:
+        return np.mean(np.abs(X)**2, axis=-2)
+    return np.mean(np.conj(X) * Y, axis=-2)
+
+
+def EstimateSpectra(x, y, fs, window, noverlap=None, nfft=None):
+    """Auto- and cross-spectra of two batches of signals with one rFFT per signal.
+
+      Args:
+        x, y: Signals (nSignals, nSamples), e.g. rotor and lidar REWS of all seeds.
+        fs, window, noverlap, nfft: See SegmentedRFFT.
+
+      Returns:
+        f: Frequencies [Hz].
+        S_xx, S_yy: Auto-spectra (nSignals, nFreq), as scipy.signal.welch.
+        S_xy: Cross-spectra (nSignals, nFreq), as scipy.signal.csd(x, y).
+      """
+    f, X = SegmentedRFFT(x, fs, window, noverlap, nfft)
+    _, Y = SegmentedRFFT(y, fs, window, noverlap, nfft)
+    return f, CrossSpectrum(X), CrossSpectrum(Y), CrossSpectrum(X, Y)
+
+
+def CalculateCoherence(S_xx, S_yy, S_xy, axis=0):
+    """Magnitude-squared coherence of spectra averaged along axis (e.g. over seeds)."""
+    return np.abs(np.mean(S_xy, axis=axis))**2 / np.mean(S_xx, axis=axis) / np.mean(S_yy, axis=axis)
+
+
+def CalculateCoherenceBandwidth(f, gamma2, Level=0.5):
+    """Frequency where the coherence first drops below Level, linearly interpolated.
+
+      With Level=0.5 and k = 2*pi*f/URef, this is the maximum coherent
+      wavenumber of a lidar system (Schlipf2015).
+
+      Args:
+        f: Frequencies [Hz].
+        gamma2: Magnitude-squared coherence, (nFreq,) or (nModels, nFreq).
+        Level: Level of the coherence [-].
+
+      Returns:
+        The bandwidth [Hz], one per model, f[-1] if the coherence does not
+        drop below Level.
+      """
+    G = np.atleast_2d(gamma2)
+    below = G < Level
+    i = np.argmax(below, axis=1)
+    f_Level = np.where(np.any(below, axis=1), f[i], f[-1])
+    inner = np.flatnonzero(np.any(below, axis=1) & (i > 0))
+    G0, G1 = G[inner, i[inner]-1], G[inner, i[inner]]
+    f_Level[inner] = f[i[inner]-1] + (Level - G0) / (G1 - G0) * (f[i[inner]] - f[i[inner]-1])
+    return f_Level if np.ndim(gamma2) > 1 else f_Level[0]
+
+
+def CrossCorrelation(x, y, fs, max_lag=None):
+    """Normalized cross-correlation of a batch of signals via FFT.
+
+      Same as MATLAB's xcorr(detrend(x,'constant'), detrend(y,'constant'),
+      'normalized') for each row, but O(N log N) instead of O(N^2) as
+      np.correlate(x, y, mode='full'). A positive lag means x lags y.
+
+      Args:
+        x, y: Signals (nSignals, nSamples) or (nSamples,), e.g. one row per seed.
+        fs: Sampling frequency [Hz].
+        max_lag: Only lags within +-max_lag [s] are returned, default: all.
+
+      Returns:
+        lags: Lags [s].
+        c: Cross-correlation coefficients (nSignals, nLags).
+      """
+    x = np.atleast_2d(np.asarray(x, dtype=float))
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    x = x - x.mean(axis=-1, keepdims=True)
+    y = y - y.mean(axis=-1, keepdims=True)
+    nSamples = x.shape[-1]
+
+    n = fft.next_fast_len(2*nSamples - 1, real=True)
+    c = fft.irfft(fft.rfft(x, n, axis=-1) * np.conj(fft.rfft(y, n, axis=-1)), n, axis=-1)
+    c /= np.sqrt(np.sum(x**2, axis=-1) * np.sum(y**2, axis=-1))[:, np.newaxis]
+
+    maxLagSamples = nSamples - 1 if max_lag is None else min(nSamples - 1, int(np.floor(max_lag * fs)))
+    lagSamples = np.arange(-maxLagSamples, maxLagSamples + 1)
+    return lagSamples / fs, c[:, lagSamples]  # negative lags wrap around to the end
+
+
+def EstimateFilterDelay(x_filtered, x, fs, max_lag=20):
+    """Time delay of a filter from the maximum of the mean cross-correlation.
+
+      Example:
+        T_filter = EstimateFilterDelay(REWS_f, REWS, Fs)
+
+      Args:
+        x_filtered: Filtered signals (nSignals, nSamples), e.g. one row per seed.
+        x: Unfiltered signals (nSignals, nSamples).
+        fs: Sampling frequency [Hz].
+        max_lag: The delay is searched within +-max_lag [s].
+
+      Returns:
+        The time delay T_filter [s].
+      """
+    lags, c = CrossCorrelation(x_filtered, x, fs, max_lag)
+    return lags[np.argmax(np.mean(c, axis=0))]
\ No newline at end of file
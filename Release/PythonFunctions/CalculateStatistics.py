@@ -0,0 +1,119 @@
+import os
+import numpy as np
+import pandas as pd
+from scipy import signal
+from concurrent.futures import ProcessPoolExecutor
+from ReadFASTbinary import FASTbinaryFile
+from CatalogSimulationResults import ParseSimulationName
+from CalculateDEL import CalculateDEL
+
+
+def _Mean(Data, Time, **options):
+    return np.mean(Data, axis=0)
+
+
+def _Std(Data, Time, **options):
+    return np.std(Data, axis=0)
+
+
+def _Max(Data, Time, **options):
+    return np.max(Data, axis=0)
+
+
+def _Min(Data, Time, **options):
+    return np.min(Data, axis=0)
+
+
+def _Range(Data, Time, **options):
+    return np.max(Data, axis=0) - np.min(Data, axis=0)
+
+
+def _DEL(Data, Time, WoehlerExponent=4, **options):
+    return np.array([CalculateDEL(Data[:, i], Time, WoehlerExponent, **options) for i in range(Data.shape[1])])
+
+
+def _Spectrum(Data, Time, **options):
+    options = dict({'detrend': 'constant'}, **options)
+    f, S = signal.welch(Data, fs=1/(Time[1]-Time[0]), axis=0, **options)
+    return f, [S[:, i] for i in range(S.shape[1])]
+
+
+# built-in statistics, computed for all channels of a file at once
+Statistics = {'mean': _Mean, 'std': _Std, 'max': _Max, 'min': _Min, 'max-min': _Range, 'DEL': _DEL, 'spectrum': _Spectrum}
+
+
+def _CalculateStatisticsFile(args):
+    DataFile, StatisticsSpec, StartTime = args
+
+    # read all requested channels of the file once
+    Channels = []
+    for _, _, ThisChannels, *_ in StatisticsSpec:
+        Channels += [Channel for Channel in ThisChannels if Channel not in Channels]
+    f = FASTbinaryFile(DataFile)
+    Data = f.data(Channels)
+    f.close()
+    Selected = Data[:, 0] >= StartTime
+    Time = Data[Selected, 0]
+    Data = Data[Selected, 1:]
+
+    Row = {}
+    Frequencies = {}
+    for StatisticsID, Function, ThisChannels, *Options in StatisticsSpec:
+        Options = Options[0] if Options else {}
+        Columns = Data[:, [Channels.index(Channel) for Channel in ThisChannels]]
+        if Function == 'spectrum':
+            Frequencies[StatisticsID], Values = _Spectrum(Columns, Time, **Options)
+        elif isinstance(Function, str):
+            Values = Statistics[Function](Columns, Time, **Options)
+        else:
+            Values = [Function(Columns[:, i], Time, **Options) for i in range(Columns.shape[1])]
+        for Channel, Value in zip(ThisChannels, Values):
+            Row['{}_{}'.format(StatisticsID, Channel)] = Value
+    return Row, Frequencies
+
+
+def CalculateStatistics(DataFiles, StatisticsSpec, StartTime=0, n_processes=None):
+    """Calculates statistics of many simulation result files.
+
+      Each file is read once, all statistics of a file are computed on the
+      loaded channels and the files are distributed over a pool of processes.
+
+      Example (see GetParametersForDLC1p2.m):
+        StatisticsSpec = [('mean', 'mean', ['Wind1VelX', 'GenPwr']),
+                          ('DEL', 'DEL', ['TwrBsMyt'], {'WoehlerExponent': 4}),
+                          ('S', 'spectrum', ['RotSpeed'], {'nperseg': 24000})]
+        Statistics = CalculateStatistics(DataFiles, StatisticsSpec, StartTime=60)
+
+      Args:
+        DataFiles: List of FAST binary (.outb) files.
+        StatisticsSpec: List of (statistics ID, function, channels) or
+          (statistics ID, function, channels, options). The function is the
+          name of a built-in statistic ('mean', 'std', 'max', 'min', 'max-min',
+          'DEL' or 'spectrum') or a function Value = Function(Data, Time, **options).
+          Functions have to be defined on module level to be used with
+          several processes.
+        StartTime: Data before this time is ignored [s].
+        n_processes: Number of processes, default: number of cores, 0 for no
+          parallel processing.
+
+      Returns:
+        A DataFrame with one row per file (index: simulation name) with the
+        variation values from the simulation name and one column
+        '<statistics ID>_<channel>' per statistic and channel. Spectra are
+        stored as arrays, their frequencies are in attrs['frequency'].
+      """
+    tasks = [(DataFile, StatisticsSpec, StartTime) for DataFile in DataFiles]
+    if n_processes == 0 or len(tasks) <= 1:
+        Results = [_CalculateStatisticsFile(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_processes or os.cpu_count()) as executor:
+            Results = list(executor.map(_CalculateStatisticsFile, tasks))
+
+    Names = [os.path.splitext(os.path.basename(DataFile))[0] for DataFile in DataFiles]
+    Variations = pd.DataFrame([ParseSimulationName(Name) for Name in Names], index=Names)
+    Values = pd.DataFrame([Row for Row, _ in Results], index=Names)
+    StatisticsTable = pd.concat([Variations, Values], axis=1)
+    StatisticsTable.index.name = 'Name'
+    StatisticsTable.attrs['frequency'] = Results[0][1] if Results else {}
+    return StatisticsTable
+# source: Matlab-Function (CalculateStatistics.m)
\ No newline at end of file
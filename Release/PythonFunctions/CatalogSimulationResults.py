@@ -0,0 +1,151 @@
+import os
+import re
+import glob
+import sqlite3
+import numpy as np
+from ReadFASTbinary import ReadFASTbinaryHeader, FileFmtID_WithTime
+
+
+def ParseSimulationName(name):
+    """Gets the variation values from a simulation name.
+
+      Inverse of GetSimulationName, e.g. 'URef_18_Seed_1801_FlagLAC_1' gives
+      {'URef': 18.0, 'Seed': 1801.0, 'FlagLAC': 1.0}. Values use the special
+      characters of GetSimulationName ('d' for '.', 'm' for '-', 'p' for '+').
+
+      Args:
+        name: The simulation name (without folder and extension).
+
+      Returns:
+        A dict with the identifiers as keys and the numeric values as values.
+      """
+    tokens = name.split('_')
+    values = {}
+    key = []
+    for token in tokens:
+        if key and re.fullmatch(r'[mp]?\d+(d\d+)?', token):
+            value = token.replace('d', '.').replace('m', '-').replace('p', '+')
+            values['_'.join(key)] = float(value)
+            key = []
+        else:
+            key.append(token)
+    return values
+
+
+def CatalogSimulationResults(folder, catalog_file=None, pattern='*.outb', verbose=True):
+    """Builds or updates a header-only catalog of FAST binary files in a folder.
+
+      Only the headers of the files are read. The catalog is stored in a SQLite
+      file and entries are keyed on path, modification time and size, so only
+      new or changed files are read again. Use QuerySimulationCatalog to find
+      files by channels and variation values. Files whose headers cannot be
+      read are skipped and returned.
+
+      Args:
+        folder: The folder with the simulation results, e.g. 'SimulationResults_CircularCW'.
+        catalog_file: The SQLite file of the catalog, default 'SimulationCatalog.sqlite' in folder.
+        pattern: Glob pattern of the files to catalog.
+        verbose: Print the skipped files.
+
+      Returns:
+        catalog_file: The path to the catalog file.
+        skipped: List of (path, error) of the skipped files.
+      """
+    if catalog_file is None:
+        catalog_file = os.path.join(folder, 'SimulationCatalog.sqlite')
+
+    con = sqlite3.connect(catalog_file)
+    with con:
+        con.executescript("""
+            CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE, mtime REAL, size INTEGER,
+                name TEXT, description TEXT, file_id INTEGER, nt INTEGER, t_start REAL, dt REAL, n_channels INTEGER);
+            CREATE TABLE IF NOT EXISTS channels (file INTEGER, idx INTEGER, name TEXT, unit TEXT);
+            CREATE TABLE IF NOT EXISTS variations (file INTEGER, key TEXT, value REAL);
+            CREATE INDEX IF NOT EXISTS channels_name ON channels (name, file);
+            CREATE INDEX IF NOT EXISTS variations_key ON variations (key, value, file);
+            """)
+
+        # paths are stored relative to the catalog file
+        base  = os.path.dirname(os.path.abspath(catalog_file))
+        known = {path: (file_id, mtime, size) for file_id, path, mtime, size in con.execute('SELECT id, path, mtime, size FROM files')}
+        paths = set(os.path.relpath(os.path.abspath(path), base) for path in glob.glob(os.path.join(folder, pattern)))
+
+        # remove entries of deleted or changed files
+        for path, (file_id, mtime, size) in known.items():
+            full_path = os.path.join(base, path)
+            if path not in paths or (os.path.getmtime(full_path), os.path.getsize(full_path)) != (mtime, size):
+                con.execute('DELETE FROM files WHERE id = ?', (file_id,))
+                con.execute('DELETE FROM channels WHERE file = ?', (file_id,))
+                con.execute('DELETE FROM variations WHERE file = ?', (file_id,))
+            else:
+                paths.discard(path)
+
+        # read headers of new files
+        skipped = []
+        for path in sorted(paths):
+            full_path = os.path.join(base, path)
+            try:
+                with open(full_path, 'rb') as fid:
+                    header = ReadFASTbinaryHeader(fid, full_path)
+                    if header['FileID'] == FileFmtID_WithTime:
+                        PackedTime = np.frombuffer(fid.read(8), dtype='<i4')
+                        Time = (PackedTime - header['TimeOff']) / header['TimeScl']
+                        t_start = Time[0] if len(Time) > 0 else np.nan
+                        dt      = Time[1] - Time[0] if len(Time) > 1 else np.nan
+                    else:
+                        t_start, dt = header['TimeOut1'], header['TimeIncr']
+            except Exception as e:
+                skipped.append((full_path, str(e)))
+                if verbose:
+                    print('Skipping {}: {}'.format(full_path, e))
+                continue
+            name = os.path.splitext(os.path.basename(path))[0]
+            cursor = con.execute('INSERT INTO files (path, mtime, size, name, description, file_id, nt, t_start, dt, n_channels) '
+                                 'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                 (path, os.path.getmtime(full_path), os.path.getsize(full_path), name, header['DescStr'],
+                                  int(header['FileID']), int(header['NT']), float(t_start), float(dt), int(header['NumOutChans'])))
+            file_id = cursor.lastrowid
+            con.executemany('INSERT INTO channels VALUES (?, ?, ?, ?)',
+                            [(file_id, idx, ChanName, ChanUnit) for idx, (ChanName, ChanUnit)
+                             in enumerate(zip(header['ChanName'], header['ChanUnit']))])
+            con.executemany('INSERT INTO variations VALUES (?, ?, ?)',
+                            [(file_id, key, value) for key, value in ParseSimulationName(name).items()])
+    con.close()
+
+    return catalog_file, skipped
+
+
+def QuerySimulationCatalog(catalog_file, channels=(), name=None, **variations):
+    """Finds files in a catalog built by CatalogSimulationResults.
+
+      Example: all FlagLAC_1 runs at URef 18 that have TwrBsMyt:
+        QuerySimulationCatalog(catalog_file, channels=['TwrBsMyt'], URef=18, FlagLAC=1)
+
+      Args:
+        catalog_file: The SQLite file of the catalog.
+        channels: List of channel names all files need to have.
+        name: Optional glob pattern for the simulation name.
+        **variations: Variation values parsed from the simulation name.
+
+      Returns:
+        A sorted list of the paths to the matching files.
+      """
+    query = 'SELECT path FROM files f WHERE 1'
+    parameters = []
+    for channel in channels:
+        query += ' AND EXISTS (SELECT 1 FROM channels c WHERE c.file = f.id AND c.name = ?)'
+        parameters.append(channel)
+    for key, value in variations.items():
+        query += ' AND EXISTS (SELECT 1 FROM variations v WHERE v.file = f.id AND v.key = ? AND v.value = ?)'
+        parameters += [key, float(value)]
+    if name is not None:
+        query += ' AND f.name GLOB ?'
+        parameters.append(name)
+    query += ' ORDER BY path'
+
+    con = sqlite3.connect(catalog_file)
+    paths = [row[0] for row in con.execute(query, parameters)]
+    con.close()
+
+    base = os.path.dirname(catalog_file)
+    return [os.path.join(base, path) for path in paths]
\ No newline at end of file
@@ -0,0 +1,289 @@
+import os
+import re
+import numpy as np
+
+
+_FASTInputFileCache = {}  # parsed templates by path, keyed on size and modification time
+_IdentifierRegex = re.compile(r'[A-Za-z_][\w()\[\],.\-]*$')
+
+
+class FASTInputFile:
+    """Parsed FAST-style input file (OpenFAST, ROSCO, LDP, FFP, lidar and TurbSim files).
+
+      Lines of the forms 'value ! Identifier - description' and
+      'value Identifier - description' are indexed by identifier and tables
+      with '-Tab' headers (e.g. Azimuth-Tab in the lidar file) by column name.
+      Values are replaced in place, so the file keeps its formatting, and the
+      file is serialized in a single pass. Copies share the parsed template
+      until they are modified.
+
+      Example:
+        f = ReadFASTInputFile('ROSCO_v2d6.IN')
+        f['FlagLAC'] = 0
+        f.write('ROSCO_v2d6_FB.IN')
+      """
+
+    def __init__(self, text='', file_name=''):
+        self.file_name = file_name
+        self.lines = text.splitlines(True)
+        self._Index()
+
+    def _Index(self):
+        self.index = {}
+        self.tables = {}
+        i_line = 0
+        while i_line < len(self.lines):
+            tokens = self.lines[i_line].split()
+            if tokens and all(token.lower().endswith('-tab') for token in tokens):
+                n_row = 0
+                while i_line + 1 + n_row < len(self.lines) and _IsNumericLine(self.lines[i_line + 1 + n_row], len(tokens)):
+                    n_row += 1
+                table = {'columns': tokens, 'header': i_line, 'n_row': n_row}
+                for i_column, token in enumerate(tokens):
+                    self.tables[token] = (table, i_column)
+                i_line += n_row
+            else:
+                parsed = _ParseLine(self.lines[i_line])
+                if parsed is not None:
+                    self.index.setdefault(parsed[0], []).append(i_line)
+            i_line += 1
+        self._shared = False
+
+    def copy(self):
+        """Copy of the file, which shares the parsed lines until it is modified."""
+        new = FASTInputFile.__new__(FASTInputFile)
+        new.file_name = self.file_name
+        new.lines = self.lines
+        new.index = self.index
+        new.tables = self.tables
+        new._shared = True
+        self._shared = True
+        return new
+
+    def _Modify(self):
+        if self._shared:
+            self.lines = list(self.lines)
+            self._shared = False
+
+    def keys(self):
+        return list(self.index.keys())
+
+    def __contains__(self, identifier):
+        return identifier in self.index
+
+    def __getitem__(self, identifier):
+        if identifier in self.tables:
+            table, i_column = self.tables[identifier]
+            data = self.get_table(identifier)
+            if i_column == len(table['columns']) - 1 and data.shape[1] > len(table['columns']):
+                return data[:, i_column:]  # last column with several values per row, e.g. RangeGates-Tab
+            return data[:, i_column]
+        if identifier not in self.index:
+            raise KeyError('Identifier {} not in file {}'.format(identifier, self.file_name))
+        line = self.lines[self.index[identifier][0]]
+        _, start, end = _ParseLine(line)
+        return _ParseValue(line[start:end])
+
+    def __setitem__(self, identifier, value):
+        if identifier not in self.index:
+            raise KeyError('Identifier {} not in file {}'.format(identifier, self.file_name))
+        self._Modify()
+        for i_line in self.index[identifier]:
+            self.lines[i_line] = _SetValue(self.lines[i_line], value)
+
+    def set_pattern(self, pattern, value):
+        """Sets the value of all lines where the regular expression pattern
+        matches a whole word, as ManipulateFastInputFile does.
+
+        Returns:
+          The number of modified lines.
+        """
+        if isinstance(pattern, str):
+            pattern = re.compile(r'\s' + pattern + r'(\s|$)')
+        n = 0
+        for i_line, line in enumerate(self.lines):
+            match = pattern.search(line)
+            if match:
+                self._Modify()
+                if _ParseLine(line) is not None:
+                    self.lines[i_line] = _SetValue(line, value)
+                else:
+                    self.lines[i_line] = _FormatValue(value, '') + ' ' + line[match.start()+1:]
+                n += 1
+        return n
+
+    def get_table(self, name):
+        """Table with the column name (e.g. 'Azimuth-Tab') as array (n_row, n_column).
+
+        The last column can hold several values per row (e.g. the range gates
+        of each beam), then the array has more columns than the header.
+        """
+        table, _ = self.tables[name]
+        rows = self.lines[table['header'] + 1:table['header'] + 1 + table['n_row']]
+        data = [[float(token) for token in row.split()] for row in rows]
+        return np.array(data).reshape(len(rows), -1) if rows else np.zeros((0, len(table['columns'])))
+
+    def set_table(self, name, data, fmt='%10.4f'):
+        """Replaces the rows of the table with the column name by data (n_row, n_column).
+
+        The number of rows can change, a line with the number of rows
+        (e.g. NumberOfPoints_Spherical) has to be set separately.
+        """
+        table, _ = self.tables[name]
+        data = np.atleast_2d(data)
+        newline = _Newline(self.lines[table['header']])
+        rows = [''.join(fmt % value for value in row) + newline for row in data]
+        self._Modify()
+        start = table['header'] + 1
+        self.lines[start:start + table['n_row']] = rows
+        if len(rows) != table['n_row']:
+            self._Index()
+
+    def replace(self, string_to_replace, new_string):
+        """Replaces a string in all lines, as ManipulateTXTFile does.
+
+        Returns:
+          The number of modified lines.
+        """
+        n = 0
+        reindex = False
+        for i_line, line in enumerate(self.lines):
+            if string_to_replace in line:
+                self._Modify()
+                new_line = line.replace(string_to_replace, new_string)
+                self.lines[i_line] = new_line
+                reindex = reindex or (_ParseLine(line) or [None])[0] != (_ParseLine(new_line) or [None])[0]
+                n += 1
+        if reindex:
+            self._Index()
+        return n
+
+    def add_line(self, n_line, new_line):
+        """Adds new_line after line n_line, as AddLineToTXTFile does."""
+        self._Modify()
+        newline = _Newline(self.lines[0]) if self.lines else '\n'
+        if n_line >= len(self.lines) and self.lines and not self.lines[-1].endswith('\n'):
+            self.lines[-1] += newline
+        self.lines.insert(n_line, new_line + newline)
+        self._Index()
+
+    def text(self):
+        return ''.join(self.lines)
+
+    def write(self, file_name):
+        with open(file_name, 'w', newline='') as fid:
+            fid.write(self.text())
+
+
+def ReadFASTInputFile(file_name):
+    """Reads a FAST-style input file, see FASTInputFile.
+
+      Parsed files are cached, so repeated reads of a template (e.g. for
+      thousands of cases) return a copy without reading the disk again.
+
+      Args:
+        file_name: The path to the input file.
+
+      Returns:
+        A FASTInputFile.
+      """
+    path = os.path.abspath(file_name)
+    stat = os.stat(path)
+    key = (stat.st_size, stat.st_mtime_ns)
+    cached = _FASTInputFileCache.get(path)
+    if cached is None or cached[0] != key:
+        with open(path, 'r', newline='') as fid:
+            cached = (key, FASTInputFile(fid.read(), file_name))
+        _FASTInputFileCache[path] = cached
+    return cached[1].copy()
+
+
+def _Newline(line):
+    return line[len(line.rstrip('\r\n')):] or '\n'
+
+
+def _IsNumericLine(line, n_column):
+    tokens = line.split()
+    if len(tokens) < n_column:
+        return False
+    try:
+        [float(token) for token in tokens]
+    except ValueError:
+        return False
+    return True
+
+
+def _ParseLine(line):
+    # returns (identifier, start, end) of the value, None for other lines
+    content = line.rstrip('\r\n')
+    stripped = content.lstrip()
+    if not stripped or stripped[0] in '!=#' or (stripped[0] == '-' and stripped[1:2] not in tuple('0123456789.')):
+        return None
+    start = len(content) - len(stripped)
+
+    # 'value ! Identifier - description'
+    i_comment = content.find('!')
+    if i_comment > 0:
+        after = content[i_comment+1:].split()
+        end = len(content[:i_comment].rstrip())
+        if not after or end <= start:
+            return None
+        return after[0], start, end
+
+    # 'value Identifier - description'
+    if stripped[0] == '"':
+        end = content.find('"', start + 1) + 1
+        if end == 0:
+            return None
+    else:
+        end = start + len(stripped.split()[0])
+    after = content[end:].split()
+    if not after or not content[end:end+1].isspace() or not _IdentifierRegex.match(after[0]):
+        return None
+    return after[0], start, end
+
+
+def _ParseValue(string):
+    tokens = string.split()
+    if len(tokens) > 1 and not string.startswith('"'):
+        try:
+            return np.array([float(token) for token in tokens])
+        except ValueError:
+            return string
+    if string[:1] == '"' and string[-1:] == '"':
+        return string[1:-1]
+    if string.lower() in ('true', 'false'):
+        return string.lower() == 'true'
+    for convert in (int, float):
+        try:
+            return convert(string)
+        except ValueError:
+            pass
+    return string
+
+
+def _FormatValue(value, old):
+    separator = '\t' if '\t' in old else ' '
+    if isinstance(value, (bool, np.bool_)):
+        return 'True' if value else 'False'
+    if isinstance(value, str):
+        if old.startswith('"') and not value.startswith('"'):
+            return '"' + value + '"'
+        return value
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return separator.join(_FormatValue(element, '') for element in np.ravel(value))
+    if isinstance(value, (int, np.integer)):
+        return str(int(value))
+    return repr(float(value))
+
+
+def _SetValue(line, value):
+    # replace the value in place, keep the column of the identifier where possible
+    _, start, end = _ParseLine(line)
+    old = line[start:end]
+    new = _FormatValue(value, old)
+    rest = line[end:]
+    whitespace = rest[:len(rest) - len(rest.lstrip(' \t'))]
+    if '\t' not in whitespace and whitespace:
+        whitespace = ' ' * max(1, len(old) + len(whitespace) - len(new))
+    return line[:start] + new + whitespace + rest[len(rest) - len(rest.lstrip(' \t')):]
\ No newline at end of file
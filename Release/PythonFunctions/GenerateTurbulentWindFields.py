@@ -0,0 +1,224 @@
+import os
+import numpy as np
+from scipy import fft
+from concurrent.futures import ProcessPoolExecutor
+from FASTInputFile import ReadFASTInputFile
+from CalculateLidarRotorSpectra import I_ref, KaimalSpectrum
+from WriteBLgrid import WriteBLgrid, WriteBLgridSummary
+
+V_ref = {'1': 50, '2': 42.5, '3': 37.5}  # [m/s] reference wind speed of the wind turbine classes, IEC 61400-1 Ed. 3
+
+
+def _Default(Value, DefaultValue):
+    return DefaultValue if isinstance(Value, str) and Value.lower() == 'default' else Value
+
+
+def ReadTurbSimInputFile(TurbSimInputFile):
+    """Reads the parameters of a TurbSim input file for GenerateTurbulentWindFields.
+
+      Supported are the IEC Kaimal model (TurbModel "IECKAI") with the normal
+      or extreme turbulence model, the power law profile and the IEC or no
+      spatial coherence per component.
+
+      Returns:
+        A dict with the grid (NumGrid_Y, NumGrid_Z, GridWidth, GridHeight,
+        HubHt), TimeStep, AnalysisTime, URef, RefHt, PLExp, Z0, the standard
+        deviations sigma (u, v, w) and length scales L (u, v, w) of the
+        spectra, the coherence parameters Coherence (a, b) per component
+        (None for no coherence), ScaleIEC, Clockwise and RandSeed1.
+      """
+    f = ReadFASTInputFile(TurbSimInputFile)
+    return GetIECParameters({Name: f[Name] for Name in f.keys()})
+
+
+def GetIECParameters(Inputs):
+    """Spectral and coherence parameters of the IEC Kaimal model (IEC 61400-1 Ed. 3, Annex B).
+
+      Args:
+        Inputs: Dict with the fields of a TurbSim input file, see
+          ReadTurbSimInputFile. URef can be changed before.
+
+      Returns:
+        See ReadTurbSimInputFile.
+      """
+    if str(Inputs.get('TurbModel', 'IECKAI')).upper() != 'IECKAI':
+        raise Exception('Only the IEC Kaimal model (IECKAI) is supported, not ' + str(Inputs['TurbModel']))
+    Parameters = {Name: Inputs[Name] for Name in ['NumGrid_Z', 'NumGrid_Y', 'TimeStep', 'AnalysisTime', 'HubHt', 'GridHeight', 'GridWidth', 'RefHt', 'URef']}
+    Parameters['PLExp'] = float(_Default(Inputs['PLExp'], 0.2))
+    Parameters['Z0'] = float(_Default(Inputs.get('Z0', 'default'), 0.03))
+    Parameters['ScaleIEC'] = int(Inputs.get('ScaleIEC', 0))
+    Parameters['Clockwise'] = bool(Inputs.get('Clockwise', True))
+    Parameters['RandSeed1'] = Inputs.get('RandSeed1')
+
+    U_hub = Inputs['URef'] * (Inputs['HubHt'] / Inputs['RefHt'])**Parameters['PLExp']
+    IECturbc = str(Inputs['IECturbc']).upper()
+    WindType = str(Inputs.get('IEC_WindType', 'NTM')).upper()
+    if IECturbc in I_ref:
+        if WindType == 'NTM':
+            sigma1 = I_ref[IECturbc] * (0.75*U_hub + 5.6)
+        elif WindType.endswith('ETM') and WindType[:1] in V_ref:
+            c = 2                                                                   # [m/s]
+            V_ave = 0.2 * V_ref[WindType[0]]
+            sigma1 = c * I_ref[IECturbc] * (0.072*(V_ave/c + 3)*(U_hub/c - 4) + 10)
+        else:
+            raise Exception('Unsupported IEC_WindType: ' + WindType)
+    else:
+        sigma1 = float(IECturbc) / 100 * U_hub
+
+    Lambda_1 = 0.7 * min(Inputs['HubHt'], 60)                                      # [m] longitudinal turbulence scale parameter
+    Parameters['U_hub'] = U_hub
+    Parameters['sigma'] = np.array([1, 0.8, 0.5]) * sigma1
+    Parameters['L'] = np.array([8.1, 2.7, 0.66]) * Lambda_1
+    Parameters['Coherence'] = []
+    for iComponent in range(3):
+        Model = str(Inputs.get('SCMod{}'.format(iComponent + 1), 'IEC')).upper()
+        if Model in ('IEC', 'DEFAULT'):
+            a, b = 12, 0.12 / (8.1*Lambda_1)
+            InCDec = _Default(Inputs.get('InCDec{}'.format(iComponent + 1), 'default'), None)
+            if InCDec is not None:
+                a, b = [float(Value) for Value in str(InCDec).split()]
+            Parameters['Coherence'].append((a, b))
+        elif Model == 'NONE':
+            Parameters['Coherence'].append(None)
+        else:
+            raise Exception('Unsupported coherence model: ' + Model)
+    return Parameters
+
+
+def GenerateTurbulentWindFields(Parameters, Seeds, nBlock=8):
+    """Turbulent wind fields with the method of Veers, as TurbSim with the IEC Kaimal model.
+
+      The Fourier coefficients of all points are correlated per frequency
+      with the Cholesky factor of the coherence matrix. The factors of a
+      block of frequencies are computed at once and applied to all seeds and
+      components with the same coherence, so they are only calculated once
+      per wind speed. The time series are obtained with multithreaded
+      inverse FFTs and are periodic over AnalysisTime. The random phases
+      are drawn per seed, so the fields do not depend on the other seeds,
+      but they differ from TurbSim's pRNG. As in TurbSim, ScaleIEC = 1
+      scales each component with the factor of the hub point and ScaleIEC =
+      2 scales each point individually to the target standard deviation.
+
+      Example:
+        Parameters = ReadTurbSimInputFile('TurbSim2aInputFileTemplateIEA15MW.inp')
+        velocity = GenerateTurbulentWindFields(Parameters, [1801, 1802])
+
+      Args:
+        Parameters: See ReadTurbSimInputFile.
+        Seeds: Random seeds.
+        nBlock: Number of frequencies factorized at once.
+
+      Returns:
+        List of arrays (nt, 3, ny, nz) with the velocity components [m/s]
+        (float32), one per seed, as ReadBLgrid.
+      """
+    ny, nz = Parameters['NumGrid_Y'], Parameters['NumGrid_Z']
+    y = np.linspace(-Parameters['GridWidth']/2, Parameters['GridWidth']/2, ny)
+    z = Parameters['HubHt'] + np.linspace(-Parameters['GridHeight']/2, Parameters['GridHeight']/2, nz)
+    Y, Z = np.meshgrid(y, z, indexing='ij')
+    Distance = np.hypot(Y.ravel()[:, None] - Y.ravel()[None, :], Z.ravel()[:, None] - Z.ravel()[None, :])
+    nPoints = ny*nz
+
+    dt = Parameters['TimeStep']
+    nt = int(round(Parameters['AnalysisTime'] / dt))
+    nFreq = (nt - 1) // 2                                                           # without DC and Nyquist
+    df = 1 / (nt*dt)
+    f = df * np.arange(1, nFreq + 1)
+    U_hub = Parameters['U_hub']
+    Amplitude = np.stack([nt*np.sqrt(KaimalSpectrum(f, U_hub, sigma, L)*df/2) for sigma, L in zip(Parameters['sigma'], Parameters['L'])])
+
+    # random phases of all seeds (nSeeds, 3, nFreq, nPoints)
+    Phases = np.stack([np.random.default_rng(Seed).random((3, nFreq, nPoints), dtype=np.float32) for Seed in Seeds])
+    nSeeds = len(Seeds)
+    X = np.zeros((nSeeds, 3, nt//2 + 1, nPoints), dtype=np.complex64)
+
+    Groups = {}
+    for iComponent, Coherence in enumerate(Parameters['Coherence']):
+        Groups.setdefault(Coherence, []).append(iComponent)
+    for iStart in range(0, nFreq, nBlock):
+        Block = slice(iStart, min(iStart + nBlock, nFreq))
+        nB = Block.stop - Block.start
+        for Coherence, Components in Groups.items():
+            Phasor = np.exp(2j*np.pi*Phases[:, Components, Block].astype(float))    # (nSeeds, nComponents, nB, nPoints)
+            if Coherence is not None:
+                a, b = Coherence
+                Factor = np.linalg.cholesky(np.exp(-a*np.sqrt((f[Block]/U_hub)**2 + b**2)[:, None, None] * Distance))
+                Phasor = Phasor.transpose(2, 3, 0, 1).reshape(nB, nPoints, -1)
+                Phasor = Factor @ Phasor.real + 1j*(Factor @ Phasor.imag)
+                Phasor = Phasor.reshape(nB, nPoints, nSeeds, len(Components)).transpose(2, 3, 0, 1)
+            X[:, Components, Block.start + 1:Block.stop + 1] = Phasor * Amplitude[Components, Block, None]
+
+    # mean wind profile (power law) and periodic time series per seed
+    U = Parameters['URef'] * (Z / Parameters['RefHt'])**Parameters['PLExp']
+    iHub = np.argmin(np.abs(Y.ravel()) + np.abs(Z.ravel() - Parameters['HubHt']))
+    velocity = []
+    for iSeed in range(nSeeds):
+        Fluctuation = fft.irfft(X[iSeed], n=nt, axis=1, workers=-1)                  # (3, nt, nPoints)
+        if Parameters['ScaleIEC'] == 1:
+            # scale each component uniformly to the target standard deviation at the hub
+            Fluctuation *= (Parameters['sigma'] / np.std(Fluctuation[:, :, iHub], axis=1))[:, None, None]
+        elif Parameters['ScaleIEC'] == 2:
+            # scale each point individually to the target standard deviation
+            Fluctuation *= Parameters['sigma'][:, None, None] / np.std(Fluctuation, axis=1, keepdims=True)
+        Fluctuation[0] += U.ravel()
+        velocity.append(Fluctuation.reshape(3, nt, ny, nz).transpose(1, 0, 2, 3).astype(np.float32))
+    return velocity
+
+
+def _WriteTurbulentWindFields(args):
+    Parameters, FileNames, Seeds = args
+    dy = Parameters['GridWidth'] / (Parameters['NumGrid_Y'] - 1)
+    dz = Parameters['GridHeight'] / (Parameters['NumGrid_Z'] - 1)
+    SummVars = [Parameters['HubHt'], int(Parameters['Clockwise']), Parameters['U_hub'], *(Parameters['sigma'] / Parameters['U_hub'] * 100)]
+    for FileName, velocity in zip(FileNames, GenerateTurbulentWindFields(Parameters, Seeds)):
+        WriteBLgrid(FileName, velocity, dy, dz, Parameters['TimeStep'], Parameters['HubHt'], Parameters['Z0'], SummVars)
+        WriteBLgridSummary(FileName, SummVars)
+    return FileNames
+
+
+def WriteTurbulentWindFields(TurbSimInputFile, WindFolder, URef_v, nSeed=6, n_processes=None):
+    """Writes turbulent wind fields (.wnd and .sum) for several wind speeds and seeds.
+
+      Python replacement for running TurbSim in GenerateTurbSimWindFields.m:
+      the seeds are URef*100 + (1:nSeed) and the files are named
+      URef_<URef>_Seed_<Seed>. Existing files are not generated again. The
+      wind speeds are distributed over a pool of processes, all seeds of a
+      wind speed are generated together, see GenerateTurbulentWindFields.
+
+      Example (DLC 1.2 of IEA15MW_05):
+        WindFiles = WriteTurbulentWindFields('TurbSimInputFileTemplateIEA15MW.inp', 'TurbulentWind', range(4, 25, 2))
+
+      Args:
+        TurbSimInputFile: TurbSim input file, see ReadTurbSimInputFile.
+        WindFolder: Folder of the wind files.
+        URef_v: Mean wind speeds at the reference height [m/s].
+        nSeed: Number of seeds per wind speed.
+        n_processes: Number of processes, default: number of cores, 0 for no
+          parallel processing.
+
+      Returns:
+        The list of the wind files (.wnd).
+      """
+    f = ReadFASTInputFile(TurbSimInputFile)
+    Inputs = {Name: f[Name] for Name in f.keys()}
+    GetIECParameters(Inputs)  # check the model before starting the processes
+    os.makedirs(WindFolder, exist_ok=True)
+
+    tasks = []
+    WindFiles = []
+    for URef in URef_v:
+        Seeds = [int(URef*100 + iSeed) for iSeed in range(1, nSeed + 1)]
+        FileNames = [os.path.join(WindFolder, 'URef_{:02d}_Seed_{:04d}'.format(int(URef), Seed)) for Seed in Seeds]
+        WindFiles += [FileName + '.wnd' for FileName in FileNames]
+        New = [i for i, FileName in enumerate(FileNames) if not os.path.exists(FileName + '.wnd')]
+        if New:
+            Parameters = GetIECParameters({**Inputs, 'URef': URef})
+            tasks.append((Parameters, [FileNames[i] for i in New], [Seeds[i] for i in New]))
+
+    if n_processes == 0 or len(tasks) <= 1:
+        for task in tasks:
+            _WriteTurbulentWindFields(task)
+    else:
+        with ProcessPoolExecutor(max_workers=n_processes or os.cpu_count()) as executor:
+            list(executor.map(_WriteTurbulentWindFields, tasks))
+    return WindFiles
\ No newline at end of file
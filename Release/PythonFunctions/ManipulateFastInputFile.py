@@ -0,0 +1,21 @@
+from FASTInputFile import ReadFASTInputFile
+
+
+def ManipulateFastInputFile(txt_file, identifier, new_string):
+    """Replaces the value of an identifier in a FAST-style input file.
+
+      Args:
+        txt_file: The path to the input file.
+        identifier: Identifier in the FAST-style input file (regular expression
+          of a whole word, e.g. 'TMax' or 'BlPitch\\((1|2|3)\\)').
+        new_string: The new value.
+
+      Returns:
+        The number of replacements.
+      """
+    f = ReadFASTInputFile(txt_file)
+    n = f.set_pattern(identifier, new_string)
+    if n > 0:
+        f.write(txt_file)
+    return n
+# source: Matlab-Function (ManipulateFastInputFile.m)
\ No newline at end of file
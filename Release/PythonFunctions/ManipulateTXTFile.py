@@ -7,16 +7,15 @@ def ManipulateTXTFile(txt_file, string_to_replace, new_string):
     temp_txt_file = os.path.join(folder, name + '_temp' + ext)
     n = 0
 
-    with open(txt_file, 'r') as fid, open(temp_txt_file, 'w') as fid_temp:
+    # keep whitespace and line endings of each line
+    with open(txt_file, 'r', newline='') as fid, open(temp_txt_file, 'w', newline='') as fid_temp:
         for line in fid:
-            s = line.strip()
-            s_temp = s.replace(string_to_replace, new_string)
-            fid_temp.write(s_temp + '\n')
-            if s != s_temp:
+            line_temp = line.replace(string_to_replace, new_string)
+            fid_temp.write(line_temp)
+            if line != line_temp:
                 n += 1
 
-    os.remove(txt_file)
-    os.rename(temp_txt_file, txt_file)
+    os.replace(temp_txt_file, txt_file)
 
     return n
 # source: Matlab-Function (ManipulateTXTFile.m)
\ No newline at end of file
@@ -0,0 +1,9 @@
+import math
+
+
+def Num2Str(Value):
+    """Formats a number as num2str in MATLAB: integers without decimals, otherwise 4 decimals and significant digits."""
+    if float(Value).is_integer():
+        return '%d' % Value
+    digits = max(math.floor(math.log10(abs(Value))), 0) + 5
+    return '%.*g' % (digits, Value)
\ No newline at end of file
@@ -0,0 +1,222 @@
+import os
+import json
+import hashlib
+import itertools
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from scipy.signal.windows import hamming
+from FASTInputFile import ReadFASTInputFile
+from SimulateLidar import ReadLidarFile, LoadWindField, SimulateLidar
+from CalculateLidarRotorSpectra import GetLidarTrajectory, CalculateLidarRotorSpectra
+from CalculateREWSfromWindField import CalculateREWSfromWindField
+from CalculateSpectra import EstimateSpectra, CalculateCoherence, CalculateCoherenceBandwidth
+
+DesignParameters = ['nBeams', 'HalfConeAngle', 'FocusDistance', 'nGates', 'GateSpacing']
+DefaultDesign = {'nBeams': 4, 'HalfConeAngle': 15, 'FocusDistance': 200, 'nGates': 1, 'GateSpacing': 20}
+_CandidateCache = {}
+
+
+def CreateLidarConfig(Template, nBeams, HalfConeAngle, FocusDistance, nGates=1, GateSpacing=20):
+    """Lidar configuration with a circular scan, e.g. as LidarFile_CircularCW.dat.
+
+      The beams are equally spaced on a cone around the x-axis of the lidar,
+      starting half a step above the horizontal, with nGates range gates
+      centered at FocusDistance.
+
+      Args:
+        Template: Lidar input file or configuration (see ReadLidarFile) for
+          the position, range weighting and measurement interval.
+        nBeams: Number of beams (points of the scan) [-].
+        HalfConeAngle: Angle between the beams and the x-axis [deg].
+        FocusDistance: Distance of the center gate along the beams [m].
+        nGates: Number of range gates per beam [-].
+        GateSpacing: Distance between the range gates [m].
+
+      Returns:
+        The lidar configuration, see ReadLidarFile.
+      """
+    Config = dict(ReadLidarFile(Template) if isinstance(Template, str) else Template)
+    Phi = 2*np.pi * (np.arange(nBeams) + 0.5) / nBeams
+    Theta = np.deg2rad(HalfConeAngle)
+    Direction = np.stack([np.full(nBeams, np.cos(Theta)), np.sin(Theta)*np.cos(Phi), np.sin(Theta)*np.sin(Phi)], axis=1)
+    RangeGates = FocusDistance + GateSpacing * (np.arange(nGates) - (nGates - 1)/2)
+    Config['Points'] = Direction[:, None, :] * RangeGates[:, None]
+    return Config
+
+
+def WriteLidarFile(TemplateFile, NewFile, Config):
+    """Writes a copy of a lidar input file with the points of Config in spherical coordinates."""
+    Points = Config['Points']
+    Range = np.linalg.norm(Points, axis=-1)
+    Azimuth = np.rad2deg(np.arctan2(Points[:, 0, 1], Points[:, 0, 0]))
+    Elevation = np.rad2deg(np.arcsin(Points[:, 0, 2] / Range[:, 0]))
+    LidarFile = ReadFASTInputFile(TemplateFile).copy()
+    LidarFile['TrajectoryType'] = 1
+    LidarFile['GatesPerBeam'] = Points.shape[1]
+    LidarFile['NumberOfPoints_Spherical'] = Points.shape[0]
+    LidarFile.set_table('Azimuth-Tab', np.column_stack([Azimuth, Elevation, Range]))
+    LidarFile.write(NewFile)
+
+
+def _CandidateKey(Config):
+    # hash of everything a lidar configuration measures, so equal point sets are evaluated once
+    Hash = hashlib.sha1()
+    for Name in ['Points', 'Distances', 'Weights', 't_measurement_interval', 'Position', 'Angles']:
+        Hash.update(np.round(np.asarray(Config[Name], dtype=float), 6).tobytes())
+    Hash.update(str(np.shape(Config['Points'])).encode())
+    return Hash.hexdigest()
+
+
+def _EvaluateAnalytical(args):
+    Config, URef, R, options = args
+    Spectra = CalculateLidarRotorSpectra(GetLidarTrajectory(Config), URef, R, **options)
+    gamma2 = np.abs(Spectra['S_RL'])**2 / (Spectra['S_LL'] * Spectra['S_RR'])
+    return CalculateCoherenceBandwidth(Spectra['f'], gamma2)
+
+
+def _SimulateCandidates(args):
+    # spectra of the rotor and lidar REWS of several candidates in one wind field, loaded once
+    WindFile, Configs, R, nBlock = args
+    REWS_Rotor, t = CalculateREWSfromWindField(WindFile, R)
+    WindField = LoadWindField(WindFile)
+    nDataPerBlock = len(t) // nBlock
+    Spectra = []
+    for Config in Configs:
+        Lidar = SimulateLidar(WindField, Config, IndexGate=np.arange(1, Config['Points'].shape[1] + 1))
+        # the lidar REWS is held until the next measurement
+        REWS_Lidar = Lidar['REWS'][np.maximum(np.searchsorted(Lidar['Time'], t, side='right') - 1, 0)]
+        if np.any(np.isnan(REWS_Lidar)):
+            Spectra.append(None)  # points outside of the wind field
+            continue
+        f, S_RR, S_LL, S_RL = EstimateSpectra(REWS_Rotor, REWS_Lidar, 1/WindField['dt'], hamming(nDataPerBlock))
+        Spectra.append((f, S_RR[0], S_LL[0], S_RL[0]))
+    return Spectra
+
+
+def EvaluateLidarTrajectories(Configs, URef, R, WindFiles=(), nBlock=2, n_processes=None, **options):
+    """Coherence bandwidth of the rotor and lidar REWS for lidar configurations.
+
+      Each configuration is evaluated with the analytical spectral model (see
+      CalculateLidarRotorSpectra) and, if wind files are given, by sampling
+      the wind fields along the trajectory under frozen turbulence (see
+      SimulateLidar), where the coherence is estimated over all wind files
+      as in RunExample_CircularCW.py. The results are memoized per point set,
+      so only new configurations are evaluated, distributed over a pool of
+      processes.
+
+      Args:
+        Configs: List of lidar configurations, see CreateLidarConfig.
+        URef: Mean wind speed of the analytical model [m/s].
+        R: Rotor radius [m].
+        WindFiles: Wind fields (.wnd) for the simulation, e.g. all seeds.
+        nBlock: Number of blocks for the estimation of the spectra.
+        n_processes: Number of processes, default: number of cores, 0 for no
+          parallel processing.
+        **options: See CalculateLidarRotorSpectra.
+
+      Returns:
+        A DataFrame with one row per configuration with T_scan [s], the
+        bandwidth f_Analytical [Hz] and k_Analytical [rad/m] of the
+        analytical model and f_Simulation [Hz] and k_Simulation [rad/m] of
+        the simulation (NaN without wind files or if the trajectory leaves
+        the wind field).
+      """
+    WindFiles = [WindFile if WindFile.endswith('.wnd') else WindFile + '.wnd' for WindFile in WindFiles]
+    Settings = json.dumps({'URef': URef, 'R': R, 'nBlock': nBlock, 'options': {k: np.asarray(v).tolist() for k, v in options.items()},
+                           'WindFiles': [(os.path.abspath(WindFile), os.stat(WindFile).st_mtime_ns) for WindFile in WindFiles]}, sort_keys=True)
+    Keys = [(Settings, _CandidateKey(Config)) for Config in Configs]
+    New = {}
+    for Key, Config in zip(Keys, Configs):
+        if Key not in _CandidateCache and Key not in New:
+            New[Key] = Config
+    NewKeys, NewConfigs = list(New), list(New.values())
+
+    if NewConfigs:
+        n_workers = n_processes or os.cpu_count()
+        AnalyticalTasks = [(Config, URef, R, options) for Config in NewConfigs]
+        nChunks = max(1, min(len(NewConfigs), -(-n_workers // max(len(WindFiles), 1))))
+        Chunks = np.array_split(np.arange(len(NewConfigs)), nChunks)
+        SimulationTasks = [(WindFile, [NewConfigs[i] for i in Chunk], R, nBlock) for WindFile in WindFiles for Chunk in Chunks]
+        if n_processes == 0:
+            f_Analytical = [_EvaluateAnalytical(task) for task in AnalyticalTasks]
+            Simulations = [_SimulateCandidates(task) for task in SimulationTasks]
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                Futures = [executor.submit(_SimulateCandidates, task) for task in SimulationTasks]
+                f_Analytical = list(executor.map(_EvaluateAnalytical, AnalyticalTasks))
+                Simulations = [Future.result() for Future in Futures]
+
+        # spectra of all wind files per configuration, in the order of NewConfigs
+        Spectra = [[] for _ in NewConfigs]
+        for iTask, Simulation in enumerate(Simulations):
+            for i, Spectrum in zip(Chunks[iTask % nChunks], Simulation):
+                Spectra[i].append(Spectrum)
+        for Key, Config, f_A, Spectrum in zip(NewKeys, NewConfigs, f_Analytical, Spectra):
+            f_S = np.nan
+            if Spectrum and all(S is not None for S in Spectrum):
+                f, S_RR, S_LL, S_RL = [np.array(S) for S in zip(*Spectrum)]
+                f_S = CalculateCoherenceBandwidth(f[0, 1:], CalculateCoherence(S_LL, S_RR, S_RL)[1:])
+            _CandidateCache[Key] = {'T_scan': Config['Points'].shape[0] * Config['t_measurement_interval'],
+                                    'f_Analytical': f_A, 'k_Analytical': 2*np.pi*f_A/URef,
+                                    'f_Simulation': f_S, 'k_Simulation': 2*np.pi*f_S/URef}
+    return pd.DataFrame([_CandidateCache[Key] for Key in Keys])
+
+
+def OptimizeLidarTrajectory(Template, SearchSpace, URef, R, WindFiles=(), n_refinements=3, Objective=None, n_processes=None, **options):
+    """Searches circular scan trajectories for the maximum coherence bandwidth.
+
+      First, all combinations of the values in SearchSpace are evaluated.
+      Then, the continuous parameters (HalfConeAngle, FocusDistance) are
+      refined n_refinements times on a 3x3 grid around the best candidate,
+      halving the step each time. Candidates already evaluated are taken
+      from the memo, see EvaluateLidarTrajectories.
+
+      Example:
+        SearchSpace = {'nBeams': [4, 8, 40], 'HalfConeAngle': np.arange(10, 31, 5),
+                       'FocusDistance': np.arange(100, 301, 50), 'nGates': [1, 3]}
+        Results = OptimizeLidarTrajectory('LidarFile_CircularCW.dat', SearchSpace, 16, 120)
+        Config = CreateLidarConfig('LidarFile_CircularCW.dat', **Results.iloc[0][DesignParameters])
+
+      Args:
+        Template: See CreateLidarConfig.
+        SearchSpace: Dict of design parameter (see DesignParameters): values.
+          Missing parameters are taken from DefaultDesign.
+        URef, R, WindFiles: See EvaluateLidarTrajectories.
+        n_refinements: Number of refinements of the continuous parameters.
+        Objective: Column to maximize, default: 'k_Simulation' with wind
+          files, else 'k_Analytical'.
+        n_processes: See EvaluateLidarTrajectories.
+        **options: See EvaluateLidarTrajectories.
+
+      Returns:
+        A DataFrame with one row per evaluated design (the design parameters
+        and the results of EvaluateLidarTrajectories), sorted by the objective
+        in descending order.
+      """
+    Template = ReadLidarFile(Template) if isinstance(Template, str) else Template
+    Objective = Objective or ('k_Simulation' if len(WindFiles) else 'k_Analytical')
+    Values = [np.atleast_1d(SearchSpace.get(Name, DefaultDesign[Name])) for Name in DesignParameters]
+    Designs = [dict(zip(DesignParameters, Design)) for Design in itertools.product(*Values)]
+
+    def Evaluate(Designs):
+        Designs = [{Name: (int(Value) if Name in ('nBeams', 'nGates') else float(Value)) for Name, Value in Design.items()} for Design in Designs]
+        Configs = [CreateLidarConfig(Template, **Design) for Design in Designs]
+        Results = EvaluateLidarTrajectories(Configs, URef, R, WindFiles, n_processes=n_processes, **options)
+        return pd.concat([pd.DataFrame(Designs), Results], axis=1)
+
+    Results = Evaluate(Designs)
+    Steps = {Name: np.min(np.diff(np.unique(v))) for Name, v in zip(DesignParameters, Values)
+             if Name in ('HalfConeAngle', 'FocusDistance') and len(np.unique(v)) > 1}
+    for _ in range(n_refinements if Steps else 0):
+        if Results[Objective].isna().all():
+            break
+        Steps = {Name: Step/2 for Name, Step in Steps.items()}
+        Best = Results.loc[Results[Objective].idxmax(), DesignParameters].to_dict()
+        Neighbours = itertools.product(*[(-Step, 0, Step) for Step in Steps.values()])
+        Designs = [{**Best, **{Name: Best[Name] + d for Name, d in zip(Steps, Delta)}} for Delta in Neighbours]
+        Designs = [Design for Design in Designs if Design['HalfConeAngle'] > 0 and Design['FocusDistance'] > 0]
+        Results = pd.concat([Results, Evaluate(Designs)], ignore_index=True)
+
+    Results = Results.drop_duplicates(subset=DesignParameters)
+    return Results.sort_values(Objective, ascending=False, na_position='last', ignore_index=True)
\ No newline at end of file
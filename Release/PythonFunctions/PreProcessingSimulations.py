@@ -0,0 +1,151 @@
+import os
+import re
+import math
+import itertools
+from FASTInputFile import ReadFASTInputFile
+from Num2Str import Num2Str
+
+
+def CreatePermutationMatrix(PreProcessingVariation):
+    """Creates the permutations of a variation.
+
+      The permutations are generated lazily, the last variation changes fastest
+      (same order as CreatePermutationMatrix.m).
+
+      Args:
+        PreProcessingVariation: List of (identifier, values, format), e.g.
+          [('URef', [4, 8, 12], '%02d'), ('Seed', [1, 2], '%02d')].
+
+      Returns:
+        nVariation: Number of variations.
+        nPermutation: Number of permutations.
+        Permutation: Iterator over tuples with the (0-based) index of each variation value.
+      """
+    VariationDepth = [len(Values) for _, Values, _ in PreProcessingVariation]
+    nVariation = len(VariationDepth)
+    nPermutation = math.prod(VariationDepth)
+    Permutation = itertools.product(*[range(Depth) for Depth in VariationDepth])
+    return nVariation, nPermutation, Permutation
+
+
+def GetSimulationName(PreProcessingVariation, VariationValues):
+    """Provides a standard simulation name from a variation.
+
+      Example: 'URef_04_Seed_01'. The special characters '.', '-' and '+' are
+      replaced by 'd', 'm' and 'p', see ParseSimulationName for the inverse.
+
+      Args:
+        PreProcessingVariation: List of (identifier, values, format), format can be None.
+        VariationValues: Current value of each variation.
+
+      Returns:
+        The simulation name.
+      """
+    tokens = []
+    for (Identifier, _, Format), Value in zip(PreProcessingVariation, VariationValues):
+        tokens += [Identifier, Format % Value if Format else Num2Str(Value)]
+    SimulationName = '_'.join(tokens)
+    return SimulationName.replace('.', 'd').replace('-', 'm').replace('+', 'p')
+
+
+def PreProcessingSimulations(SimulationFolder, PreProcessingVariation, InputFiles, Modifications, Tool='OpenFAST'):
+    """Generates the input files of all permutations of a variation.
+
+      Each template file is parsed once (see FASTInputFile) and all
+      modifications are applied in memory, so each input file is written
+      exactly once per simulation and keeps its formatting.
+      Simulations which already have a result file are skipped.
+
+      Example (DLC 1.2, see GetParametersForDLC1p2.m):
+        PreProcessingVariation = [('URef', range(4, 21, 4), '%02d'), ('Seed', [1, 2], '%02d')]
+        InputFiles    = [('IEA-15-240-RWT-Monopile.fst', '<SimulationName>.fst'),
+                         ('IEA-15-240-RWT_InflowFile.dat', '<SimulationName>_InflowWind.dat')]
+        Modifications = [(0, 'I', 'TMax', '660'),
+                         (0, 'I', 'InflowFile', '<SimulationName>_InflowWind.dat'),
+                         (1, 'I', 'FilenameRoot', lambda v: '../TurbulentWind/URef_%02d_Seed_%02d%02d' % (v[0], v[0], v[1]))]
+
+      Args:
+        SimulationFolder: Folder with the template files and the simulations.
+        PreProcessingVariation: List of (identifier, values, format), format can be None.
+        InputFiles: List of (template file, new file), the new file name can
+          contain '<SimulationName>'.
+        Modifications: List of (file index, mode, target, new string) with the
+          (0-based) index in InputFiles and the modes
+          'I': replace the value of the FAST-style identifier (regular expression) target,
+          'R': replace the string target,
+          'A': add the new string as line after line target.
+          The new string can be a function of the variation values and can
+          contain '<SimulationName>'.
+        Tool: 'OpenFAST' or 'Flex5'.
+
+      Returns:
+        SimulationNames: List of the simulations for which files were written.
+        DataFiles: List of the result files of all permutations.
+      """
+    if Tool not in ('OpenFAST', 'Flex5'):
+        raise ValueError('Tool must be OpenFAST or Flex5')
+    ResultExtension = {'OpenFAST': '.outb', 'Flex5': '.res'}[Tool]
+
+    _, nPermutation, Permutation = CreatePermutationMatrix(PreProcessingVariation)
+    Templates = {}
+    Patterns = {}
+    SharedFiles = {}
+    SimulationNames = []
+    DataFiles = []
+
+    for Indices in Permutation:
+        # get VariationValues for this permutation
+        VariationValues = [Values[Index] for (_, Values, _), Index in zip(PreProcessingVariation, Indices)]
+
+        # get SimulationName, ResultFile and store in DataFiles
+        SimulationName = GetSimulationName(PreProcessingVariation, VariationValues)
+        ResultFile = os.path.join(SimulationFolder, SimulationName + ResultExtension)
+        DataFiles.append(ResultFile)
+
+        # generate files only if simulation does not exist already
+        if os.path.exists(ResultFile):
+            continue
+
+        # apply all modifications in memory
+        Files = []
+        for TemplateFile, NewFile in InputFiles:
+            if TemplateFile not in Templates:
+                Templates[TemplateFile] = ReadFASTInputFile(os.path.join(SimulationFolder, TemplateFile))
+            Files.append(Templates[TemplateFile].copy())
+        for iFile, Mode, Target, NewString in Modifications:
+            if callable(NewString):
+                NewString = NewString(VariationValues)
+            NewString = str(NewString).replace('<SimulationName>', SimulationName)
+            Target = Target.replace('<SimulationName>', SimulationName) if isinstance(Target, str) else Target
+            File = Files[int(iFile)]
+            if Mode == 'I':
+                Identifier = Target.strip().lstrip('!').strip()
+                if Identifier in File and re.fullmatch(r'[\w\-]+', Identifier):
+                    File[Identifier] = NewString  # plain identifier: O(1) lookup
+                else:
+                    if Target not in Patterns:
+                        Patterns[Target] = re.compile(r'\s' + Target + r'(\s|$)')
+                    File.set_pattern(Patterns[Target], NewString)
+            elif Mode == 'R':
+                File.replace(Target, NewString)
+            elif Mode == 'A':
+                File.add_line(int(Target), NewString)
+            else:
+                raise ValueError('Unknown modification mode: {}'.format(Mode))
+
+        # write each file once, shared files (without <SimulationName>) only if they changed
+        for (_, NewFile), File in zip(InputFiles, Files):
+            Text = File.text()
+            if '<SimulationName>' not in NewFile:
+                if SharedFiles.get(NewFile) == Text:
+                    continue
+                SharedFiles[NewFile] = Text
+            with open(os.path.join(SimulationFolder, NewFile.replace('<SimulationName>', SimulationName)), 'w', newline='') as fid:
+                fid.write(Text)
+
+        # store SimulationName
+        SimulationNames.append(SimulationName)
+        print('Writing files for simulation %s (%d/%d)' % (SimulationName, len(SimulationNames), nPermutation))
+
+    return SimulationNames, DataFiles
+# source: Matlab-Function (PreProcessingSimulations.m)
\ No newline at end of file
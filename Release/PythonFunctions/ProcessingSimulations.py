@@ -0,0 +1,99 @@
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+def RunJobs(jobs, n_core=None, verbose=True):
+    """Runs external programs (e.g. TurbSim, OpenFAST) concurrently.
+
+      Each job runs in its own process, at most n_core at a time. Jobs whose
+      outputs already exist are skipped.
+
+      Args:
+        jobs: List of dicts with the keys
+          'name': Name used in the progress report.
+          'command': List with the executable and its arguments.
+          'cwd': Optional working directory of the job.
+          'outputs': Optional list of files; the job is skipped if all exist.
+        n_core: Number of jobs running at the same time, default: number of
+          cores, 0 for no parallel processing.
+        verbose: Print the progress.
+
+      Returns:
+        A list of dicts (in the order of jobs) with 'name', 'status' (exit code,
+        None if skipped or not started), 'stdout', 'stderr' and 'skipped'.
+      """
+    n_job = len(jobs)
+    results = [None] * n_job
+    lock = threading.Lock()
+    n_done = [0]
+
+    def run(i_job):
+        job = jobs[i_job]
+        name = job.get('name', str(job['command']))
+        cwd = job.get('cwd')
+        outputs = [os.path.join(cwd or '', output) for output in job.get('outputs', [])]
+        result = {'name': name, 'status': None, 'stdout': '', 'stderr': '', 'skipped': False}
+        if outputs and all(os.path.exists(output) for output in outputs):
+            result['skipped'] = True
+        else:
+            if verbose:
+                print('Running simulation %s (%d/%d)' % (name, i_job + 1, n_job))
+            try:
+                process = subprocess.run(job['command'], cwd=cwd, capture_output=True, text=True)
+                result.update(status=process.returncode, stdout=process.stdout, stderr=process.stderr)
+            except OSError as e:
+                result.update(status=-1, stderr=str(e))
+        with lock:
+            n_done[0] += 1
+            if verbose:
+                if result['skipped']:
+                    state = 'skipped, outputs exist'
+                else:
+                    state = 'exit code %d' % result['status']
+                print('Finished simulation %s: %s [%d/%d done]' % (name, state, n_done[0], n_job))
+        results[i_job] = result
+        return result
+
+    if n_core == 0:
+        for i_job in range(n_job):
+            run(i_job)
+    else:
+        with ThreadPoolExecutor(max_workers=n_core or os.cpu_count()) as executor:
+            list(executor.map(run, range(n_job)))
+
+    return results
+
+
+def ProcessingSimulations(SimulationFolder, SimulationNames, ExeFile, n_core=None, verbose=True):
+    """Runs OpenFAST simulations in SimulationFolder concurrently.
+
+      Args:
+        SimulationFolder: Folder with the input files <SimulationName>.fst.
+        SimulationNames: List of simulation names.
+        ExeFile: OpenFAST executable, in SimulationFolder, relative to the
+          current folder or on the PATH.
+        n_core: Number of simulations running at the same time, default:
+          number of cores, 0 for no parallel processing.
+        verbose: Print the progress.
+
+      Returns:
+        status: List of exit codes (None for skipped simulations).
+        result: List of the outputs (stdout and stderr) of the simulations.
+      """
+    if os.path.exists(os.path.join(SimulationFolder, ExeFile)):
+        ExeFile = os.path.abspath(os.path.join(SimulationFolder, ExeFile))
+    elif os.path.exists(ExeFile):
+        ExeFile = os.path.abspath(ExeFile)
+
+    jobs = [{'name': SimulationName,
+             'command': [ExeFile, SimulationName + '.fst'],
+             'cwd': SimulationFolder,
+             'outputs': [SimulationName + '.outb']} for SimulationName in SimulationNames]
+    results = RunJobs(jobs, n_core=n_core, verbose=verbose)
+
+    status = [result['status'] for result in results]
+    result = [result['stdout'] + result['stderr'] for result in results]
+    return status, result
+# source: Matlab-Function (ProcessingSimulations.m)
\ No newline at end of file
@@ -0,0 +1,222 @@
+import os
+import struct
+import numpy as np
+
+
+def ReadBLgridHeader(file_name):
+    """Reads the header of a Bladed-style wind file (.wnd) and its summary file (.sum).
+
+      Args:
+        file_name: The path to the .wnd file (the .wnd extension is optional).
+
+      Returns:
+        A dict with the grid (y, z, nz, ny, dz, dy, dt, nt, nffc, zHub, z1),
+        the summary variables SummVars (zHub, Clockwise, UBAR, TI_u, TI_v, TI_w),
+        zOffset, z0, the scaling factors Scale and Offset of the velocity
+        components and the byte offset DataOffset of the grid data.
+      """
+    if file_name.lower().endswith('.wnd'):
+        file_name = file_name[:-4]
+
+    SummStrings = ['HUB HEIGHT', 'CLOCKWISE', 'UBAR', 'TI(U', 'TI(V', 'TI(W']  # MUST be in UPPER case
+    numVars     = len(SummStrings)
+    SummVars = np.zeros(numVars)
+    z0       = np.nan
+    zOffset  = np.nan
+
+    # -----------------------------------------
+    # READ THE HEADER OF THE BINARY FILE
+    # -----------------------------------------
+    with open(file_name + '.wnd', 'rb') as fid_wnd:
+        def fread(n, dtype):
+            fmt, nbytes = {'int16': ('h', 2), 'int32': ('i', 4), 'float32': ('f', 4)}[dtype]
+            values = struct.unpack('<' + fmt * n, fid_wnd.read(nbytes * n))
+            return values[0] if n == 1 else values
+
+        nffc = fread(1, 'int16')                        # number of components
+
+        if nffc != -99:  # AN OLD-STYLE AERODYN WIND FILE
+            dz      = fread(1, 'int16')                 # delta z in mm
+            dy      = fread(1, 'int16')                 # delta y in mm
+            dx      = fread(1, 'int16')                 # delta x (actually t in this case) in mm
+            nt      = fread(1, 'int16')                 # half number of time steps
+            MFFWS   = fread(1, 'int16')                 # 10 times mean FF wind speed, should be equal to MWS
+            fread(5, 'int16')                           # unnecessary lines
+            nz      = fread(1, 'int16')                 # 1000 times number of points in vertical direction, max 32
+            ny      = fread(1, 'int16')                 # 1000 times the number of points in horizontal direction, max 32
+            fread(3*(-nffc-1), 'int16')
+
+            # convert the integers to real numbers
+            nffc    = -nffc
+            dz      = 0.001*dz
+            dy      = 0.001*dy
+            dx      = 0.001*dx
+            MFFWS   = 0.1*MFFWS
+            nz      = (nz % 2**16) // 1000              # the mod 2^16 is a work around for somewhat larger grids
+            ny      = (ny % 2**16) // 1000              # the mod 2^16 is a work around for somewhat larger grids
+
+        else:  # THE NEWER-STYLE AERODYN WIND FILE
+            fc      = fread(1, 'int16')                 # should be 4 to allow turbulence intensity to be stored in the header
+
+            nffc    = fread(1, 'int32')                 # number of components (should be 3)
+            lat     = fread(1, 'float32')               # latitude (deg)
+            z0      = fread(1, 'float32')               # Roughness length (m)
+            zOffset = fread(1, 'float32')               # Reference height (m) = Z(1) + GridHeight / 2.0
+            TI_U    = fread(1, 'float32')               # Turbulence Intensity of u component (%)
+            TI_V    = fread(1, 'float32')               # Turbulence Intensity of v component (%)
+            TI_W    = fread(1, 'float32')               # Turbulence Intensity of w component (%)
+
+            dz      = fread(1, 'float32')               # delta z in m
+            dy      = fread(1, 'float32')               # delta y in m
+            dx      = fread(1, 'float32')               # delta x in m
+            nt      = fread(1, 'int32')                 # half the number of time steps
+            MFFWS   = fread(1, 'float32')               # mean full-field wind speed
+
+            fread(3, 'float32')                         # unused variables (for BLADED)
+            fread(2, 'int32')                           # unused variables (for BLADED)
+            nz      = fread(1, 'int32')                 # number of points in vertical direction
+            ny      = fread(1, 'int32')                 # number of points in horizontal direction
+            fread(3*(nffc-1), 'int32')                  # unused variables (for BLADED)
+
+            SummVars[2:6] = [MFFWS, TI_U, TI_V, TI_W]
+
+        DataOffset = fid_wnd.tell()
+
+    nt = max(nt*2, 1)
+    dt = dx/MFFWS
+
+    # -----------------------------------------
+    # READ THE SUMMARY FILE FOR SCALING FACTORS
+    # -----------------------------------------
+    indx = SummVars.copy()
+    if not os.path.exists(file_name + '.sum'):
+        raise Exception('Could not open the summary file: ' + file_name + '.sum')
+
+    with open(file_name + '.sum', 'r') as fid_sum:
+        lines = iter(fid_sum.read().splitlines())
+
+    while np.any(indx == 0):  # MFFWS and the TIs should not be zero
+        line = next(lines, None)
+        if line is None:
+            raise Exception('Reached the end of summary file without all necessary data.')
+
+        line  = line.upper()
+        findx = line.find('=') + 1                      # first index (0 if there is no '=')
+        lindx = len(line)                               # last index
+
+        for i in range(numVars):
+            if indx[i] == 0:
+                k = line.find(SummStrings[i])
+                if k >= 0:                              # we found a string we're looking for
+                    indx[i] = k + 1
+                    k = line.find('%')
+                    if k >= 0:
+                        lindx = max(findx, k)
+
+                    tokens = line[findx:lindx].split()
+                    tmp = tokens[0] if tokens else ''
+                    try:
+                        SummVars[i] = float(tmp)
+                        break
+                    except ValueError:
+                        if tmp[:1] == 'T':
+                            SummVars[i] = 1
+                        else:
+                            SummVars[i] = -1            # use this for false instead of zero.
+
+    # read the rest of the file to get the grid height offset, if it's there
+    ZGoffset = 0.0
+    for line in lines:
+        line = line.upper()
+        if 'HEIGHT OFFSET' in line:
+            ZGoffset = float(line[line.find('=')+1:].split()[0])  # z grid offset
+            break
+
+    y    = np.arange(ny)*dy - dy*(ny-1)/2
+    zHub = SummVars[0]
+    z1   = zHub - ZGoffset - dz*(nz-1)/2               # this is the bottom of the grid
+    z    = np.arange(nz)*dz + z1
+
+    return {'file_name': file_name + '.wnd',
+            'y': y, 'z': z, 'nz': nz, 'ny': ny, 'dz': dz, 'dy': dy, 'dt': dt, 'nt': nt, 'nffc': nffc,
+            'zHub': zHub, 'z1': z1, 'SummVars': SummVars, 'zOffset': zOffset, 'z0': z0,
+            'Scale': 0.00001*SummVars[2]*SummVars[3:3+nffc],
+            'Offset': np.array([SummVars[2], 0, 0][:nffc]),
+            'Clockwise': SummVars[1] > 0,
+            'DataOffset': DataOffset}
+
+
+def ReadBLgridPacked(header, use_memmap=True):
+    """Packed int16 grid data (nt, nz, ny, nffc) of a wind file, see ReadBLgridHeader.
+
+      velocity = packed*Scale + Offset, with the y direction flipped for clockwise files.
+      """
+    shape = (header['nt'], header['nz'], header['ny'], header['nffc'])
+    count = int(np.prod(shape))
+    if os.path.getsize(header['file_name']) < header['DataOffset'] + 2*count:
+        raise Exception('Could not read entire file: {}'.format(header['file_name']))
+    if use_memmap:
+        return np.memmap(header['file_name'], dtype='<i2', mode='r', offset=header['DataOffset'], shape=shape)
+    return np.fromfile(header['file_name'], dtype='<i2', count=count, offset=header['DataOffset']).reshape(shape)
+
+
+def _ScaleBLgrid(raw, header, out):
+    # (nt, nz, ny, nffc) -> (nt, nffc, ny, nz), flip the y direction for clockwise rotation
+    velocity = raw.transpose(0, 3, 2, 1)
+    if header['Clockwise']:
+        velocity = velocity[:, :, ::-1, :]
+    np.multiply(velocity, header['Scale'].reshape(1, -1, 1, 1), out=out)
+    out += header['Offset'].reshape(1, -1, 1, 1)
+    return out
+
+
+def ReadBLgrid(file_name, use_memmap=False, dtype='float64'):
+    """Reads a Bladed-style wind file (.wnd) generated by TurbSim.
+
+      The int16 grid is decoded in one pass and scaled with the factors from
+      the summary file (.sum).
+
+      Args:
+        file_name: The path to the .wnd file (the .wnd extension is optional).
+        use_memmap: Memory-map the grid data instead of reading it into memory.
+        dtype: Type of the returned velocity, e.g. 'float32'.
+
+      Returns:
+        velocity: Array (nt, 3, ny, nz) with the velocity components [m/s].
+        info: A dict with the grid and summary variables, see ReadBLgridHeader.
+      """
+    header   = ReadBLgridHeader(file_name)
+    raw      = ReadBLgridPacked(header, use_memmap)
+    velocity = np.empty((header['nt'], header['nffc'], header['ny'], header['nz']), dtype=dtype)
+
+    # scale in blocks of time steps to limit temporary memory
+    nBlock = max(1, 2**22 // max(1, velocity[0].size))
+    for it in range(0, header['nt'], nBlock):
+        _ScaleBLgrid(raw[it:it+nBlock], header, velocity[it:it+nBlock])
+
+    return velocity, header
+
+
+def ReadBLgridChunks(file_name, chunk_size=1000, dtype='float64'):
+    """Iterates over a Bladed-style wind file (.wnd) in chunks of time steps.
+
+      Only one chunk of the memory-mapped grid is scaled at a time, so large
+      wind fields never need to be fully resident in memory.
+
+      Args:
+        file_name: The path to the .wnd file (the .wnd extension is optional).
+        chunk_size: Number of time steps per chunk.
+        dtype: Type of the returned velocity, e.g. 'float32'.
+
+      Yields:
+        it: Index of the first time step of the chunk.
+        velocity: Array (n, 3, ny, nz) with the velocity components [m/s].
+        info: A dict with the grid and summary variables, see ReadBLgridHeader.
+      """
+    header = ReadBLgridHeader(file_name)
+    raw    = ReadBLgridPacked(header, True)
+    for it in range(0, header['nt'], chunk_size):
+        chunk    = raw[it:it+chunk_size]
+        velocity = np.empty((chunk.shape[0], header['nffc'], header['ny'], header['nz']), dtype=dtype)
+        yield it, _ScaleBLgrid(chunk, header, velocity), header
+# source: Matlab-Function (ReadBLgrid.m)
\ No newline at end of file
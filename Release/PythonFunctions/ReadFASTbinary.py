@@ -1,23 +1,295 @@
 import struct
 import numpy as np
 import os
+import time as time_module
 
 
-def ReadFASTbinary(filename, use_buffer=True):
+FileFmtID_WithTime              = 1 # File identifiers used in FAST
+FileFmtID_WithoutTime           = 2
+FileFmtID_NoCompressWithoutTime = 3
+FileFmtID_ChanLen_In            = 4
+
+
+def fread(fid, n, type):
+    fmt, nbytes = {'uint8': ('B', 1), 'int16':('h', 2), 'int32':('i', 4), 'float32':('f', 4), 'float64':('d', 8)}[type]
+    return struct.unpack(fmt * n, fid.read(nbytes * n))
+
+
+def ReadFASTbinaryHeader(fid, filename=''):
+    """
+    Reads the header of a FAST binary file, leaving `fid` at the start of the
+    packed time (FileID 1) or channel data.
+
+    Returns a dict with the scaling factors, channel names and units and the
+    byte offsets of the packed time and data blocks, so that the data section
+    can be accessed without parsing the header again.
+    """
+    FileID = fread(fid, 1, 'int16')[0]  #;             % FAST output file format, INT(2)
+
+    if FileID not in [FileFmtID_WithTime, FileFmtID_WithoutTime, FileFmtID_NoCompressWithoutTime, FileFmtID_ChanLen_In]:
+        raise Exception('FileID not supported {}. Is it a FAST binary file?'.format(FileID))
+
+    if FileID == FileFmtID_ChanLen_In:
+        LenName = fread(fid, 1, 'int16')[0] # Number of characters in channel names and units
+    else:
+        LenName = 10                    # Default number of characters per channel name
+
+    NumOutChans = fread(fid, 1, 'int32')[0]  #;             % The number of output channels, INT(4)
+    NT = fread(fid, 1, 'int32')[0]  #;             % The number of time steps, INT(4)
+
+    header = {'FileID': FileID, 'NumOutChans': NumOutChans, 'NT': NT}
+    if FileID == FileFmtID_WithTime:
+        header['TimeScl'] = fread(fid, 1, 'float64')[0]  #;           % The time slopes for scaling, REAL(8)
+        header['TimeOff'] = fread(fid, 1, 'float64')[0]  #;           % The time offsets for scaling, REAL(8)
+    else:
+        header['TimeOut1'] = fread(fid, 1, 'float64')[0]  #;           % The first time in the time series, REAL(8)
+        header['TimeIncr'] = fread(fid, 1, 'float64')[0]  #;           % The time increment, REAL(8)
+
+    if FileID == FileFmtID_NoCompressWithoutTime:
+        ColScl = np.ones (NumOutChans) # The channel slopes for scaling, REAL(4)
+        ColOff = np.zeros(NumOutChans) # The channel offsets for scaling, REAL(4)
+    else:
+        ColScl = np.array(fread(fid, NumOutChans, 'float32'))  # The channel slopes for scaling, REAL(4)
+        ColOff = np.array(fread(fid, NumOutChans, 'float32'))  # The channel offsets for scaling, REAL(4)
+
+    LenDesc      = fread(fid, 1, 'int32')[0]  #;  % The number of characters in the description string, INT(4)
+    DescStrASCII = fread(fid, LenDesc, 'uint8')  #;  % DescStr converted to ASCII
+    DescStr      = "".join(map(chr, DescStrASCII)).strip()
+
+    ChanName = []  # initialize the ChanName cell array
+    for iChan in range(NumOutChans + 1):
+        ChanNameASCII = fread(fid, LenName, 'uint8')  #; % ChanName converted to numeric ASCII
+        ChanName.append("".join(map(chr, ChanNameASCII)).strip())
+
+    ChanUnit = []  # initialize the ChanUnit cell array
+    for iChan in range(NumOutChans + 1):
+        ChanUnitASCII = fread(fid, LenName, 'uint8')  #; % ChanUnit converted to numeric ASCII
+        ChanUnit.append("".join(map(chr, ChanUnitASCII)).strip()[1:-1])
+
+    # byte offsets of the packed time and channel data
+    if FileID == FileFmtID_WithTime:
+        header['TimeOffset'] = fid.tell()
+        header['DataOffset'] = fid.tell() + 4 * NT
+    else:
+        header['TimeOffset'] = None
+        header['DataOffset'] = fid.tell()
+
+    header.update({'LenName': LenName,
+                   'ColScl': ColScl,
+                   'ColOff': ColOff,
+                   'DescStr': DescStr,
+                   'ChanName': ChanName,
+                   'ChanUnit': ChanUnit,
+                   'DataType': 'float64' if FileID == FileFmtID_NoCompressWithoutTime else 'int16'})
+    return header
+
+
+class FASTbinaryFile(object):
+    """
+    Memory-mapped access to a FAST binary file.
+
+    Only the header is parsed on construction. The data section is mapped with
+    `np.memmap` using a structured dtype with one field per channel, and a
+    channel is only scaled (and cached) when it is accessed, e.g. `f['RotSpeed']`.
+    `f.data()` scales all (or some) channels in one broadcast.
+
+    `dtype` sets the type of the returned channels, e.g. 'float32' to halve
+    the memory of the scaled data.
+    """
+    def __init__(self, filename, dtype='float64'):
+        self.filename = filename
+        self.dtype    = np.dtype(dtype)
+        with open(filename, 'rb') as fid:
+            self.header = ReadFASTbinaryHeader(fid, filename)
+        self.names    = self.header['ChanName']
+        self.units    = self.header['ChanUnit']
+        self._index   = {}
+        for iChan, name in enumerate(self.names[1:]):
+            self._index.setdefault(name, iChan)  # first channel wins for duplicate names
+        self._raw     = None
+        self._time    = None
+        self._cache   = {}
+
+    @property
+    def NT(self):
+        return self.header['NT']
+
+    @property
+    def info(self):
+        return {'name': os.path.splitext(os.path.basename(self.filename))[0],
+                'description': self.header['DescStr'],
+                'fileID': self.header['FileID'],
+                'attribute_names': self.names,
+                'attribute_units': self.units}
+
+    @property
+    def raw(self):
+        """Packed channel data as structured memmap of shape (NT,), one field per channel."""
+        if self._raw is None:
+            self._raw = self._memmap(self.header['DataOffset'], self.record_dtype(), self.NT)
+        return self._raw
+
+    def record_dtype(self):
+        """Structured dtype of one row of packed channel data, built from the header."""
+        names = []
+        for iChan, name in enumerate(self.names[1:]):
+            if name == '' or name in names:
+                name = '{}_{}'.format(name or 'Chan', iChan + 1)
+            names.append(name)
+        format = '<f8' if self.header['DataType'] == 'float64' else '<i2'
+        return np.dtype({'names': names, 'formats': [format] * len(names)})
+
+    def _memmap(self, offset, dtype, n):
+        dtype = np.dtype(dtype)
+        if n == 0:
+            return np.zeros(0, dtype=dtype)
+        if os.path.getsize(self.filename) < offset + dtype.itemsize * n:
+            raise Exception('Could not read entire %s file: file is shorter than %d values' % (self.filename, n))
+        return np.memmap(self.filename, dtype=dtype, mode='r', offset=offset, shape=(n,))
+
+    def packed(self):
+        """Packed channel data as 2-D (NT, NumOutChans) view of the memmap."""
+        return self.raw.view(self.raw.dtype[0]).reshape(self.NT, self.header['NumOutChans'])
+
+    @property
+    def time(self):
+        if self._time is None:
+            if self.header['FileID'] == FileFmtID_WithTime:
+                PackedTime = self._memmap(self.header['TimeOffset'], '<i4', self.NT)
+                self._time = (PackedTime - self.header['TimeOff']) / self.header['TimeScl']
+            else:
+                self._time = self.header['TimeOut1'] + self.header['TimeIncr'] * np.arange(self.NT)
+        return self._time
+
+    def channel_index(self, name):
+        """Index of a channel in the packed data (without the time column)."""
+        if name not in self._index:
+            raise KeyError('Channel {} not in file {}'.format(name, self.filename))
+        return self._index[name]
+
+    def _scale(self, packed, idx):
+        ColScl = self.header['ColScl'][idx]
+        ColOff = self.header['ColOff'][idx]
+        data   = (packed.astype(self.dtype) - ColOff.astype(self.dtype)) / ColScl.astype(self.dtype)
+        # NaN slope and offset is probably due to a division by zero in Fortran
+        data[..., np.isnan(ColScl) & np.isnan(ColOff)] = 0
+        return data
+
+    def __getitem__(self, name):
+        if name == self.names[0]:
+            return self.time
+        if name not in self._cache:
+            idx = self.channel_index(name)
+            self._cache[name] = self._scale(self.packed()[:, idx], idx)
+        return self._cache[name]
+
+    def __contains__(self, name):
+        return name == self.names[0] or name in self._index
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self._index) + 1
+
+    def keys(self):
+        return [self.names[0]] + list(self._index)
+
+    def data(self, channels=None):
+        """
+        Returns the scaled data as (NT, 1+nChannels) array with time in the first column.
+
+        `channels` is a list of channel names; by default all channels are returned.
+        """
+        if channels is None:
+            idx = np.arange(self.header['NumOutChans'])
+        else:
+            idx = np.array([self.channel_index(name) for name in channels], dtype=int)
+        data = np.empty((self.NT, len(idx) + 1), dtype=self.dtype)
+        data[:, 0] = self.time
+        if len(idx) > 0:
+            data[:, 1:] = self._scale(self.packed()[:, idx], idx)
+        return data
+
+    def close(self):
+        self._raw   = None
+        self._cache = {}
+
+
+def ReadFASTbinaryBlocks(filename, channels=None, block_size=10000, follow=False, poll_interval=1.0, timeout=60.0, dtype='float64'):
+    """
+    Iterates over a FAST binary file in blocks of rows.
+
+    Only one block is in memory at a time, so memory stays constant for any
+    number of time steps. With `follow=True`, the file may still be written:
+    rows are yielded as soon as they are in the file and the iterator waits
+    (polling every `poll_interval` seconds) until all NT rows are read. If the
+    file did not grow for `timeout` seconds before that, an exception is
+    raised, as for an incomplete file without `follow`.
+
+    Yields (time, data) with data of shape (n, nChannels); `channels` is a list
+    of channel names, by default all channels.
+    """
+    f      = FASTbinaryFile(filename, dtype=dtype)
+    header = f.header
+    NT     = header['NT']
+    if channels is None:
+        idx = np.arange(header['NumOutChans'])
+    else:
+        idx = np.array([f.channel_index(name) for name in channels], dtype=int)
+    record_dtype = np.dtype('<f8' if header['DataType'] == 'float64' else '<i2')
+    row_bytes    = record_dtype.itemsize * header['NumOutChans']
+
+    with open(filename, 'rb') as fid:
+        iRow      = 0
+        last_size = -1
+        last_time = None
+        while iRow < NT:
+            size = os.path.getsize(filename)
+            nAvailable = min(NT, max(0, (size - header['DataOffset']) // row_bytes))
+            if nAvailable <= iRow:
+                if not follow:
+                    raise Exception('Could not read entire %s file: read %d of %d rows' % (filename, iRow, NT))
+                if size != last_size:
+                    last_size, last_time = size, time_module.time()
+                elif time_module.time() - last_time > timeout:
+                    raise Exception('Could not read entire %s file: read %d of %d rows (file did not grow for %g s)' % (filename, iRow, NT, timeout))
+                time_module.sleep(poll_interval)
+                continue
+
+            nRows = min(block_size, nAvailable - iRow)
+            fid.seek(header['DataOffset'] + iRow * row_bytes)
+            packed = np.fromfile(fid, dtype=record_dtype, count=nRows * header['NumOutChans']).reshape(nRows, -1)
+            if header['FileID'] == FileFmtID_WithTime:
+                fid.seek(header['TimeOffset'] + 4 * iRow)
+                time = (np.fromfile(fid, dtype='<i4', count=nRows) - header['TimeOff']) / header['TimeScl']
+            else:
+                time = header['TimeOut1'] + header['TimeIncr'] * np.arange(iRow, iRow + nRows)
+            yield time, f._scale(packed[:, idx], idx)
+            iRow += nRows
+
+
+def ReadFASTbinary(filename, use_buffer=True, use_memmap=False, dtype='float64'):
     """
     03/09/15: Ported from ReadFASTbinary.m by Mads M Pedersen, DTU Wind
     24/10/18: Low memory/buffered version by E. Branlard, NREL
     18/01/19: New file format for exctended channels, by E. Branlard, NREL
 
+    With `use_memmap=True`, the data section is memory-mapped (see FASTbinaryFile)
+    and scaled over all columns in one broadcast into an array of type `dtype`,
+    e.g. 'float32'.
+
     Info about ReadFASTbinary.m:
     % Author: Bonnie Jonkman, National Renewable Energy Laboratory
     % (c) 2012, National Renewable Energy Laboratory
     %
     %  Edited for FAST v7.02.00b-bjj  22-Oct-2012
     """
-    def fread(fid, n, type):
-        fmt, nbytes = {'uint8': ('B', 1), 'int16':('h', 2), 'int32':('i', 4), 'float32':('f', 4), 'float64':('d', 8)}[type]
-        return struct.unpack(fmt * n, fid.read(nbytes * n))
+    if use_memmap:
+        f = FASTbinaryFile(filename, dtype=dtype)
+        data, info = f.data(), f.info
+        f.close()
+        return data, info
 
     def freadRowOrderTableBuffered(fid, n, type_in, nCols, nOff=0, type_out='float64'):
         """
@@ -58,56 +330,19 @@ def ReadFASTbinary(filename, use_buffer=True):
         return data
 
 
-    FileFmtID_WithTime              = 1 # File identifiers used in FAST
-    FileFmtID_WithoutTime           = 2
-    FileFmtID_NoCompressWithoutTime = 3
-    FileFmtID_ChanLen_In            = 4
-
     with open(filename, 'rb') as fid:
         #----------------------------
         # get the header information
         #----------------------------
-
-        FileID = fread(fid, 1, 'int16')[0]  #;             % FAST output file format, INT(2)
-
-        if FileID not in [FileFmtID_WithTime, FileFmtID_WithoutTime, FileFmtID_NoCompressWithoutTime, FileFmtID_ChanLen_In]:
-            raise Exception('FileID not supported {}. Is it a FAST binary file?'.format(FileID))
-
-        if FileID == FileFmtID_ChanLen_In:
-            LenName = fread(fid, 1, 'int16')[0] # Number of characters in channel names and units
-        else:
-            LenName = 10                    # Default number of characters per channel name
-
-        NumOutChans = fread(fid, 1, 'int32')[0]  #;             % The number of output channels, INT(4)
-        NT = fread(fid, 1, 'int32')[0]  #;             % The number of time steps, INT(4)
-
-        if FileID == FileFmtID_WithTime:
-            TimeScl = fread(fid, 1, 'float64')  #;           % The time slopes for scaling, REAL(8)
-            TimeOff = fread(fid, 1, 'float64')  #;           % The time offsets for scaling, REAL(8)
-        else:
-            TimeOut1 = fread(fid, 1, 'float64')  #;           % The first time in the time series, REAL(8)
-            TimeIncr = fread(fid, 1, 'float64')  #;           % The time increment, REAL(8)
-
-        if FileID == FileFmtID_NoCompressWithoutTime:
-            ColScl = np.ones ((NumOutChans, 1)) # The channel slopes for scaling, REAL(4)
-            ColOff = np.zeros((NumOutChans, 1)) # The channel offsets for scaling, REAL(4)
-        else:
-            ColScl = fread(fid, NumOutChans, 'float32')  # The channel slopes for scaling, REAL(4)
-            ColOff = fread(fid, NumOutChans, 'float32')  # The channel offsets for scaling, REAL(4)
-
-        LenDesc      = fread(fid, 1, 'int32')[0]  #;  % The number of characters in the description string, INT(4)
-        DescStrASCII = fread(fid, LenDesc, 'uint8')  #;  % DescStr converted to ASCII
-        DescStr      = "".join(map(chr, DescStrASCII)).strip()
-
-        ChanName = []  # initialize the ChanName cell array
-        for iChan in range(NumOutChans + 1):
-            ChanNameASCII = fread(fid, LenName, 'uint8')  #; % ChanName converted to numeric ASCII
-            ChanName.append("".join(map(chr, ChanNameASCII)).strip())
-
-        ChanUnit = []  # initialize the ChanUnit cell array
-        for iChan in range(NumOutChans + 1):
-            ChanUnitASCII = fread(fid, LenName, 'uint8')  #; % ChanUnit converted to numeric ASCII
-            ChanUnit.append("".join(map(chr, ChanUnitASCII)).strip()[1:-1])
+        header      = ReadFASTbinaryHeader(fid, filename)
+        FileID      = header['FileID']
+        NumOutChans = header['NumOutChans']
+        NT          = header['NT']
+        ColScl      = header['ColScl']
+        ColOff      = header['ColOff']
+        DescStr     = header['DescStr']
+        ChanName    = header['ChanName']
+        ChanUnit    = header['ChanUnit']
 
         # -------------------------
         #  get the channel time series
@@ -141,9 +376,9 @@ def ReadFASTbinary(filename, use_buffer=True):
             del PackedData
 
     if FileID == FileFmtID_WithTime:
-        time = (np.array(PackedTime) - TimeOff) / TimeScl;
+        time = (np.array(PackedTime) - header['TimeOff']) / header['TimeScl'];
     else:
-        time = TimeOut1 + TimeIncr * np.arange(NT)
+        time = header['TimeOut1'] + header['TimeIncr'] * np.arange(NT)
 
     # -------------------------
     #  Scale the packed binary to real data
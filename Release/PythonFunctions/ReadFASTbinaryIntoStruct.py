@@ -1,15 +1,41 @@
-from ReadFASTbinary import ReadFASTbinary
+from fnmatch import fnmatchcase
+from ReadFASTbinary import FASTbinaryFile
 
 
-def ReadFASTbinaryIntoStruct(file_name):
-    data, info = ReadFASTbinary(file_name)
+def ReadFASTbinaryIntoStruct(file_name, channels=None, dtype='float64'):
+    """Reads a FAST binary file into a dict of channels.
 
-    channel_names = info['attribute_names']
+      Args:
+        file_name: The path to the FAST binary (.outb) file.
+        channels: Optional list of channel names or glob patterns (e.g. 'Bld*')
+          to load. Only these columns are read from the memory-mapped file,
+          the time vector is always included. By default all channels are loaded.
+        dtype: Type of the returned channels, e.g. 'float32'.
+
+      Returns:
+        A dict with the channel names as keys and the channel data as values.
+      """
+    f = FASTbinaryFile(file_name, dtype=dtype)
+
+    channel_names = f.keys()
+    if channels is not None:
+        if isinstance(channels, str):
+            channels = [channels]
+        selected = [channel_names[0]]
+        for pattern in channels:
+            matches = [name for name in channel_names[1:] if fnmatchcase(name, pattern)]
+            if not matches:
+                raise KeyError('Channel {} not in file {}'.format(pattern, file_name))
+            selected += [name for name in matches if name not in selected]
+        channel_names = selected
+
+    data = f.data(channel_names[1:])
     structured_data = {}
 
     for i in range(len(channel_names)):
         channel_name = channel_names[i]
         structured_data[channel_name] = data[:, i]
 
+    f.close()
     return structured_data
 # source: Matlab-Function (ReadFASTbinaryIntoStruct.m)
\ No newline at end of file
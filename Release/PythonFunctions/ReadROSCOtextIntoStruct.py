@@ -1,21 +1,220 @@
-
-
+import os
+import json
+import glob
 import pandas as pd
 import numpy as np
 
-def ReadROSCOtextIntoDataframe(file_name):
+
+ROSCOtextCacheFolder    = '.ROSCOcache'  # cache folder next to the ROSCO text files
+ROSCOtextCacheSizeLimit = 2**30          # [bytes] size limit of each cache folder
+
+
+def ReadROSCOtext(file_name, usecols=None, use_cache=True, cache_size_limit=ROSCOtextCacheSizeLimit):
+    """Reads ROSCO text data (.dbg, .dbg2 or .dbg3) into an array.
+
+      The header lines are parsed into channel names and units and the numeric
+      body is parsed in one vectorized pass. Values which are not numeric
+      (e.g. Fortran overflow '****') are returned as NaN.
+
+      Args:
+        file_name: The path to the ROSCO .dbg file.
+        usecols: Optional list of channel names to return.
+        use_cache: Use a binary cache in the folder .ROSCOcache next to the file.
+          The cache is keyed on size and modification time of the file and read
+          memory-mapped; least recently used entries are removed when the
+          folder exceeds cache_size_limit bytes.
+        cache_size_limit: Size limit of the cache folder [bytes].
+
+      Returns:
+        data: Array (n_time_steps x n_channels) with the ROSCO data.
+        info: A dict with the channel names and units.
+      """
+    cached = _ReadROSCOtextCache(file_name) if use_cache else None
+    if cached is not None:
+        data, info = cached
+    else:
+        data, info = _ReadROSCOtextFile(file_name)
+        if use_cache:
+            _WriteROSCOtextCache(file_name, data, info, cache_size_limit)
+
+    if usecols is not None:
+        names, units = info['attribute_names'], info['attribute_units']
+        idx = []
+        for name in usecols:
+            if name not in names:
+                raise KeyError('Channel {} not in file {}'.format(name, file_name))
+            idx.append(names.index(name))
+        data = data[:, idx]
+        info = dict(info, attribute_names=[names[i] for i in idx], attribute_units=[units[i] for i in idx])
+
+    return data, info
+
+
+def _ROSCOtextCacheFile(file_name):
+    folder, name = os.path.split(os.path.abspath(file_name))
+    stat = os.stat(file_name)
+    key = '{}_{}'.format(stat.st_size, stat.st_mtime_ns)
+    return os.path.join(folder, ROSCOtextCacheFolder, '{}.{}'.format(name, key))
+
+
+def _ReadROSCOtextCache(file_name):
+    cache_file = _ROSCOtextCacheFile(file_name)
+    try:
+        with open(cache_file + '.json', 'r') as fid:
+            info = json.load(fid)
+        data = np.load(cache_file + '.npy', mmap_mode='r')
+        os.utime(cache_file + '.npy')  # mark as recently used
+    except (OSError, ValueError):
+        return None
+    return data, info
+
+
+def _WriteROSCOtextCache(file_name, data, info, cache_size_limit):
+    cache_file = _ROSCOtextCacheFile(file_name)
+    folder = os.path.dirname(cache_file)
+    try:
+        os.makedirs(folder, exist_ok=True)
+        # remove outdated entries of this file
+        for old_file in glob.glob(glob.escape(cache_file.rsplit('.', 1)[0]) + '.*'):
+            if not old_file.startswith(cache_file + '.'):
+                os.remove(old_file)
+        # write atomically, so concurrent readers never see partial files
+        temp_file = '{}.{}.tmp'.format(cache_file, os.getpid())
+        np.save(temp_file + '.npy', np.ascontiguousarray(data))
+        with open(temp_file + '.json', 'w') as fid:
+            json.dump(info, fid)
+        os.replace(temp_file + '.json', cache_file + '.json')
+        os.replace(temp_file + '.npy', cache_file + '.npy')
+        _EvictROSCOtextCache(folder, cache_size_limit)
+    except OSError:
+        pass
+
+
+def _EvictROSCOtextCache(folder, cache_size_limit):
+    # least recently used first
+    entries = []
+    for npy_file in glob.glob(os.path.join(folder, '*.npy')):
+        stat = os.stat(npy_file)
+        entries.append((stat.st_mtime, stat.st_size, npy_file))
+    entries.sort()
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, npy_file in entries[:-1]:  # keep the newest entry
+        if total_size <= cache_size_limit:
+            break
+        os.remove(npy_file)
+        json_file = npy_file[:-len('.npy')] + '.json'
+        if os.path.exists(json_file):
+            os.remove(json_file)
+        total_size -= size
+
+
+def _ReadROSCOtextFile(file_name):
+    with open(file_name, 'r') as fid:
+        text = fid.read()
+
+    # split header and body at the first numeric line
+    header_lines = []
+    pos = 0
+    while pos < len(text):
+        end = text.find('\n', pos)
+        end = len(text) if end < 0 else end + 1
+        line = text[pos:end]
+        if _IsNumeric(line.split()[:1]):
+            break
+        header_lines.append(line.rstrip('\r\n'))
+        pos = end
+    body = text[pos:]
+
+    names, units, description = _ParseHeader(header_lines)
+    data = _ParseBody(body, len(names))
+
+    info = {'name': os.path.splitext(os.path.basename(file_name))[0],
+            'description': description,
+            'attribute_names': names,
+            'attribute_units': units}
+    return data, info
+
+
+def _IsNumeric(tokens):
+    try:
+        [float(token) for token in tokens]
+    except ValueError:
+        return False
+    return len(tokens) > 0
+
+
+def _ParseHeader(header_lines):
+    # header: 'Generated on ...', channel names, units (.dbg) or empty line (.dbg2); .dbg3 is tab-separated
+    description = ''
+    lines = []
+    for line in header_lines:
+        if line.strip().startswith('Generated on'):
+            description = line.strip()
+        elif line.strip() or lines:
+            lines.append(line)
+
+    def split(line):
+        if '\t' in line:
+            return [token.strip() for token in line.split('\t')]
+        return line.split()
+
+    names = split(lines[0])
+    for i, name in enumerate(names):
+        if name in names[:i]:
+            names[i] = '{}_{}'.format(name, i)  # e.g. Time in .dbg2
+    units = [''] * len(names)
+    if len(lines) > 1 and lines[1].strip():
+        tokens = split(lines[1])
+        if len(tokens) != len(names) and '\t' not in lines[1]:
+            # empty units: fixed width columns of 25 characters (a20,TR5)
+            tokens = [lines[1][i*25:(i+1)*25].strip() for i in range(len(names))]
+        for i, unit in enumerate(tokens[:len(names)]):
+            if unit[:1] + unit[-1:] in ('()', '[]'):
+                unit = unit[1:-1]
+            units[i] = unit
+    return names, units, description
+
+
+def _ParseBody(body, n_columns):
+    n_rows = body.count('\n') + (not body.endswith('\n'))
+    try:
+        values = np.fromstring(body, dtype=np.float64, sep=' ')
+    except ValueError:
+        values = np.empty(0)
+    if values.size == n_rows * n_columns:
+        return values.reshape(n_rows, n_columns)
+
+    # slow path for non-numeric values, incomplete or empty lines
+    n_rows = sum(1 for line in body.splitlines() if line.strip())
+    data = np.full((n_rows, n_columns), np.nan)
+    i_row = 0
+    for line in body.splitlines():
+        tokens = line.split()
+        if not tokens:
+            continue
+        for i_column, token in enumerate(tokens[:n_columns]):
+            try:
+                data[i_row, i_column] = float(token)
+            except ValueError:
+                pass
+        i_row += 1
+    return data
+
+
+def ReadROSCOtextIntoDataframe(file_name, usecols=None, use_cache=True):
     """Reads ROSCO text data into a Python DataFrame.
 
       Args:
-        FileName: The path to the ROSCO .IN file.
+        FileName: The path to the ROSCO .dbg file.
+        usecols: Optional list of channel names to read.
+        use_cache: Use the binary cache next to the file, see ReadROSCOtext.
 
       Returns:
-        A Python structure containing the ROSCO data.
+        A DataFrame with one float64 column per channel, the units are in attrs['units'].
       """
-    raw_data = pd.read_csv(file_name, delim_whitespace=True, skiprows=3)
+    data, info = ReadROSCOtext(file_name, usecols=usecols, use_cache=use_cache)
 
-    # Remove cells containing strings
-    raw_data = raw_data.apply(lambda series: series.map(lambda x: np.nan if isinstance(x, str) else x))
+    raw_data = pd.DataFrame(data, columns=info['attribute_names'])
+    raw_data.attrs['units'] = dict(zip(info['attribute_names'], info['attribute_units']))
 
     return raw_data
-
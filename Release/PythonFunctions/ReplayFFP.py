@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter, lfilter_zi
+from FASTInputFile import ReadFASTInputFile
+
+nBufferFFP = 2000     # [-] size of the REWS buffer in FFP_v1, 25 seconds at 80 Hz
+ErrorCodeFFP = 999    # [-] error code of the REWS, not stored in the buffer
+
+
+def ReadFFPParameters(FFPInFileName):
+    """Reads the parameters of an FFP_v1 input file (FlagLPF, f_cutoff, T_buffer, StaticWind, StaticPitch)."""
+    FFP = ReadFASTInputFile(FFPInFileName)
+    return {'FlagLPF': FFP['FlagLPF'], 'f_cutoff': FFP['f_cutoff'], 'T_buffer': FFP['T_buffer'],
+            'StaticWind': np.asarray(FFP['StaticWind'], dtype=float),
+            'StaticPitch': np.asarray(FFP['StaticPitch'], dtype=float)}
+
+
+def GetBufferIndex(T_buffer, DT):
+    """Index of the buffered REWS in FFP_v1 (1: current time step), for scalars or arrays of T_buffer."""
+    return np.clip(np.asarray(T_buffer, dtype=float)/DT, 1, nBufferFFP).astype(int)
+
+
+def _LowPassFilter(REWS, DT, f_cutoff, zi=None):
+    # first-order low-pass filter of FFP_v1 (Tustin), started in steady state,
+    # along the last axis for all signals with the same corner frequency;
+    # f_cutoff = inf: no filter
+    if not np.isfinite(f_cutoff):
+        return REWS.copy(), (np.full(REWS.shape[:-1] + (1,), np.nan) if zi is None else zi)
+    wDT = f_cutoff*DT
+    b, a = [wDT, wDT], [2 + wDT, wDT - 2]
+    if zi is None:
+        zi = lfilter_zi(b, a)*REWS[..., :1]
+    return lfilter(b, a, REWS, axis=-1, zi=zi)
+
+
+def ReplayFFP(REWS, DT, f_cutoff, T_buffer, StaticWind, StaticPitch, FlagLPF=1, State=None):
+    """Replays the feedforward chain of FFP_v1 offline, for many parameter pairs at once.
+
+      As in FFP_v1.dll, the REWS is low-pass filtered (first order, Tustin),
+      stored in a buffer and read again GetBufferIndex(T_buffer, DT) - 1 time
+      steps later; the feedforward pitch angle is taken from the static pitch
+      curve and its difference quotient is the feedforward pitch rate. The
+      filter runs as lfilter along the time axis, once for each distinct
+      f_cutoff, and the buffer is a delay line of the last 2000 filtered
+      values. The replay can be continued on the next block of a signal by
+      passing the returned State.
+
+      Example (logged REWS of an OpenFAST simulation):
+        Data = ReadROSCOtextIntoDataframe('URef_18_Seed_1801_FlagLAC_1.dbg', usecols=['Time', 'REWS', 'REWS_b'])
+        FFP = ReadFFPParameters('FFP_v1_CircularCW.IN')
+        Output, _ = ReplayFFP(Data['REWS'].values, 0.0125, FFP['f_cutoff'], FFP['T_buffer'], FFP['StaticWind'], FFP['StaticPitch'])
+
+      Args:
+        REWS: REWS estimated by the lidar [m/s], (..., nt).
+        DT: Time step [s].
+        f_cutoff: Corner frequency of the low-pass filter [rad/s] (inf: no
+          filter), broadcast with REWS[..., 0].
+        T_buffer: Buffer time [s], broadcast with REWS[..., 0].
+        StaticWind, StaticPitch: Static pitch curve [m/s] and [rad].
+        FlagLPF: Enable the low-pass filter.
+        State: State of the previous block, None to start as FFP_v1 (filter
+          and buffer filled with the first REWS).
+
+      Returns:
+        Output: A dict with REWS_f, REWS_b [m/s], FF_Pitch [rad] and
+          FF_PitchRate [rad/s], in the shape of all cases broadcast (..., nt).
+        State: State at the end of the block (filter states, buffer and last
+          feedforward pitch angle).
+      """
+    REWS = np.asarray(REWS, dtype=float)
+    nt = REWS.shape[-1]
+    Shape = np.broadcast_shapes(REWS.shape[:-1], np.shape(f_cutoff), np.shape(T_buffer))
+    REWS = np.broadcast_to(REWS, Shape + (nt,)).reshape(-1, nt)
+    f_cutoff = np.broadcast_to(np.asarray(f_cutoff, dtype=float), Shape).ravel()
+    Index = np.broadcast_to(GetBufferIndex(T_buffer, DT), Shape).ravel()
+    if State is None:
+        State = {'zi': np.full((len(REWS), 1), np.nan),
+                 'Buffer': np.repeat(REWS[:, :1], nBufferFFP, axis=1),
+                 'FF_Pitch': np.interp(REWS[:, 0], StaticWind, StaticPitch)}
+        Initial = True
+    else:
+        State = {Name: np.reshape(Value, (len(REWS),) + np.shape(Value)[len(Shape):]) for Name, Value in State.items()}
+        Initial = False
+
+    # low-pass filter, once per corner frequency
+    REWS_f = REWS.copy()
+    zi = State['zi'].copy()
+    if FlagLPF == 1:
+        for f in np.unique(f_cutoff):
+            Cases = f_cutoff == f
+            REWS_f[Cases], zi[Cases] = _LowPassFilter(REWS[Cases], DT, f, None if Initial else State['zi'][Cases])
+
+    # buffer: error codes are not stored, the last value is repeated
+    Valid = REWS_f != ErrorCodeFFP
+    if not np.all(Valid):
+        Last = np.where(Valid, np.arange(nt), -1)
+        Last = np.maximum.accumulate(Last, axis=1)
+        Extended = np.concatenate((State['Buffer'][:, -1:], REWS_f), axis=1)
+        REWS_f_Stored = np.take_along_axis(Extended, Last + 1, axis=1)
+    else:
+        REWS_f_Stored = REWS_f
+    DelayLine = np.concatenate((State['Buffer'], REWS_f_Stored), axis=1)
+    Position = nBufferFFP + np.arange(nt)[None, :] - (Index[:, None] - 1)
+    REWS_b = np.take_along_axis(DelayLine, Position, axis=1)
+
+    # static pitch curve and pitch rate
+    FF_Pitch = np.interp(REWS_b, StaticWind, StaticPitch)
+    FF_PitchRate = np.diff(FF_Pitch, axis=1, prepend=State['FF_Pitch'][:, None]) / DT
+    if Initial:
+        FF_PitchRate[:, 0] = 0
+
+    Output = {'REWS_f': REWS_f, 'REWS_b': REWS_b, 'FF_Pitch': FF_Pitch, 'FF_PitchRate': FF_PitchRate}
+    State = {'zi': zi, 'Buffer': DelayLine[:, -nBufferFFP:], 'FF_Pitch': FF_Pitch[:, -1]}
+    return ({Name: Value.reshape(Shape + (nt,)) for Name, Value in Output.items()},
+            {Name: Value.reshape(Shape + Value.shape[1:]) for Name, Value in State.items()})
+
+
+def ScanFFPParameters(REWS_Lidar, REWS_Rotor, DT, f_cutoff_v, T_buffer_v, tau=2, t_start=60, StaticWind=None, StaticPitch=None):
+    """Compares the buffered REWS of FFP_v1 with the rotor REWS for all combinations of f_cutoff and T_buffer.
+
+      The buffered REWS should lead the rotor REWS by the time tau to
+      overcome the pitch actuator (see CalculateFFPParameters), so the
+      error is REWS_b(t) - REWS_Rotor(t + tau). The filter is applied once
+      per f_cutoff to all seeds and the buffer is a shift of the filtered
+      signal, so a grid of 50 x 50 parameters for 6 seeds of 660 s takes
+      seconds.
+
+      Example:
+        Scan = ScanFFPParameters(REWS_Lidar, REWS_Rotor, 0.0125, np.linspace(0.05, 1, 50), np.linspace(0, 12, 50))
+
+      Args:
+        REWS_Lidar: REWS estimated by the lidar [m/s], (nSeed, nt).
+        REWS_Rotor: Rotor-effective wind speed [m/s], (nSeed, nt), e.g. from
+          CalculateREWSfromWindField.
+        DT: Time step [s].
+        f_cutoff_v: Corner frequencies of the low-pass filter [rad/s] (inf:
+          no filter).
+        T_buffer_v: Buffer times [s].
+        tau: Time to overcome the pitch actuator [s].
+        t_start: Ignore data before [s].
+        StaticWind, StaticPitch: Static pitch curve [m/s] and [rad]; if
+          given, the error of the feedforward pitch angle to the static pitch
+          of the rotor REWS is evaluated as well.
+
+      Returns:
+        A DataFrame with f_cutoff, T_buffer, RMSE_REWS [m/s], Correlation [-]
+        and RMSE_Pitch [rad] (if the static pitch curve is given) for each
+        combination.
+      """
+    REWS_Lidar = np.atleast_2d(np.asarray(REWS_Lidar, dtype=float))
+    REWS_Rotor = np.atleast_2d(np.asarray(REWS_Rotor, dtype=float))
+    nt = REWS_Lidar.shape[-1]
+    nTau = int(round(tau/DT))
+    Start, End = int(np.ceil(t_start/DT)), nt - nTau
+    N = End - Start
+    Targets = {'REWS': REWS_Rotor[:, Start + nTau:End + nTau]}
+    if StaticWind is not None:
+        Targets['Pitch'] = np.interp(Targets['REWS'], StaticWind, StaticPitch)
+    TargetSums = {Name: (Target.sum(axis=1), (Target**2).sum(axis=1)) for Name, Target in Targets.items()}
+
+    # the sums over the analysis window of all buffer times are taken from
+    # cumulative sums, only the cross term is a dot product per buffer time
+    Results = {'f_cutoff': [], 'T_buffer': []}
+    for f_cutoff in f_cutoff_v:
+        REWS_f, _ = _LowPassFilter(REWS_Lidar, DT, f_cutoff)
+        # the buffer is filled with the first REWS before the start
+        DelayLine = np.concatenate((np.repeat(REWS_Lidar[:, :1], nBufferFFP, axis=1), REWS_f), axis=1)
+        Sums = {}
+        for Name in Targets:
+            X = DelayLine if Name == 'REWS' else np.interp(DelayLine, StaticWind, StaticPitch)
+            Sums[Name] = (X, np.cumsum(np.pad(X, ((0, 0), (1, 0))), axis=1), np.cumsum(np.pad(X**2, ((0, 0), (1, 0))), axis=1))
+        for T_buffer in T_buffer_v:
+            Results['f_cutoff'].append(f_cutoff)
+            Results['T_buffer'].append(T_buffer)
+            First = nBufferFFP - (int(GetBufferIndex(T_buffer, DT)) - 1) + Start
+            for Name, Target in Targets.items():
+                X, C1, C2 = Sums[Name]
+                S_t, S_tt = TargetSums[Name]
+                S_b = C1[:, First + N] - C1[:, First]
+                S_bb = C2[:, First + N] - C2[:, First]
+                S_bt = np.einsum('ij,ij->i', X[:, First:First + N], Target)
+                Results.setdefault('RMSE_' + Name, []).append(np.sqrt(max(np.mean(S_bb - 2*S_bt + S_tt)/N, 0)))
+                if Name == 'REWS':
+                    Results.setdefault('Correlation', []).append(np.mean((S_bt - S_b*S_t/N)
+                                                                         / np.sqrt((S_bb - S_b**2/N)*(S_tt - S_t**2/N))))
+    return pd.DataFrame(Results)
\ No newline at end of file
@@ -0,0 +1,164 @@
+import os
+import numpy as np
+from scipy.interpolate import RectBivariateSpline
+from FASTInputFile import ReadFASTInputFile
+
+RotorPerformanceCacheFolder = '.ROSCOcache'  # cache folder next to the performance files, as for ReadROSCOtext
+_RotorPerformanceCache = {}
+
+
+def ReadRotorPerformance(PerfFileName, use_cache=True):
+    """Reads the rotor performance tables (Cp_Ct_Cq.*.txt) of ROSCO, cached per file.
+
+      The tables are parsed once into contiguous arrays and stored as .npz in
+      the folder .ROSCOcache next to the file, keyed on size and modification
+      time of the file.
+
+      Returns:
+        A dict with the vectors Pitch [deg] and TSR [-] and the tables Cp, Ct
+        and Cq (nTSR, nPitch).
+      """
+    stat = os.stat(PerfFileName)
+    key = (os.path.abspath(PerfFileName), stat.st_size, stat.st_mtime_ns)
+    if key not in _RotorPerformanceCache:
+        folder, name = os.path.split(key[0])
+        cache_file = os.path.join(folder, RotorPerformanceCacheFolder, '{}.{}_{}.npz'.format(name, stat.st_size, stat.st_mtime_ns))
+        if use_cache and os.path.exists(cache_file):
+            with np.load(cache_file) as data:
+                Performance = {Name: data[Name] for Name in data.files}
+        else:
+            Performance = _ReadRotorPerformanceFile(PerfFileName)
+            if use_cache:
+                try:
+                    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+                    temp_file = '{}.{}.tmp.npz'.format(cache_file[:-4], os.getpid())
+                    np.savez(temp_file, **Performance)
+                    os.replace(temp_file, cache_file)
+                except OSError:
+                    pass
+        _RotorPerformanceCache[key] = Performance
+    return _RotorPerformanceCache[key]
+
+
+def _ReadRotorPerformanceFile(PerfFileName):
+    # blocks of numeric lines, in the order pitch, TSR, wind speed, Cp, Ct, Cq
+    with open(PerfFileName, 'r') as fid:
+        lines = fid.read().splitlines()
+    blocks = []
+    block = []
+    for line in lines + ['']:
+        if line.strip() and not line.lstrip().startswith('#'):
+            block.append(line)
+        elif block:
+            blocks.append(np.array(' '.join(block).split(), dtype=float).reshape(len(block), -1) if len(block) > 1 else np.array(block[0].split(), dtype=float))
+            block = []
+    Pitch, TSR = blocks[0], blocks[1]
+    Tables = blocks[-3:]
+    for Table in Tables:
+        if Table.shape != (len(TSR), len(Pitch)):
+            raise Exception('Size of the performance table does not match the pitch and TSR vectors: ' + PerfFileName)
+    return {'Pitch': Pitch, 'TSR': TSR,
+            'Cp': np.ascontiguousarray(Tables[0]), 'Ct': np.ascontiguousarray(Tables[1]), 'Cq': np.ascontiguousarray(Tables[2])}
+
+
+def _Bilinear(x, y, X, Y, Table):
+    # bilinear interpolation on the grid (X, Y), constant extrapolation
+    ix = np.clip(np.searchsorted(X, x, side='right') - 1, 0, len(X) - 2)
+    iy = np.clip(np.searchsorted(Y, y, side='right') - 1, 0, len(Y) - 2)
+    fx = np.clip((x - X[ix]) / (X[ix + 1] - X[ix]), 0, 1)
+    fy = np.clip((y - Y[iy]) / (Y[iy + 1] - Y[iy]), 0, 1)
+    return ((1 - fx)*((1 - fy)*Table[ix, iy] + fy*Table[ix, iy + 1])
+            + fx*((1 - fy)*Table[ix + 1, iy] + fy*Table[ix + 1, iy + 1]))
+
+
+def InterpolateRotorPerformance(Performance, TSR, Pitch, Coefficient='Cp', method='linear'):
+    """Cp, Ct or Cq at tip-speed ratios and pitch angles, for all points at once.
+
+      Args:
+        Performance: Rotor performance, see ReadRotorPerformance.
+        TSR: Tip-speed ratios [-].
+        Pitch: Pitch angles [deg], broadcast with TSR.
+        Coefficient: 'Cp', 'Ct' or 'Cq'.
+        method: 'linear' (bilinear, constant outside of the table) or 'cubic'
+          (bicubic spline).
+
+      Returns:
+        Array with the coefficient, in the shape of TSR and Pitch broadcast.
+      """
+    TSR, Pitch = np.broadcast_arrays(np.asarray(TSR, dtype=float), np.asarray(Pitch, dtype=float))
+    if method == 'linear':
+        return _Bilinear(TSR, Pitch, Performance['TSR'], Performance['Pitch'], Performance[Coefficient])
+    if method == 'cubic':
+        Spline = RectBivariateSpline(Performance['TSR'], Performance['Pitch'], Performance[Coefficient])
+        return Spline.ev(TSR.ravel(), Pitch.ravel()).reshape(TSR.shape)
+    raise Exception('Unknown interpolation method: ' + method)
+
+
+def InvertRotorPerformance(Performance, TSR, Cp):
+    """Pitch angle for a target power coefficient at given tip-speed ratios.
+
+      The pitch is searched above the pitch of maximum Cp (towards feather),
+      as in above rated operation. The bilinear interpolation is inverted
+      exactly.
+
+      Args:
+        Performance: Rotor performance, see ReadRotorPerformance.
+        TSR: Tip-speed ratios [-].
+        Cp: Target power coefficients [-], broadcast with TSR.
+
+      Returns:
+        Pitch angles [deg]: the pitch of maximum Cp if the target is higher,
+        NaN if it is lower than Cp at the highest pitch of the table.
+      """
+    TSR, Cp = np.broadcast_arrays(np.asarray(TSR, dtype=float), np.asarray(Cp, dtype=float))
+    Pitch = Performance['Pitch']
+    # Cp along the pitch vector at each TSR (nPoints, nPitch)
+    Cp_Pitch = _Bilinear(TSR.ravel()[:, None], Pitch[None, :], Performance['TSR'], Pitch, Performance['Cp'])
+    Target = Cp.ravel()[:, None]
+    iMax = np.argmax(Cp_Pitch, axis=1)
+    # first interval after the maximum where Cp drops below the target
+    Crossing = (np.arange(len(Pitch) - 1)[None, :] >= iMax[:, None]) & (Cp_Pitch[:, :-1] >= Target) & (Cp_Pitch[:, 1:] < Target)
+    i = np.argmax(Crossing, axis=1)
+    rows = np.arange(len(i))
+    Cp0, Cp1 = Cp_Pitch[rows, i], Cp_Pitch[rows, i + 1]
+    Result = Pitch[i] + (Cp0 - Target[:, 0]) / (Cp0 - Cp1) * (Pitch[i + 1] - Pitch[i])
+    Result = np.where(Target[:, 0] >= Cp_Pitch[rows, iMax], Pitch[iMax], Result)
+    Result = np.where(np.any(Crossing, axis=1) | (Target[:, 0] >= Cp_Pitch[rows, iMax]), Result, np.nan)
+    return Result.reshape(TSR.shape)
+
+
+def CalculateStaticPitchCurve(ROSCOInFileName, StaticWind):
+    """Static pitch curve (StaticWind, StaticPitch) of FFP_v1 for any wind speeds.
+
+      Above rated, the rotor runs at the rated speed PC_RefSpd and the pitch
+      is chosen such that the aerodynamic power is VS_RtPwr/VS_GenEff; below
+      rated (where this power can not be reached), the pitch is PC_FinePit,
+      not less than PC_MinPit. Peak shaving is not considered. The rotor
+      performance is read from PerfFileName of the ROSCO input file.
+
+      Example (see FFP_v1_CircularCW.IN):
+        StaticPitch = CalculateStaticPitchCurve('ROSCO_v2d6.IN', [2, 9.3, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20, 21, 22, 23, 24, 25, 30])
+
+      Args:
+        ROSCOInFileName: ROSCO input file.
+        StaticWind: Wind speeds [m/s].
+
+      Returns:
+        The pitch angles StaticPitch [rad], NaN if the rated power can not be
+        reached within the pitch angles of the table.
+      """
+    ROSCO = ReadFASTInputFile(ROSCOInFileName)
+    PerfFileName = os.path.join(os.path.dirname(os.path.abspath(ROSCOInFileName)), ROSCO['PerfFileName'])
+    Performance = ReadRotorPerformance(PerfFileName)
+
+    R = ROSCO['WE_BladeRadius']
+    Omega_rated = ROSCO['PC_RefSpd'] / ROSCO['WE_GearboxRatio']                  # [rad/s] rated rotor speed
+    P_aero = ROSCO['VS_RtPwr'] / (ROSCO['VS_GenEff'] / 100)                      # [W] rated aerodynamic power
+    v = np.asarray(StaticWind, dtype=float)
+    Cp = P_aero / (0.5*ROSCO['WE_RhoAir']*np.pi*R**2*v**3)
+    TSR = Omega_rated*R/v
+    Pitch = InvertRotorPerformance(Performance, TSR, Cp)
+    with np.errstate(invalid='ignore'):
+        BelowRated = InterpolateRotorPerformance(Performance, TSR, Pitch) < Cp*(1 - 1e-9)
+    FinePit = max(ROSCO['PC_FinePit'], ROSCO['PC_MinPit'])
+    return np.where(BelowRated, FinePit, np.maximum(np.deg2rad(Pitch), FinePit))
\ No newline at end of file
@@ -0,0 +1,94 @@
+import numpy as np
+from ReadFASTbinary import ReadFASTbinaryBlocks
+from CalculateDEL import Rainflow, N_REF_Default
+
+
+class RunningStatistics(object):
+    """
+    Single-pass statistics of signals which arrive in blocks of rows.
+
+    Mean and standard deviation are updated with Welford's algorithm (merged
+    per block), together with min/max, histogram counts and the rainflow
+    residue, so memory stays constant for any signal length.
+
+    `bins` are the histogram edges, shared by all channels. `WoehlerExponents`
+    are the exponents for which the damage sums are accumulated, see DEL().
+    """
+    def __init__(self, nChannels, bins=None, WoehlerExponents=()):
+        self.n       = 0
+        self.mean_   = np.zeros(nChannels)
+        self.M2      = np.zeros(nChannels)
+        self.min     = np.full(nChannels, np.inf)
+        self.max     = np.full(nChannels, -np.inf)
+        self.bins    = None if bins is None else np.asarray(bins, dtype=float)
+        self.histogram = None if bins is None else np.zeros((nChannels, len(self.bins) - 1), dtype=np.int64)
+        self.WoehlerExponents = tuple(WoehlerExponents)
+        self.residue = [np.empty(0) for _ in range(nChannels)]
+        self.damage  = np.zeros((len(self.WoehlerExponents), nChannels))  # sums of Range^m of full cycles
+
+    def update(self, data):
+        """Adds a block (n, nChannels) of data."""
+        data = np.atleast_2d(np.asarray(data, dtype=float))
+        nBlock = data.shape[0]
+        if nBlock == 0:
+            return
+
+        # merge the block moments (Chan et al.)
+        meanBlock = np.mean(data, axis=0)
+        M2Block   = np.sum((data - meanBlock)**2, axis=0)
+        n         = self.n + nBlock
+        delta     = meanBlock - self.mean_
+        self.mean_ = self.mean_ + delta * nBlock / n
+        self.M2    = self.M2 + M2Block + delta**2 * self.n * nBlock / n
+        self.n     = n
+
+        np.minimum(self.min, np.min(data, axis=0), out=self.min)
+        np.maximum(self.max, np.max(data, axis=0), out=self.max)
+
+        if self.bins is not None:
+            nBins = len(self.bins) - 1
+            idx   = np.searchsorted(self.bins, data, side='right') - 1
+            idx[data == self.bins[-1]] = nBins - 1  # last bin includes the right edge, as np.histogram
+            valid = (idx >= 0) & (idx < nBins)
+            flat  = (idx + nBins * np.arange(data.shape[1]))[valid]
+            self.histogram += np.bincount(flat, minlength=self.histogram.size).reshape(self.histogram.shape)
+
+        if self.WoehlerExponents:
+            for iChannel in range(data.shape[1]):
+                Range, Count, self.residue[iChannel] = Rainflow(data[:, iChannel], self.residue[iChannel], close=False)
+                for iExponent, m in enumerate(self.WoehlerExponents):
+                    self.damage[iExponent, iChannel] += np.sum(Range**m * Count)
+
+    @property
+    def mean(self):
+        return self.mean_
+
+    @property
+    def std(self):
+        """Standard deviation (normalized by n, as np.std)."""
+        return np.sqrt(self.M2 / self.n) if self.n > 0 else np.full_like(self.M2, np.nan)
+
+    def DEL(self, WoehlerExponent, N_REF=N_REF_Default):
+        """Damage equivalent loads of all channels, the residue is counted as half cycles."""
+        iExponent = self.WoehlerExponents.index(WoehlerExponent)
+        DEL = np.empty(len(self.residue))
+        for iChannel, residue in enumerate(self.residue):
+            damage = self.damage[iExponent, iChannel] + 0.5 * np.sum(np.abs(np.diff(residue))**WoehlerExponent)
+            DEL[iChannel] = (damage / N_REF)**(1/WoehlerExponent)
+        return DEL
+
+
+def CalculateRunningStatistics(filename, channels, StartTime=0, bins=None, WoehlerExponents=(), block_size=10000, follow=False, **options):
+    """
+    Statistics of a FAST binary file in a single pass over blocks of rows.
+
+    With `follow=True`, a file which is still written by OpenFAST is read
+    until it is complete, see ReadFASTbinaryBlocks for the other options.
+
+    Returns a RunningStatistics object for the channels, with data before
+    `StartTime` ignored.
+    """
+    stats = RunningStatistics(len(channels), bins=bins, WoehlerExponents=WoehlerExponents)
+    for time, data in ReadFASTbinaryBlocks(filename, channels, block_size=block_size, follow=follow, **options):
+        stats.update(data[time >= StartTime])
+    return stats
\ No newline at end of file
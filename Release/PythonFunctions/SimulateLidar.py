@@ -0,0 +1,222 @@
+import os
+import numpy as np
+from FASTInputFile import ReadFASTInputFile
+from ReadBLgrid import ReadBLgrid
+
+_WindFieldCache = {}
+
+
+def ReadLidarFile(LidarFile):
+    """Reads the configuration of a lidar input file (LidarFile_*.dat).
+
+      Args:
+        LidarFile: Lidar input file with spherical (TrajectoryType 1) or
+          Cartesian (TrajectoryType 0) measuring points.
+
+      Returns:
+        A dict with the measuring points (nBeams, nGates, 3) in the lidar
+        coordinate system, the range weighting (Distances [m] along the beam
+        and Weights, which sum up to 1), t_measurement_interval [s], the
+        Position [m] and the roll, pitch and yaw Angles [deg] of the lidar in
+        the nacelle coordinate system and URef [m/s].
+      """
+    f = ReadFASTInputFile(LidarFile)
+    if int(f['TrajectoryType']) == 1:
+        nBeams = int(f['NumberOfPoints_Spherical'])
+        Azimuth = np.deg2rad(f['Azimuth-Tab'][:nBeams])
+        Elevation = np.deg2rad(f['Elevation-Tab'][:nBeams])
+        RangeGates = np.reshape(f['RangeGates-Tab'], (len(Azimuth), -1))
+        Direction = np.stack([np.cos(Elevation)*np.cos(Azimuth), np.cos(Elevation)*np.sin(Azimuth), np.sin(Elevation)], axis=1)
+        Points = Direction[:, None, :] * RangeGates[:, :, None]
+    else:
+        nBeams = int(f['NumberOfPoints_Cartesian'])
+        Points = np.stack([f['X-Tab'], f['Y-Tab'], f['Z-Tab']], axis=1)[:nBeams, None, :]
+
+    WeightingType = int(f['WeightingType'])
+    if WeightingType == 1:
+        # Gaussian distribution over +-FWHM, evaluated at PointsToEvaluate points
+        FWHM = float(f['FWHM'])
+        Distances = np.linspace(-FWHM, FWHM, int(f['PointsToEvaluate']))
+        Weights = np.exp(-4*np.log(2) * Distances**2 / FWHM**2)
+    elif WeightingType == 2:
+        nWeights = int(f['ManualWeightingPoints'])
+        Distances = f['Distance-Tab'][:nWeights]
+        Weights = f['Weighting-Tab'][:nWeights]
+    else:
+        Distances = np.zeros(1)
+        Weights = np.ones(1)
+
+    return {'Points': Points,
+            'Distances': np.asarray(Distances, dtype=float),
+            'Weights': np.asarray(Weights, dtype=float) / np.sum(Weights),
+            't_measurement_interval': float(f['t_measurement_interval']),
+            'Position': np.array([f['LidarPositionX_N'], f['LidarPositionY_N'], f['LidarPositionZ_N']], dtype=float),
+            'Angles': np.array([f['RollAngle_N'], f['PitchAngle_N'], f['YawAngle_N']], dtype=float),
+            'URef': float(f['URef'])}
+
+
+def _RotationMatrix(Roll, Pitch, Yaw):
+    # lidar to nacelle coordinate system: yaw around z, pitch around y, roll around x [deg]
+    r, p, y = np.deg2rad([Roll, Pitch, Yaw])
+    Rx = np.array([[1, 0, 0], [0, np.cos(r), -np.sin(r)], [0, np.sin(r), np.cos(r)]])
+    Ry = np.array([[np.cos(p), 0, np.sin(p)], [0, 1, 0], [-np.sin(p), 0, np.cos(p)]])
+    Rz = np.array([[np.cos(y), -np.sin(y), 0], [np.sin(y), np.cos(y), 0], [0, 0, 1]])
+    return Rz @ Ry @ Rx
+
+
+def GetLidarPoints(Config, NacellePosition=(0, 0, 0)):
+    """Points in the nacelle coordinate system (x downwind, z up, relative to the hub).
+
+      Args:
+        Config: Lidar configuration, see ReadLidarFile.
+        NacellePosition: Position of the origin of the nacelle coordinate
+          system relative to the hub [m].
+
+      Returns:
+        Points: Array (nBeams, nGates, nWeights, 3) with the points of the
+          range weighting along each beam [m].
+        Direction: Array (nBeams, nGates, 3) with the unit vectors of the beams.
+      """
+    Beams = Config['Points'] @ _RotationMatrix(*Config['Angles']).T
+    Direction = Beams / np.linalg.norm(Beams, axis=-1, keepdims=True)
+    Origin = Config['Position'] + np.asarray(NacellePosition, dtype=float)
+    Points = Origin + Beams[:, :, None, :] + Direction[:, :, None, :] * Config['Distances'][:, None]
+    return Points, Direction
+
+
+def LoadWindField(WindFile):
+    """Wind field of a .wnd file for SampleWindField, cached per file.
+
+      Returns:
+        A dict with the velocity (3, ny, nz, nt) [m/s] as float32, so that
+        the time series of a grid point is contiguous, the grid y, z [m], dt
+        [s] and the mean wind speed URef [m/s].
+      """
+    file_name = WindFile if WindFile.endswith('.wnd') else WindFile + '.wnd'
+    stat = os.stat(file_name)
+    key = (os.path.abspath(file_name), stat.st_size, stat.st_mtime_ns)
+    if key not in _WindFieldCache:
+        velocity, header = ReadBLgrid(file_name, dtype='float32')
+        _WindFieldCache.clear()  # keep only one wind field in memory
+        _WindFieldCache[key] = {'velocity': np.ascontiguousarray(velocity.transpose(1, 2, 3, 0)),
+                                'y': header['y'], 'z': header['z'], 'dt': header['dt'],
+                                'URef': header['SummVars'][2], 'zHub': header['zHub']}
+    return _WindFieldCache[key]
+
+
+def _GridIndex(s, n, periodic=False):
+    # lower and upper index and fraction of the linear interpolation on a grid with unit spacing
+    if periodic:
+        s = np.mod(s, n)
+        i0 = np.floor(s).astype(np.intp)
+        return i0, (i0 + 1) % n, s - i0, np.zeros(s.shape, dtype=bool)
+    i0 = np.clip(np.floor(s), 0, max(n - 2, 0)).astype(np.intp)
+    return i0, np.minimum(i0 + 1, n - 1), s - i0, (s < 0) | (s > n - 1)
+
+
+def SampleWindField(WindField, x, y, z, t, URef=None):
+    """Velocity at points and times with trilinear interpolation in (t, y, z).
+
+      Frozen turbulence (Taylor's hypothesis): the field passes the rotor
+      (x = 0) at the time of the grid, a point at x (downwind) sees it x/URef
+      later. The field is periodic in time; points outside the grid are NaN.
+
+      Args:
+        WindField: Wind field, see LoadWindField.
+        x, y, z: Coordinates [m], z as height above ground.
+        t: Time [s], broadcast with the coordinates.
+        URef: Mean wind speed for the time shift, default: of the wind field.
+
+      Returns:
+        Array (..., 3) with the velocity components [m/s].
+      """
+    URef = WindField['URef'] if URef is None else URef
+    velocity = WindField['velocity']
+    _, ny, nz, nt = velocity.shape
+    shape = np.broadcast_shapes(*[np.shape(v) for v in (x, y, z, t)])
+    x, y, z, t = [np.ravel(v) for v in np.broadcast_arrays(x, y, z, t)]
+
+    it0, it1, ft, _ = _GridIndex((t - x/URef) / WindField['dt'], nt, periodic=True)
+    iy0, iy1, fy, outside_y = _GridIndex((y - WindField['y'][0]) / (WindField['y'][1] - WindField['y'][0]), ny)
+    iz0, iz1, fz, outside_z = _GridIndex((z - WindField['z'][0]) / (WindField['z'][1] - WindField['z'][0]), nz)
+
+    flat = velocity.reshape(3, -1)
+    V = np.zeros((len(x), 3))
+    for it, wt in ((it0, 1 - ft), (it1, ft)):
+        for iy, wy in ((iy0, 1 - fy), (iy1, fy)):
+            for iz, wz in ((iz0, 1 - fz), (iz1, fz)):
+                V += (wt*wy*wz)[:, None] * flat[:, (iy*nz + iz)*nt + it].T
+    V[outside_y | outside_z] = np.nan
+    return V.reshape(shape + (3,))
+
+
+def SimulateLidar(WindField, Config, TMax=None, IndexGate=1, NacellePosition=(0, 0, 0), URef=None):
+    """Simulates lidar measurements in a wind field, as the lidar simulator and LDP_v1.
+
+      The beams are measured one after another every t_measurement_interval,
+      all range gates of a beam at once. The line-of-sight speed is the
+      range-weighted projection of the velocity on the beam (positive towards
+      the lidar). The REWS is reconstructed as in LDP_v1: u is estimated from
+      the line-of-sight speed of the gate(s) IndexGate assuming perfect
+      alignment and averaged over the last full scan.
+
+      Example:
+        Config = ReadLidarFile('LidarFile_4BeamPulsed.dat')
+        Lidar = SimulateLidar('TurbulentWind/URef_18_Seed_01.wnd', Config, IndexGate=6)
+
+      Args:
+        WindField: Wind file (.wnd) or wind field, see LoadWindField.
+        Config: Lidar configuration, see ReadLidarFile. The points can be
+          changed to evaluate other trajectories.
+        TMax: Simulation time [s], default: length of the wind field.
+        IndexGate: Index (1-based) of the range gate for the REWS, or a list
+          of indices to average the u estimates of several gates.
+        NacellePosition: See GetLidarPoints.
+        URef: Mean wind speed for the time shift, default: of the wind field.
+
+      Returns:
+        A dict with Time [s], BeamID (0-based), v_los (nMeasurements, nGates)
+        [m/s] and REWS [m/s].
+      """
+    if isinstance(WindField, str):
+        WindField = LoadWindField(WindField)
+    Points, Direction = GetLidarPoints(Config, NacellePosition)
+    nBeams = Points.shape[0]
+    dt = Config['t_measurement_interval']
+    TMax = WindField['velocity'].shape[-1] * WindField['dt'] if TMax is None else TMax
+
+    Time = dt * np.arange(int(round(TMax / dt)))
+    BeamID = np.arange(len(Time)) % nBeams
+
+    # line-of-sight speed of each point for all time steps of the field, interpolated in (y, z) once
+    velocity = WindField['velocity']
+    _, ny, nz, nt = velocity.shape
+    y, z = Points[..., 1].ravel(), Points[..., 2].ravel() + WindField['zHub']
+    iy0, iy1, fy, outside_y = _GridIndex((y - WindField['y'][0]) / (WindField['y'][1] - WindField['y'][0]), ny)
+    iz0, iz1, fz, outside_z = _GridIndex((z - WindField['z'][0]) / (WindField['z'][1] - WindField['z'][0]), nz)
+    e = -np.repeat(Direction, Points.shape[2], axis=1).reshape(-1, 3)
+    LOS = np.zeros((len(y), nt), dtype=np.float32)
+    for iy, iz, w in ((iy0, iz0, (1 - fy)*(1 - fz)), (iy1, iz0, fy*(1 - fz)), (iy0, iz1, (1 - fy)*fz), (iy1, iz1, fy*fz)):
+        for c in range(3):
+            LOS += (w * e[:, c]).astype(np.float32)[:, None] * velocity[c, iy, iz]
+    LOS[outside_y | outside_z] = np.nan
+    LOS = LOS.reshape(Points.shape[:3] + (nt,))
+
+    # frozen turbulence: a point at x sees the field x/URef later, linear interpolation in time
+    URef = WindField['URef'] if URef is None else URef
+    it0, it1, ft, _ = _GridIndex((Time[:, None, None] - Points[BeamID, :, :, 0]/URef) / WindField['dt'], nt, periodic=True)
+    iBeam, iGate, iWeight = BeamID[:, None, None], np.arange(Points.shape[1])[:, None], np.arange(Points.shape[2])
+    v_los_points = (1 - ft) * LOS[iBeam, iGate, iWeight, it0] + ft * LOS[iBeam, iGate, iWeight, it1]
+    v_los = v_los_points @ Config['Weights']
+
+    # LDP_v1: estimate u and average over the last full scan, ignoring invalid measurements
+    Gates = np.atleast_1d(IndexGate) - 1
+    u_est = np.mean(v_los[:, Gates] / -Direction[BeamID[:, None], Gates, 0], axis=1)
+    valid = ~np.isnan(u_est)
+    Sum = np.cumsum(np.where(valid, u_est, 0))
+    Count = np.cumsum(valid)
+    Sum[nBeams:] -= Sum[:-nBeams].copy()
+    Count[nBeams:] -= Count[:-nBeams].copy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        REWS = np.where(Count > 0, Sum / np.maximum(Count, 1), np.nan)
+    return {'Time': Time, 'BeamID': BeamID, 'v_los': v_los, 'REWS': REWS}
\ No newline at end of file
@@ -0,0 +1,253 @@
+import os
+import itertools
+import numpy as np
+import pandas as pd
+from FASTInputFile import ReadFASTInputFile
+from RotorPerformance import ReadRotorPerformance, CalculateStaticPitchCurve
+from ReplayFFP import ReadFFPParameters, ReplayFFP
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def ReadSurrogateParameters(ROSCOInFileName, FFPInFileName=None):
+    """Reads the parameters of the reduced-order rotor model from the ROSCO (and FFP) input files.
+
+      The model uses the rotor performance (PerfFileName), the drivetrain
+      inertia WE_Jtot, the generator speed filter, the gain-scheduled pitch
+      controller, the torque limits and the pitch actuator of ROSCO. The
+      static pitch curve and the filter parameters of the feedforward are
+      taken from the FFP input file, if given; otherwise the static pitch
+      curve is calculated from the rotor performance.
+
+      Args:
+        ROSCOInFileName: ROSCO input file, e.g. ROSCO_v2d6.IN.
+        FFPInFileName: FFP_v1 input file, e.g. FFP_v1_CircularCW.IN.
+
+      Returns:
+        A dict with the parameters.
+      """
+    ROSCO = ReadFASTInputFile(ROSCOInFileName)
+    PerfFileName = os.path.join(os.path.dirname(os.path.abspath(ROSCOInFileName)), ROSCO['PerfFileName'])
+    Parameters = {'Performance': ReadRotorPerformance(PerfFileName)}
+    for Name in ['WE_BladeRadius', 'WE_GearboxRatio', 'WE_Jtot', 'WE_RhoAir',
+                 'F_LPFCornerFreq', 'F_LPFDamping', 'PC_MaxPit', 'PC_MinPit', 'PC_MaxRat', 'PC_MinRat',
+                 'PC_RefSpd', 'PC_FinePit', 'VS_GenEff', 'VS_MaxRat', 'VS_MaxTq', 'VS_MinTq', 'VS_Rgn2K',
+                 'VS_RtPwr', 'PA_Mode', 'PA_CornerFreq', 'PA_Damping']:
+        Parameters[Name] = ROSCO[Name]
+    for Name in ['PC_GS_angles', 'PC_GS_KP', 'PC_GS_KI']:
+        Parameters[Name] = np.atleast_1d(np.asarray(ROSCO[Name], dtype=float))
+
+    if FFPInFileName is not None:
+        Parameters.update(ReadFFPParameters(FFPInFileName))
+    else:
+        Parameters['StaticWind'] = np.arange(3, 30.5, 0.5)
+        Parameters['StaticPitch'] = CalculateStaticPitchCurve(ROSCOInFileName, Parameters['StaticWind'])
+    return Parameters
+
+
+def _SecLPFCoefficients(DT, CornerFreq, Damp):
+    # second-order low-pass filter of ROSCO (SecLPFilter), normalized by a2
+    w2 = DT**2*CornerFreq**2
+    a2 = w2 + 4 + 4*Damp*CornerFreq*DT
+    return np.array([w2, 2*w2, w2]) / a2, np.array([2*w2 - 8, w2 + 4 - 4*Damp*CornerFreq*DT]) / a2
+
+
+def _PitchActuatorCoefficients(DT, PA_Mode, CornerFreq, Damp):
+    # pitch actuator of ROSCO as second-order filter: none, LPFilter or SecLPFilter
+    if PA_Mode == 1:
+        wDT = CornerFreq*DT
+        return np.array([wDT, wDT, 0]) / (2 + wDT), np.array([(wDT - 2) / (2 + wDT), 0])
+    if PA_Mode == 2:
+        return _SecLPFCoefficients(DT, CornerFreq, Damp)
+    return np.array([1.0, 0, 0]), np.zeros(2)
+
+
+def _SurrogateKernel(v, FF_PitchRate, Omega, Pitch, DT, R, G, J, rho, TSR_Table, Pitch_Table, Cp_Table,
+                     b_GS, a_GS, b_PF, a_PF, b_PA, a_PA,
+                     GS_angles, GS_KP, GS_KI, RefSpd, MinPit, MaxPit, MinRat, MaxRat,
+                     P_Gen, Rgn2K, MinTq, MaxTq, MaxTqRat, RotSpeed, BlPitch, GenTq):
+    # explicit Euler integration of the rotor speed, one step for all cases;
+    # the filters start in the steady state of the initial values
+    nCase, nt = v.shape
+    nPitch = len(Pitch_Table)
+    Cp_Flat = Cp_Table.ravel()
+    GenSpeed = Omega*G
+    GS_u1, GS_u2, GS_y1, GS_y2 = GenSpeed, GenSpeed, GenSpeed, GenSpeed
+    PF_u1, PF_u2, PF_y1, PF_y2 = Pitch, Pitch, Pitch, Pitch
+    PA_u1, PA_u2, PA_y1, PA_y2 = Pitch, Pitch, Pitch, Pitch
+    ITerm = Pitch
+    PitComT_Last = Pitch
+    Tq = np.minimum(np.minimum(Rgn2K*GenSpeed**2, P_Gen/GenSpeed), MaxTq)
+
+    for i in range(nt):
+        # aerodynamics: bilinear interpolation of Cp, constant outside of the table
+        TSR = Omega*R/v[:, i]
+        PitchDeg = np.rad2deg(Pitch)
+        iT = np.minimum(np.maximum(np.searchsorted(TSR_Table, TSR, side='right') - 1, 0), len(TSR_Table) - 2)
+        iP = np.minimum(np.maximum(np.searchsorted(Pitch_Table, PitchDeg, side='right') - 1, 0), nPitch - 2)
+        fT = np.minimum(np.maximum((TSR - TSR_Table[iT]) / (TSR_Table[iT + 1] - TSR_Table[iT]), 0.0), 1.0)
+        fP = np.minimum(np.maximum((PitchDeg - Pitch_Table[iP]) / (Pitch_Table[iP + 1] - Pitch_Table[iP]), 0.0), 1.0)
+        k = iT*nPitch + iP
+        Cp = ((1 - fT)*((1 - fP)*Cp_Flat[k] + fP*Cp_Flat[k + 1])
+              + fT*((1 - fP)*Cp_Flat[k + nPitch] + fP*Cp_Flat[k + nPitch + 1]))
+        AeroTq = 0.5*rho*np.pi*R**2*v[:, i]**3*Cp/Omega
+
+        RotSpeed[:, i] = Omega
+        BlPitch[:, i] = Pitch
+        GenTq[:, i] = Tq
+
+        # generator speed filter
+        GenSpeed = Omega*G
+        GenSpeedF = b_GS[0]*GenSpeed + b_GS[1]*GS_u1 + b_GS[2]*GS_u2 - a_GS[0]*GS_y1 - a_GS[1]*GS_y2
+        GS_u1, GS_u2, GS_y1, GS_y2 = GenSpeed, GS_u1, GenSpeedF, GS_y1
+
+        # torque controller: region 2 law, constant power above rated
+        TqCom = np.maximum(np.minimum(np.minimum(Rgn2K*GenSpeedF**2, P_Gen/GenSpeedF), MaxTq), MinTq)
+        Tq = np.minimum(np.maximum(TqCom, Tq - MaxTqRat*DT), Tq + MaxTqRat*DT)
+
+        # gain-scheduled PI pitch controller with feedforward pitch rate (PIControllerFF)
+        KP = np.interp(PF_y1, GS_angles, GS_KP)
+        KI = np.interp(PF_y1, GS_angles, GS_KI)
+        SpdErr = RefSpd - GenSpeedF
+        ITerm = np.minimum(np.maximum(ITerm + DT*KI*SpdErr + DT*FF_PitchRate[:, i], MinPit), MaxPit)
+        PitComT = np.minimum(np.maximum(KP*SpdErr + ITerm, MinPit), MaxPit)
+        PitComT = np.minimum(np.maximum(PitComT, PitComT_Last + MinRat*DT), PitComT_Last + MaxRat*DT)
+        PitComT_Last = PitComT
+        PitComTF = b_PF[0]*PitComT + b_PF[1]*PF_u1 + b_PF[2]*PF_u2 - a_PF[0]*PF_y1 - a_PF[1]*PF_y2
+        PF_u1, PF_u2, PF_y1, PF_y2 = PitComT, PF_u1, PitComTF, PF_y1
+
+        # pitch actuator
+        Pitch = b_PA[0]*PitComT + b_PA[1]*PA_u1 + b_PA[2]*PA_u2 - a_PA[0]*PA_y1 - a_PA[1]*PA_y2
+        PA_u1, PA_u2, PA_y1, PA_y2 = PitComT, PA_u1, Pitch, PA_y1
+
+        # drivetrain
+        Omega = np.maximum(Omega + DT*(AeroTq - G*Tq)/J, 1e-3)
+
+
+if njit is not None:
+    _SurrogateKernelCompiled = njit(cache=True)(_SurrogateKernel)
+
+
+def SimulateRotorSurrogate(Parameters, REWS_Rotor, DT, REWS_Lidar=None, f_cutoff=None, T_buffer=None):
+    """Simulates a reduced-order rotor model with ROSCO feedback and FFP_v1 feedforward, for many cases at once.
+
+      The model has the rotor speed as only degree of freedom, driven by the
+      aerodynamic torque from the Cp table and the generator torque. The
+      controller mirrors ROSCO (second-order generator speed filter,
+      gain-scheduled PI pitch controller with the feedforward pitch rate on
+      the integrator, rate limits, PA_Mode pitch actuator); the torque is
+      simplified to the region 2 law and constant power above rated.
+      Structural dynamics, peak shaving and setpoint smoothing are not
+      modelled, so the results are meant for pre-screening, e.g. of the
+      relative change of the rotor speed standard deviation, before OpenFAST
+      simulations. All cases are integrated in one loop, which is compiled
+      with numba if it is installed.
+
+      Example (6 seeds, feedback only and feedback-feedforward):
+        Parameters = ReadSurrogateParameters('ROSCO_v2d6.IN', 'FFP_v1_CircularCW.IN')
+        FB = SimulateRotorSurrogate(Parameters, REWS_Rotor, 0.0125)
+        FBFF = SimulateRotorSurrogate(Parameters, REWS_Rotor, 0.0125, REWS_Lidar)
+
+      Args:
+        Parameters: Parameters of the model, see ReadSurrogateParameters.
+        REWS_Rotor: Rotor-effective wind speed [m/s], (..., nt), e.g. from
+          CalculateREWSfromWindField.
+        DT: Time step [s].
+        REWS_Lidar: REWS estimated by the lidar [m/s], broadcast with
+          REWS_Rotor, e.g. from SimulateLidar; None for feedback only.
+        f_cutoff: Corner frequency of the feedforward filter [rad/s] (inf:
+          no filter), broadcast with the cases, default: from the FFP input
+          file in Parameters.
+        T_buffer: Buffer time of the feedforward [s], broadcast with the
+          cases, default: from the FFP input file in Parameters.
+
+      Returns:
+        A dict with Time [s] and RotSpeed [rpm], BlPitch1 [deg] and GenTq
+        [kNm] (..., nt), named as the OpenFAST channels.
+      """
+    REWS_Rotor = np.asarray(REWS_Rotor, dtype=float)
+    nt = REWS_Rotor.shape[-1]
+    if REWS_Lidar is not None:
+        f_cutoff = Parameters.get('f_cutoff') if f_cutoff is None else f_cutoff
+        T_buffer = Parameters.get('T_buffer') if T_buffer is None else T_buffer
+        if f_cutoff is None or T_buffer is None:
+            raise Exception('f_cutoff and T_buffer must be given, the parameters were read without FFP input file')
+        FFP, _ = ReplayFFP(REWS_Lidar, DT, f_cutoff, T_buffer, Parameters['StaticWind'], Parameters['StaticPitch'], Parameters.get('FlagLPF', 1))
+        FF_PitchRate = FFP['FF_PitchRate']
+        Shape = np.broadcast_shapes(REWS_Rotor.shape, FF_PitchRate.shape)[:-1]
+    else:
+        FF_PitchRate = np.zeros(1)
+        Shape = REWS_Rotor.shape[:-1]
+    v = np.ascontiguousarray(np.broadcast_to(REWS_Rotor, Shape + (nt,)).reshape(-1, nt))
+    FF_PitchRate = np.ascontiguousarray(np.broadcast_to(FF_PitchRate, Shape + (nt,)).reshape(-1, nt))
+
+    # initial conditions: rated speed and static pitch, at least fine pitch
+    G = Parameters['WE_GearboxRatio']
+    MinPit = max(Parameters['PC_FinePit'], Parameters['PC_MinPit'])
+    Omega = np.full(len(v), Parameters['PC_RefSpd']/G)
+    Pitch = np.maximum(np.interp(v[:, 0], Parameters['StaticWind'], Parameters['StaticPitch']), MinPit)
+
+    Performance = Parameters['Performance']
+    b_GS, a_GS = _SecLPFCoefficients(DT, Parameters['F_LPFCornerFreq'], Parameters['F_LPFDamping'])
+    b_PF, a_PF = _SecLPFCoefficients(DT, Parameters['F_LPFCornerFreq']*0.25, 0.7)
+    b_PA, a_PA = _PitchActuatorCoefficients(DT, Parameters['PA_Mode'], Parameters['PA_CornerFreq'], Parameters['PA_Damping'])
+    RotSpeed, BlPitch, GenTq = np.empty_like(v), np.empty_like(v), np.empty_like(v)
+    Kernel = _SurrogateKernelCompiled if njit is not None else _SurrogateKernel
+    Kernel(v, FF_PitchRate, Omega, Pitch, float(DT),
+           float(Parameters['WE_BladeRadius']), float(G), float(Parameters['WE_Jtot']), float(Parameters['WE_RhoAir']),
+           Performance['TSR'], Performance['Pitch'], np.ascontiguousarray(Performance['Cp']),
+           b_GS, a_GS, b_PF, a_PF, b_PA, a_PA,
+           Parameters['PC_GS_angles'], Parameters['PC_GS_KP'], Parameters['PC_GS_KI'],
+           float(Parameters['PC_RefSpd']), float(MinPit), float(Parameters['PC_MaxPit']),
+           float(Parameters['PC_MinRat']), float(Parameters['PC_MaxRat']),
+           float(Parameters['VS_RtPwr']/(Parameters['VS_GenEff']/100)), float(Parameters['VS_Rgn2K']),
+           float(Parameters['VS_MinTq']), float(Parameters['VS_MaxTq']), float(Parameters['VS_MaxRat']),
+           RotSpeed, BlPitch, GenTq)
+
+    return {'Time': np.arange(nt)*DT,
+            'RotSpeed': (RotSpeed*30/np.pi).reshape(Shape + (nt,)),
+            'BlPitch1': np.rad2deg(BlPitch).reshape(Shape + (nt,)),
+            'GenTq': (GenTq/1e3).reshape(Shape + (nt,))}
+
+
+def ScreenFeedforwardParameters(Parameters, REWS_Rotor, REWS_Lidar, DT, f_cutoff_v, T_buffer_v, t_start=60):
+    """Change in rotor speed standard deviation for all combinations of f_cutoff and T_buffer.
+
+      The metric is the one of RunExample_CircularCW.py: the mean standard
+      deviation of the rotor speed over all seeds with feedforward, relative
+      to feedback only, ignoring the data before t_start. All combinations
+      and seeds are simulated in one run of SimulateRotorSurrogate.
+
+      Example:
+        Parameters = ReadSurrogateParameters('ROSCO_v2d6.IN', 'FFP_v1_CircularCW.IN')
+        Screening = ScreenFeedforwardParameters(Parameters, REWS_Rotor, REWS_Lidar, 0.0125, np.linspace(0.1, 0.6, 11), np.arange(4, 9))
+
+      Args:
+        Parameters: Parameters of the model, see ReadSurrogateParameters.
+        REWS_Rotor: Rotor-effective wind speed [m/s], (nSeed, nt).
+        REWS_Lidar: REWS estimated by the lidar [m/s], (nSeed, nt).
+        DT: Time step [s].
+        f_cutoff_v: Corner frequencies of the feedforward filter [rad/s].
+        T_buffer_v: Buffer times of the feedforward [s].
+        t_start: Ignore data before for the standard deviation [s].
+
+      Returns:
+        A DataFrame with f_cutoff, T_buffer, STD_RotSpeed [rpm] and
+        Change [%] for each combination.
+      """
+    REWS_Rotor = np.atleast_2d(REWS_Rotor)
+    REWS_Lidar = np.atleast_2d(REWS_Lidar)
+    Combinations = np.array(list(itertools.product(f_cutoff_v, T_buffer_v)), dtype=float)
+
+    FB = SimulateRotorSurrogate(Parameters, REWS_Rotor, DT)
+    FBFF = SimulateRotorSurrogate(Parameters, REWS_Rotor[None], DT, REWS_Lidar[None],
+                                  Combinations[:, 0, None], Combinations[:, 1, None])
+    Analysis = FB['Time'] > t_start
+    STD_RotSpeed_FB = np.mean(np.std(FB['RotSpeed'][..., Analysis], axis=-1))
+    STD_RotSpeed_FBFF = np.mean(np.std(FBFF['RotSpeed'][..., Analysis], axis=-1), axis=-1)
+    return pd.DataFrame({'f_cutoff': Combinations[:, 0], 'T_buffer': Combinations[:, 1],
+                         'STD_RotSpeed': STD_RotSpeed_FBFF,
+                         'Change': (STD_RotSpeed_FBFF/STD_RotSpeed_FB - 1)*100})
\ No newline at end of file
@@ -0,0 +1,101 @@
+import os
+import re
+import shutil
+import fnmatch
+
+
+StageTextExtensions = ('.fst', '.dat', '.in', '.inp', '.ipt')  # input files scanned for relative paths
+
+
+def StageSimulationCase(TemplateFolder, CaseFolder, modifications=None, files=None,
+                        exclude=('*.m', '*.py', '*.mat'), link='hard'):
+    """Materializes a simulation case in its own folder.
+
+      Input files with modifications are written as modified copies, all other
+      files are hard-linked (or symlinked or copied, if linking is not possible),
+      so many cases can be staged cheaply and simulated at the same time without
+      touching the template files. Quoted relative paths pointing out of the
+      template folder (e.g. "../IEA-15-240-RWT/IEA-15-240-RWT_AeroDyn15.dat")
+      are rewritten for the location of the case folder.
+
+      Example: FB case of IEA15MW_03
+        StageSimulationCase('.', 'Cases/URef_18_Seed_1801_FlagLAC_0', modifications={
+            'ROSCO_v2d6.IN': [('1 ! FlagLAC', '0 ! FlagLAC')],
+            'IEA-15-240-RWT_InflowFile.dat': [('MyFilenameRoot', '../../TurbulentWind/URef_18_Seed_1801')]})
+
+      Args:
+        TemplateFolder: Folder with the input files of the simulation.
+        CaseFolder: Folder of the case, created if needed.
+        modifications: Dict with file names (relative to TemplateFolder) as keys
+          and lists of (string_to_replace, new_string) as values, applied to
+          each line as in ManipulateTXTFile.
+        files: List of file names to stage, default: all files in TemplateFolder.
+        exclude: Glob patterns of files which are not staged.
+        link: 'hard', 'symbolic' or 'copy' for unchanged files.
+
+      Returns:
+        The path to the case folder.
+      """
+    modifications = modifications or {}
+    if files is None:
+        files = [name for name in sorted(os.listdir(TemplateFolder))
+                 if os.path.isfile(os.path.join(TemplateFolder, name))
+                 and not any(fnmatch.fnmatch(name, pattern) for pattern in exclude)]
+    files = list(files) + [name for name in modifications if name not in files]
+    for name in modifications:
+        if not os.path.exists(os.path.join(TemplateFolder, name)):
+            raise Exception('Could not find file to modify: ' + os.path.join(TemplateFolder, name))
+
+    os.makedirs(CaseFolder, exist_ok=True)
+    for name in files:
+        source = os.path.join(TemplateFolder, name)
+        target = os.path.join(CaseFolder, name)
+        os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+
+        text = None
+        if name in modifications or os.path.splitext(name)[1].lower() in StageTextExtensions:
+            with open(source, 'r', newline='') as fid:
+                text = fid.read()
+            text_new = _RewriteRelativePaths(text, os.path.dirname(source), os.path.dirname(target))
+            lines = text_new.splitlines(True)
+            for string_to_replace, new_string in modifications.get(name, []):
+                lines = [line.replace(string_to_replace, new_string) for line in lines]
+            text_new = ''.join(lines)
+            if text_new == text:
+                text = None
+
+        # never write through an existing link to the template
+        if os.path.lexists(target):
+            os.remove(target)
+        if text is not None:
+            temp_file = '{}.{}.tmp'.format(target, os.getpid())
+            with open(temp_file, 'w', newline='') as fid:
+                fid.write(text_new)
+            os.replace(temp_file, target)
+        else:
+            _LinkFile(source, target, link)
+
+    return CaseFolder
+
+
+def _RewriteRelativePaths(text, source_folder, target_folder):
+    def rewrite(match):
+        path = os.path.relpath(os.path.join(source_folder, match.group(1)), target_folder)
+        return '"' + path.replace(os.sep, '/') + '"'
+    return re.sub(r'"(\.\.[/\\][^"]*)"', rewrite, text)
+
+
+def _LinkFile(source, target, link):
+    if link == 'hard':
+        try:
+            os.link(source, target)
+            return
+        except OSError:
+            link = 'symbolic'
+    if link == 'symbolic':
+        try:
+            os.symlink(os.path.abspath(source), target)
+            return
+        except OSError:
+            pass
+    shutil.copy2(source, target)
\ No newline at end of file
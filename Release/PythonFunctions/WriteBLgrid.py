@@ -0,0 +1,73 @@
+import numpy as np
+from Num2Str import Num2Str
+
+
+def WriteBLgrid(FileName, velocity, dy, dz, dt, zOffset, z0, SummVars):
+    """Writes wind velocity data to a Bladed-style wind file (.wnd).
+
+      The velocity is packed to int16 (rounded and saturated as fwrite in
+      MATLAB) and written with the header in one block.
+
+      Args:
+        FileName: Name of the .wnd file (the .wnd extension is optional).
+        velocity: Array (nt, 3, ny, nz) with the velocity components [m/s].
+        dy, dz: Grid spacing [m].
+        dt: Time step [s].
+        zOffset: Reference height [m] = Z(1) + GridHeight / 2.0.
+        z0: Roughness length [m].
+        SummVars: 6 variables from the summary file (zHub, Clockwise, UBAR,
+          TI_u, TI_v, TI_w).
+      """
+    if FileName.lower().endswith('.wnd'):
+        FileName = FileName[:-4]
+
+    fc  = 4                 # should be 4 to allow turbulence intensity to be stored in the header
+    lat = 0                 # latitude (deg)
+
+    nt, nffc, ny, nz = np.shape(velocity)
+    MFFWS = SummVars[2]     # mean full-field wind speed
+    dx = dt*MFFWS           # delta x in m
+    nt_header = nt // 2     # half the number of time steps
+
+    # -----------------------------------------
+    # HEADER OF THE BINARY FILE (NEWER-STYLE AERODYN WIND FILE)
+    # -----------------------------------------
+    header = np.zeros(1, dtype=[('nffc_id', '<i2'), ('fc', '<i2'), ('nffc', '<i4'),
+                                ('lat', '<f4'), ('z0', '<f4'), ('zOffset', '<f4'),
+                                ('TI', '<f4', 3), ('dz', '<f4'), ('dy', '<f4'), ('dx', '<f4'),
+                                ('nt', '<i4'), ('MFFWS', '<f4'), ('unused_f', '<f4', 3), ('unused_i', '<i4', 2),
+                                ('nz', '<i4'), ('ny', '<i4'), ('unused', '<i4', 3*(nffc-1))])
+    header[0] = (-99, fc, nffc, lat, z0, zOffset, SummVars[3:6], dz, dy, dx, nt_header, MFFWS, 0, 0, nz, ny, 0)
+
+    # -----------------------------------------
+    # GRID DATA
+    # -----------------------------------------
+    Scale  = 0.00001*SummVars[2]*np.asarray(SummVars[3:6], dtype=float)
+    Offset = np.array([SummVars[2], 0, 0])
+
+    velocity = np.asarray(velocity, dtype=float)
+    if SummVars[1] > 0:  # clockwise rotation: flip the y direction
+        velocity = velocity[:, :, ::-1, :]
+    packed = (velocity - Offset[:nffc, None, None]) / Scale[:nffc, None, None]
+    packed = np.clip(np.sign(packed) * np.floor(np.abs(packed) + 0.5), -32768, 32767)
+
+    with open(FileName + '.wnd', 'wb') as fid_wnd:
+        header.tofile(fid_wnd)
+        packed.transpose(0, 3, 2, 1).astype('<i2').tofile(fid_wnd)  # (nt, nz, ny, nffc)
+
+
+def WriteBLgridSummary(FileName, SummVars, HeightOffset=0):
+    """Writes the summary file (.sum) of a .wnd file with the information required by OpenFAST."""
+    if FileName.lower().endswith('.wnd'):
+        FileName = FileName[:-4]
+    with open(FileName + '.sum', 'w') as fid:
+        fid.write('This summary file is not complete it only contains required information for the OpenFAST\n')
+        fid.write('{}        Clockwise rotation when looking downwind?\n'.format('T' if SummVars[1] > 0 else 'F'))
+        fid.write('{}  Hub height [m] \n'.format(Num2Str(SummVars[0])))
+        fid.write('UBar   =  {} m/s \n'.format(Num2Str(SummVars[2])))
+        fid.write('TI(u)  =  {} %\n'.format(Num2Str(SummVars[3])))
+        fid.write('TI(v)  =  {} %\n'.format(Num2Str(SummVars[4])))
+        fid.write('TI(w)  =  {} %\n'.format(Num2Str(SummVars[5])))
+        fid.write('Height Offset =  {} m\n'.format(Num2Str(HeightOffset)))
+        fid.write('Creating a PERIODIC output file.')
+# source: Matlab-Function (WriteBLgrid.m)
\ No newline at end of file
@@ -0,0 +1,149 @@
+import os
+import itertools
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from WriteBLgrid import WriteBLgrid, WriteBLgridSummary
+from PreProcessingSimulations import GetSimulationName
+
+
+def CalculateGust(t, GustType, V_hub, T_gust=None, t_start=5, V_ref=50, I_ref=0.14, D=240, lambda1=42):
+    """Deterministic gust of IEC 61400-1 Ed. 3 at hub height, for all time steps at once.
+
+      Args:
+        t: Time [s].
+        GustType: 'EOG' (extreme operating gust), 'ECD' (extreme coherent gust
+          with direction change), 'EDC+' or 'EDC-' (extreme direction change).
+        V_hub: Mean wind speed at hub height [m/s].
+        T_gust: Length of the gust [s], default: 10.5 (EOG), 10 (ECD), 6 (EDC).
+        t_start: Time when the gust starts [s].
+        V_ref: Reference wind speed average over 10 min [m/s].
+        I_ref: Expected value of the turbulence intensity at 15 m/s [-].
+        D: Rotor diameter [m].
+        lambda1: Longitudinal scale parameter at hub height [m], 42 for hub
+          heights above 60 m.
+
+      Returns:
+        u, v: Wind speed components [m/s], the direction change turns the
+          wind towards positive y.
+      """
+    t = np.asarray(t, dtype=float)
+    sigma1 = I_ref * (0.75*V_hub + 5.6)
+    GustType = GustType.upper()
+    if GustType == 'EOG':
+        T_gust = 10.5 if T_gust is None else T_gust
+        V_e1 = 0.8*1.4*V_ref
+        V_gust = min(1.35*(V_e1 - V_hub), 3.3*(sigma1/(1 + 0.1*D/lambda1)))
+        t_EOG = t - t_start
+        during = (t_EOG >= 0) & (t_EOG <= T_gust)
+        u = np.where(during, V_hub - 0.37*V_gust*np.sin(3*np.pi*t_EOG/T_gust)*(1 - np.cos(2*np.pi*t_EOG/T_gust)), V_hub)
+        return u, np.zeros_like(u)
+
+    if GustType == 'ECD':
+        T_gust = 10 if T_gust is None else T_gust
+        V_cg = 15                                               # [m/s] extreme coherent gust magnitude
+        theta = np.pi if V_hub < 4 else np.deg2rad(720/V_hub)   # [rad] direction change
+        V = V_hub + 0.5*V_cg*_Ramp(t, t_start, T_gust)
+    elif GustType in ('EDC', 'EDC+', 'EDC-'):
+        T_gust = 6 if T_gust is None else T_gust
+        theta = 4*np.arctan(sigma1/(V_hub*(1 + 0.1*D/lambda1)))
+        theta = -theta if GustType == 'EDC-' else theta
+        V = np.full(t.shape, float(V_hub))
+    else:
+        raise Exception('Unknown gust type: ' + GustType)
+    Theta = 0.5*theta*_Ramp(t, t_start, T_gust)
+    return V*np.cos(Theta), V*np.sin(Theta)
+
+
+def _Ramp(t, t_start, T_gust):
+    # 1 - cos(pi*t/T) during the gust, 0 before and 2 after
+    t_gust = np.clip(t - t_start, 0, T_gust)
+    return 1 - np.cos(np.pi*t_gust/T_gust)
+
+
+def WriteGust2BladedWind(FileName, GustType='EOG', V_hub=18, T=40, dt=1/80, HubHeight=150, dy=150, dz=150, Ny=3, Nz=3, z0=0.1, **options):
+    """Writes a deterministic gust as Bladed-style wind file (.wnd and .sum).
+
+      The wind field is uniform over the grid. As in WriteGust2BladedWind.m,
+      the standard deviation of u is used for the turbulence intensities in
+      the header, which scale the int16 data; it is increased if a component
+      would not fit into int16.
+
+      Example (Wind/EOG_URef_18.wnd of IEA15MW_01):
+        WriteGust2BladedWind('EOG_URef_18', 'EOG', V_hub=18, T=40, t_start=5)
+
+      Args:
+        FileName: Name of the wind file (the .wnd extension is optional).
+        GustType, V_hub: See CalculateGust.
+        T: Simulation length [s].
+        dt: Time step [s].
+        HubHeight: Hub height [m].
+        dy, dz, Ny, Nz: Grid spacing [m] and number of grid points.
+        z0: Roughness length [m], not really used.
+        **options: See CalculateGust, e.g. T_gust and t_start.
+      """
+    t = np.arange(int(round(T/dt))) * dt
+    u, v = CalculateGust(t, GustType, V_hub, **options)
+
+    URef = V_hub
+    velocity = np.zeros((len(t), 3, Ny, Nz))
+    velocity[:, 0] = u[:, None, None]
+    velocity[:, 1] = v[:, None, None]
+
+    # here we use std u for v and w components, to avoid dividing by zero
+    TI = np.full(3, np.std(u, ddof=1)/URef*100)
+    Deviation = np.max(np.abs(np.stack([u - URef, v, np.zeros_like(u)])), axis=1)
+    TI = np.maximum(TI, Deviation / (0.00001*URef*32767) * 1.001)
+    SummVars = [HubHeight, 0, URef, *TI]
+
+    WriteBLgrid(FileName, velocity, dy, dz, dt, HubHeight, z0, SummVars)
+    WriteBLgridSummary(FileName, SummVars)
+
+
+def _WriteGust(args):
+    FileName, GustType, options = args
+    WriteGust2BladedWind(FileName, GustType, **options)
+    return FileName + '.wnd'
+
+
+def WriteGustFamily(WindFolder, GustType, URef_v, t_start_v=(5,), T_gust_v=(None,), n_processes=None, **options):
+    """Writes deterministic gusts for all combinations of URef, t_start and T_gust.
+
+      The files are named as PreProcessingSimulations does, e.g.
+      EOG_URef_18.wnd or EOG_URef_18_tStart_15.wnd if several t_start are
+      given, and are written by a pool of processes.
+
+      Example:
+        WindFiles = WriteGustFamily('Wind', 'EOG', np.arange(4, 25, 2), t_start_v=[5, 15, 25], T=160)
+
+      Args:
+        WindFolder: Folder of the wind files.
+        GustType: See CalculateGust.
+        URef_v: Mean wind speeds at hub height [m/s].
+        t_start_v: Times when the gust starts [s].
+        T_gust_v: Lengths of the gust [s], None for the default.
+        n_processes: Number of processes, default: number of cores, 0 for no
+          parallel processing.
+        **options: See WriteGust2BladedWind.
+
+      Returns:
+        The list of the wind files (.wnd).
+      """
+    os.makedirs(WindFolder, exist_ok=True)
+    Variation = [('URef', URef_v, None)]
+    if len(t_start_v) > 1:
+        Variation.append(('tStart', t_start_v, None))
+    if len(T_gust_v) > 1:
+        Variation.append(('TGust', T_gust_v, None))
+
+    tasks = []
+    for URef, t_start, T_gust in itertools.product(URef_v, t_start_v, T_gust_v):
+        Values = {'URef': URef, 'tStart': t_start, 'TGust': T_gust}
+        SimulationName = GetSimulationName(Variation, [Values[Identifier] for Identifier, _, _ in Variation])
+        FileName = os.path.join(WindFolder, GustType.replace('+', 'p').replace('-', 'm') + '_' + SimulationName)
+        tasks.append((FileName, GustType, {**options, 'V_hub': URef, 't_start': t_start, 'T_gust': T_gust}))
+
+    if n_processes == 0 or len(tasks) <= 1:
+        return [_WriteGust(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=n_processes or os.cpu_count()) as executor:
+        return list(executor.map(_WriteGust, tasks))
+# source: Matlab-Function (WriteGust2BladedWind.m)
\ No newline at end of file
@@ -0,0 +1,29 @@
+import os
+import numpy as np
+from GenerateTurbulentWindFields import ReadTurbSimInputFile, GenerateTurbulentWindFields
+
+TemplateFile = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'IEA15MW_03', 'TurbSim2aInputFileTemplateIEA15MW.inp')
+
+
+def _Generate(ScaleIEC):
+    # small grid of the template to keep the test fast
+    Parameters = ReadTurbSimInputFile(TemplateFile)
+    Parameters.update({'NumGrid_Y': 5, 'NumGrid_Z': 5, 'AnalysisTime': 120, 'ScaleIEC': ScaleIEC})
+    velocity = GenerateTurbulentWindFields(Parameters, [1801, 1802])
+    return Parameters, velocity
+
+
+def test_ScaleIEC_1_uses_hub_scale_per_component():
+    Parameters, velocity = _Generate(1)
+    for v in velocity:
+        np.testing.assert_allclose(np.std(v[:, :, 2, 2], axis=0), Parameters['sigma'], rtol=1e-4)
+        # uniform scaling: the other points keep their random deviation
+        assert not np.allclose(np.std(v[:, :, 0, 0], axis=0), Parameters['sigma'], rtol=1e-4)
+
+
+def test_ScaleIEC_2_scales_every_point():
+    Parameters, velocity = _Generate(2)
+    for v in velocity:
+        np.testing.assert_allclose(np.std(v[:, :, 2, 2], axis=0), Parameters['sigma'], rtol=1e-4)
+        np.testing.assert_allclose(np.std(v[:, :, 0, 0], axis=0), Parameters['sigma'], rtol=1e-4)
+        np.testing.assert_allclose(np.std(v, axis=0), np.broadcast_to(Parameters['sigma'][:, None, None], (3, 5, 5)), rtol=1e-4)
\ No newline at end of file
@@ -0,0 +1,45 @@
+import os
+import sys
+import stat
+from ProcessingSimulations import ProcessingSimulations
+
+# stub for openfast_x64.exe: writes <name>.outb and exits with 0, or fails
+# with exit code 3 for simulations named Fail*
+StubScript = '''#!{}
+import sys
+name = sys.argv[1][:-len('.fst')]
+if name.startswith('Fail'):
+    sys.stderr.write('FAST encountered an error in ' + name + '\\n')
+    sys.exit(3)
+open(name + '.outb', 'w').close()
+print('OpenFAST terminated normally: ' + name)
+'''
+
+
+def _WriteStub(SimulationFolder):
+    ExeFile = os.path.join(SimulationFolder, 'openfast_stub.py')
+    with open(ExeFile, 'w') as f:
+        f.write(StubScript.format(sys.executable))
+    os.chmod(ExeFile, os.stat(ExeFile).st_mode | stat.S_IEXEC)
+    return ExeFile
+
+
+def test_ProcessingSimulations_with_stub(tmp_path):
+    SimulationFolder = str(tmp_path)
+    _WriteStub(SimulationFolder)
+    SimulationNames = ['URef_18_Seed_1801', 'Fail_URef_18_Seed_1802']
+    for SimulationName in SimulationNames:
+        open(os.path.join(SimulationFolder, SimulationName + '.fst'), 'w').close()
+
+    status, result = ProcessingSimulations(SimulationFolder, SimulationNames, 'openfast_stub.py', n_core=2, verbose=False)
+    assert status == [0, 3]
+    assert 'OpenFAST terminated normally: URef_18_Seed_1801' in result[0]
+    assert 'FAST encountered an error in Fail_URef_18_Seed_1802' in result[1]
+    assert os.path.exists(os.path.join(SimulationFolder, 'URef_18_Seed_1801.outb'))
+    assert not os.path.exists(os.path.join(SimulationFolder, 'Fail_URef_18_Seed_1802.outb'))
+
+    # second run: the successful simulation is skipped, the failed one runs again
+    status, result = ProcessingSimulations(SimulationFolder, SimulationNames, 'openfast_stub.py', n_core=0, verbose=False)
+    assert status == [None, 3]
+    assert result[0] == ''
+    assert 'FAST encountered an error' in result[1]
\ No newline at end of file